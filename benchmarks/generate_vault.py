@@ -0,0 +1,120 @@
+"""
+Generador de vaults de Obsidian sinteticos para los benchmarks.
+
+La historia se escribe con `git fast-import` (un solo proceso), asi que generar miles de
+commits "Backup vaultflow" tarda segundos. Todo es determinista a partir de la semilla.
+
+Uso:
+    python benchmarks/generate_vault.py DESTINO --notes 5000 --attachments 200 --history 3000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+from datetime import datetime, timedelta
+
+WORDS = (
+    "nota idea proyecto lectura resumen reunion tarea pendiente referencia concepto "
+    "sistema memoria diario pregunta respuesta fuente cita enlace tema revision plan "
+    "objetivo habito libro articulo curso clase apunte borrador version contexto"
+).split()
+TAGS = ["#idea", "#lectura", "#proyecto", "#diario", "#pendiente", "#referencia", "#revisar"]
+ATTACHMENT_EXTENSIONS = (".png", ".pdf", ".jpg", ".m4a")
+BACKUP_INTERVAL = timedelta(hours=1)
+
+def _folder(rng, depth):
+    return "/".join(f"{'Area' if level == 0 else 'Tema'}-{rng.randrange(6)}" for level in range(rng.randint(0, depth)))
+
+def _note_text(rng, title, titles, words):
+    links = " ".join(f"[[{rng.choice(titles)}]]" for _ in range(rng.randint(0, 4)))
+    tags = " ".join(rng.sample(TAGS, rng.randint(0, 3)))
+    body = " ".join(rng.choice(WORDS) for _ in range(words))
+    return f"---\ntitle: {title}\n---\n# {title}\n\n{body}\n\n{links}\n{tags}\n"
+
+def _data(text):
+    data = text.encode('utf-8') if isinstance(text, str) else text
+    return b"data %d\n" % len(data) + data + b"\n"
+
+def generate_vault(path, notes=1000, attachments=50, attachment_size=256 * 1024, depth=3, history=1000,
+                   log_entries=None, words=150, seed=1):
+    """
+    Crea en `path` un repositorio con `notes` notas repartidas en carpetas de hasta `depth` niveles,
+    `attachments` adjuntos de `attachment_size` bytes y `history` commits de backup anteriores
+    (cada uno modifica unas pocas notas). Escribe tambien un log de vaultflow con `log_entries`
+    entradas (por defecto, una por commit). Devuelve un resumen con lo generado.
+    """
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=False)
+    subprocess.run(['git', 'init', '-q', '-b', 'main', path], check=True)
+
+    titles = [f"Nota {i:05d}" for i in range(notes)]
+    note_paths = [os.path.join(_folder(rng, depth), f"{title}.md").lstrip("/").replace(os.sep, "/") for title in titles]
+    attachment_paths = [f"adjuntos/{_folder(rng, max(depth - 1, 0))}/archivo-{i:04d}{rng.choice(ATTACHMENT_EXTENSIONS)}".replace("//", "/")
+                        for i in range(attachments)]
+    start = datetime(2024, 1, 1, 8, 0, 0) - BACKUP_INTERVAL * history
+    identity = b"Vaultflow Bench <bench@vaultflow.invalid>"
+
+    stream = subprocess.Popen(['git', 'fast-import', '--quiet', '--done'], cwd=path, stdin=subprocess.PIPE)
+    out = stream.stdin
+
+    def commit(when, changes):
+        stamp = int(when.timestamp())
+        out.write(b"commit refs/heads/main\n")
+        out.write(b"committer " + identity + b" %d +0000\n" % stamp)
+        out.write(_data(f"Backup vaultflow - {when.strftime('%Y-%m-%d %H:%M:%S')}"))
+        for file_path, content in changes:
+            out.write(b"M 100644 inline " + file_path.encode('utf-8') + b"\n" + _data(content))
+
+    initial = [(p, _note_text(rng, t, titles, words)) for p, t in zip(note_paths, titles)]
+    initial += [(p, rng.randbytes(attachment_size)) for p in attachment_paths]
+    commit(start, initial)  # Los commits siguientes continuan la rama automaticamente
+    for i in range(1, history + 1):
+        changed = rng.sample(range(notes), min(notes, rng.randint(1, 5)))
+        commit(start + BACKUP_INTERVAL * i,
+               [(note_paths[n], _note_text(rng, titles[n], titles, words)) for n in changed])
+    out.write(b"done\n")
+    out.close()
+    if stream.wait() != 0: raise RuntimeError("git fast-import fallo")
+    subprocess.run(['git', 'reset', '-q', '--hard', 'main'], cwd=path, check=True)
+
+    log_entries = history if log_entries is None else log_entries
+    with open(os.path.join(path, ".vaultflow_log.jsonl"), 'w', encoding='utf-8') as f:
+        for i in range(log_entries):
+            when = start + BACKUP_INTERVAL * (history - log_entries + i + 1)
+            f.write(json.dumps({"timestamp": when.isoformat(), "command": "backup", "success": True,
+                                "message": f"Backup vaultflow - {when.strftime('%Y-%m-%d %H:%M:%S')}"}) + "\n")
+    with open(os.path.join(path, ".git", "info", "exclude"), 'a', encoding='utf-8') as f:
+        f.write("/.vaultflow_log.json*\n")
+    return {'path': os.path.abspath(path), 'notes': notes, 'attachments': attachments,
+            'attachment_size': attachment_size, 'depth': depth, 'history': history + 1, 'log_entries': log_entries}
+
+def touch_notes(path, count, seed=None):
+    """Modifica `count` notas existentes (para medir un backup con cambios reales)."""
+    rng = random.Random(seed)
+    notes = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d != '.git']
+        notes.extend(os.path.join(root, f) for f in files if f.endswith('.md'))
+    notes.sort()
+    for note in rng.sample(notes, min(count, len(notes))):
+        with open(note, 'a', encoding='utf-8') as f:
+            f.write(f"\n{' '.join(rng.choice(WORDS) for _ in range(20))}\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un vault de Obsidian sintetico con historia de backups.")
+    parser.add_argument('path')
+    parser.add_argument('--notes', type=int, default=1000)
+    parser.add_argument('--attachments', type=int, default=50)
+    parser.add_argument('--attachment-size', type=int, default=256 * 1024, help="Bytes por adjunto.")
+    parser.add_argument('--depth', type=int, default=3, help="Niveles maximos de carpetas.")
+    parser.add_argument('--history', type=int, default=1000, help="Commits de backup anteriores.")
+    parser.add_argument('--log-entries', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    summary = generate_vault(args.path, args.notes, args.attachments, args.attachment_size, args.depth,
+                             args.history, args.log_entries, seed=args.seed)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == '__main__':
+    main()
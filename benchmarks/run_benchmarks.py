@@ -0,0 +1,223 @@
+"""
+Benchmarks de vaultflow sobre vaults sinteticos (ver generate_vault.py).
+
+Cada tamano se genera en un directorio temporal con un HOME propio, asi que la configuracion
+real del usuario no se toca y todo funciona sin red. Los resultados se guardan en JSON y,
+si se indica un baseline, se comparan: el proceso termina con codigo 1 si algo empeora mas
+del umbral.
+
+Uso:
+    python benchmarks/run_benchmarks.py --sizes small,medium --output resultados.json
+    python benchmarks/run_benchmarks.py --baseline resultados.json --threshold 0.25 --threshold-for show_status=0.5
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))  # vaultflow desde el propio arbol, sin instalar
+
+from generate_vault import generate_vault, touch_notes
+
+SIZES = {
+    'small': {'notes': 500, 'attachments': 20, 'attachment_size': 128 * 1024, 'depth': 2, 'history': 500},
+    'medium': {'notes': 5000, 'attachments': 200, 'attachment_size': 256 * 1024, 'depth': 3, 'history': 3000},
+    'large': {'notes': 20000, 'attachments': 1000, 'attachment_size': 512 * 1024, 'depth': 4, 'history': 10000},
+}
+DEFAULT_THRESHOLD = 0.25 # 25% mas lento que el baseline cuenta como regresion
+DEFAULT_MIN_DELTA_MS = 5.0 # Diferencias menores se consideran ruido
+DEFAULT_REPEAT = 5
+TOUCHED_NOTES = 20 # Notas modificadas antes de cada backup medido
+
+def _isolate_environment(workdir):
+    """HOME temporal (config, store, cache de descubrimiento) e identidad de git fija."""
+    home = os.path.join(workdir, 'home')
+    os.makedirs(home, exist_ok=True)
+    os.environ.update({
+        'HOME': home, 'USERPROFILE': home, 'GIT_CONFIG_NOSYSTEM': '1',
+        'GIT_AUTHOR_NAME': 'Vaultflow Bench', 'GIT_AUTHOR_EMAIL': 'bench@vaultflow.invalid',
+        'GIT_COMMITTER_NAME': 'Vaultflow Bench', 'GIT_COMMITTER_EMAIL': 'bench@vaultflow.invalid',
+    })
+
+def _fresh_process_state():
+    """Descarta las caches en memoria para que cada repeticion se parezca a una invocacion nueva."""
+    from vaultflow import config
+    from vaultflow.git_session import close_all_sessions
+    close_all_sessions()
+    config._cache.update({"key": None, "config": None, "vault_index": frozenset()})
+
+def _measure(fn, repeat, setup=None):
+    """Ejecuta `fn` `repeat` veces (con `setup` fuera de la medida) y devuelve los tiempos en segundos."""
+    times = []
+    for _ in range(repeat):
+        if setup: setup()
+        _fresh_process_state()
+        sink = io.StringIO()
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+    return times
+
+def _stats(times):
+    return {'median': statistics.median(times), 'min': min(times), 'max': max(times), 'runs': len(times)}
+
+def _create_experiment(vault, name):
+    """Rama exp/<name> con un commit propio, creada con plumbing para no tocar el working tree."""
+    def git(*args, **kwargs):
+        return subprocess.run(['git', *args], cwd=vault, check=True, capture_output=True, text=True, **kwargs).stdout.strip()
+    env = dict(os.environ, GIT_INDEX_FILE=os.path.join(vault, '.git', f'index-{name}'))
+    git('read-tree', 'main', env=env)
+    blob = git('hash-object', '-w', '--stdin', input=f"# Experimento {name}\n")
+    git('update-index', '--add', '--cacheinfo', f'100644,{blob},experimentos/{name}.md', env=env)
+    tree = git('write-tree', env=env)
+    os.remove(env['GIT_INDEX_FILE'])
+    commit = git('commit-tree', tree, '-p', 'main', '-m', f"Backup vaultflow - experimento {name}")
+    git('update-ref', f'refs/heads/exp/{name}', commit)
+
+def run_size(name, params, workdir, repeat):
+    """Genera un vault del tamano indicado y mide cada operacion. Devuelve {benchmark: estadisticas}."""
+    import click
+    from vaultflow import commands, config
+    from vaultflow.git_utils import get_backup_commits
+
+    root = os.path.join(workdir, name)
+    vault = os.path.join(root, 'vaults', 'vault')
+    os.makedirs(os.path.dirname(vault))
+    started = time.perf_counter()
+    summary = generate_vault(vault, **params)
+    generation = time.perf_counter() - started
+    os.chdir(vault)
+    results = {}
+
+    # Solo la primera inicializacion es real: las siguientes ya encuentran el vault configurado
+    results['initialize_vault'] = _stats(_measure(commands.initialize_vault, 1))
+    results['get_backup_commits[cold]'] = _stats(_measure(lambda: get_backup_commits(15), 1))  # Rellena el indice
+    results['get_backup_commits'] = _stats(_measure(lambda: get_backup_commits(15), repeat))
+    results['get_backup_commits[page 10]'] = _stats(_measure(lambda: get_backup_commits(15, page=10), repeat))
+    results['show_status'] = _stats(_measure(commands.show_status, repeat))
+    counter = iter(range(10 ** 6))
+    results['create_local_backup'] = _stats(_measure(
+        commands.create_local_backup, repeat, setup=lambda: touch_notes(vault, TOUCHED_NOTES, seed=next(counter))))
+    results['show_logs'] = _stats(_measure(commands.show_logs, repeat))
+    search = [os.path.join(root, 'vaults')]
+    cache_file = config.DISCOVERY_CACHE_FILE
+    results['scan_for_vaultflow_repos[cold]'] = _stats(_measure(
+        lambda: config.scan_for_vaultflow_repos(search), repeat,
+        setup=lambda: os.path.exists(cache_file) and os.remove(cache_file)))
+    results['scan_for_vaultflow_repos'] = _stats(_measure(lambda: config.scan_for_vaultflow_repos(search), repeat))
+
+    names = iter(f"bench{i}" for i in range(10 ** 6))
+    current = []
+    def prepare_experiment():
+        current[:] = [next(names)]
+        _create_experiment(vault, current[0])
+    original_confirm = click.confirm
+    click.confirm = lambda *args, **kwargs: True  # Borra la rama al terminar, sin preguntar
+    try:
+        results['finish_experiment'] = _stats(_measure(lambda: commands.finish_experiment(current[0]), repeat,
+                                                       setup=prepare_experiment))
+    finally:
+        click.confirm = original_confirm
+    os.chdir(workdir)
+    return {'vault': {**summary, 'generation_seconds': round(generation, 3)}, 'benchmarks': results}
+
+def compare(results, baseline, threshold, per_benchmark, min_delta_ms):
+    """Lista de regresiones [(tamano, benchmark, baseline, actual, umbral)] frente al baseline."""
+    regressions = []
+    for size, data in results['sizes'].items():
+        previous = baseline.get('sizes', {}).get(size, {}).get('benchmarks', {})
+        for bench, stats in data['benchmarks'].items():
+            if bench not in previous: continue
+            limit = per_benchmark.get(bench, threshold)
+            before, now = previous[bench]['median'], stats['median']
+            if now > before * (1 + limit) and (now - before) * 1000 > min_delta_ms:
+                regressions.append((size, bench, before, now, limit))
+    return regressions
+
+def _git_version():
+    return subprocess.run(['git', '--version'], capture_output=True, text=True).stdout.strip()
+
+def _print_table(results, baseline):
+    for size, data in results['sizes'].items():
+        vault = data['vault']
+        print(f"\n[{size}] {vault['notes']} notas, {vault['attachments']} adjuntos, {vault['history']} commits "
+              f"(generado en {vault['generation_seconds']:.1f}s)")
+        previous = (baseline or {}).get('sizes', {}).get(size, {}).get('benchmarks', {})
+        for bench, stats in data['benchmarks'].items():
+            line = f"  {bench:<34} {stats['median'] * 1000:>10.1f} ms"
+            if bench in previous and previous[bench]['median']:
+                change = stats['median'] / previous[bench]['median'] - 1
+                line += f"  ({change:+.0%} vs baseline)"
+            print(line)
+
+def _parse_thresholds(values):
+    thresholds = {}
+    for value in values:
+        name, _, limit = value.rpartition('=')
+        if not name: raise SystemExit(f"--threshold-for espera NOMBRE=UMBRAL, no '{value}'")
+        thresholds[name] = float(limit)
+    return thresholds
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de vaultflow sobre vaults sinteticos.")
+    parser.add_argument('--sizes', default='small', help=f"Tamanos separados por comas: {', '.join(SIZES)}.")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Repeticiones por benchmark (se usa la mediana).")
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados.")
+    parser.add_argument('--baseline', default=None, help="Resultados anteriores con los que comparar.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Regresion maxima tolerada (0.25 = 25%%).")
+    parser.add_argument('--threshold-for', action='append', default=[], metavar='NOMBRE=UMBRAL',
+                        help="Umbral propio para un benchmark (se puede repetir).")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS, help="Diferencia minima para contar como regresion.")
+    parser.add_argument('--workdir', default=None, help="Directorio de trabajo (por defecto, uno temporal).")
+    parser.add_argument('--keep', action='store_true', help="No borra los vaults generados.")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown: parser.error(f"tamanos desconocidos: {', '.join(unknown)}")
+    per_benchmark = _parse_thresholds(args.threshold_for)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix='vaultflow-bench-'))
+    os.makedirs(workdir, exist_ok=True)
+    _isolate_environment(workdir)  # Antes de importar vaultflow: CONFIG_DIR se fija al importar
+    results = {
+        'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                 'platform': platform.platform(), 'git': _git_version(), 'repeat': args.repeat},
+        'sizes': {},
+    }
+    try:
+        for size in sizes:
+            results['sizes'][size] = run_size(size, SIZES[size], workdir, args.repeat)
+    finally:
+        if not args.keep: shutil.rmtree(workdir, ignore_errors=True)
+
+    _print_table(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+    if baseline:
+        regressions = compare(results, baseline, args.threshold, per_benchmark, args.min_delta_ms)
+        for size, bench, before, now, limit in regressions:
+            print(f"REGRESION [{size}] {bench}: {before * 1000:.1f} ms -> {now * 1000:.1f} ms (umbral {limit:.0%})")
+        if regressions: return 1
+        print("Sin regresiones respecto al baseline.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import os
+import subprocess
+from vaultflow import attachments, config
+from vaultflow.git_session import close_all_sessions
+
+
+def _isolated_home(tmp_path, monkeypatch):
+    home = tmp_path / "home"
+    config_dir = home / ".vaultflow"
+    config_dir.mkdir(parents=True)
+    (config_dir / "config.json").write_text('{"attachments_threshold_bytes": 1000}')
+    # El filtro corre en otro proceso: HOME le indica el mismo store que al test
+    monkeypatch.setenv("HOME", str(home))
+    for var, value in (("GIT_AUTHOR_NAME", "t"), ("GIT_AUTHOR_EMAIL", "t@t"),
+                       ("GIT_COMMITTER_NAME", "t"), ("GIT_COMMITTER_EMAIL", "t@t")):
+        monkeypatch.setenv(var, value)
+    monkeypatch.setattr(config, "CONFIG_DIR", str(config_dir))
+    monkeypatch.setattr(config, "CONFIG_FILE", str(config_dir / "config.json"))
+    monkeypatch.setattr(config, "CONFIG_LOCK_FILE", str(config_dir / "config.json.lock"))
+    monkeypatch.setattr(config, "_cache", {"key": None, "config": None, "vault_index": frozenset()})
+    monkeypatch.setattr(attachments, "CONFIG_DIR", str(config_dir))
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(os.path.abspath(attachments.__file__))))
+
+
+def _git(vault, *args):
+    return subprocess.run(['git', *args], cwd=vault, capture_output=True, check=True).stdout
+
+
+def test_large_attachments_are_stored_once_and_checked_out_transparently(tmp_path, monkeypatch):
+    """Test que verifica que git solo guarda punteros y que el checkout devuelve el archivo real."""
+    _isolated_home(tmp_path, monkeypatch)
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    _git(vault, 'init')
+    config.register_vault(str(vault))
+    pdf = os.urandom(4000)
+    (vault / 'nota.md').write_text('# Nota\n')
+    (vault / 'libro.pdf').write_bytes(pdf)
+    (vault / 'copia.pdf').write_bytes(pdf)
+    try:
+        attachments.enable_offload(str(vault))
+        _git(vault, 'add', '-A')
+        _git(vault, 'commit', '-m', 'Backup vaultflow - 1')
+
+        pointer = _git(vault, 'show', 'HEAD:libro.pdf')
+        oid, size = attachments.parse_pointer(pointer)
+        assert size == len(pdf)
+        assert _git(vault, 'show', 'HEAD:nota.md') == b'# Nota\n'
+        store_files = [path for _, path in attachments._iter_store_blobs(attachments.get_store_dir())]
+        assert store_files == [attachments.blob_path(attachments.get_store_dir(), oid)]
+
+        (vault / 'libro.pdf').unlink()
+        _git(vault, 'checkout', '--', 'libro.pdf')
+        assert (vault / 'libro.pdf').read_bytes() == pdf
+
+        stats = attachments.offload_stats(str(vault))
+        assert stats['files'] == 2 and stats['unique_bytes'] == len(pdf)
+        assert stats['saved_bytes'] == 2 * len(pdf) - stats['pointer_bytes']
+
+        # Un blob huerfano (y antiguo) se elimina; el referenciado se conserva
+        orphan = attachments.blob_path(attachments.get_store_dir(), 'f' * 64)
+        os.makedirs(os.path.dirname(orphan))
+        with open(orphan, 'wb') as f: f.write(b'huerfano')
+        os.utime(orphan, (0, 0))
+        assert attachments.collect_garbage() == (1, len(b'huerfano'))
+        assert not os.path.exists(orphan)
+        assert (vault / 'copia.pdf').read_bytes() == pdf
+        assert attachments.collect_garbage() == (0, 0)
+    finally:
+        close_all_sessions()
+
+
+def test_only_attachments_and_large_files_go_through_the_filter(tmp_path, monkeypatch):
+    """Test que verifica que las notas no pasan por el filtro y que los archivos grandes se anotan por ruta."""
+    _isolated_home(tmp_path, monkeypatch)
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    _git(vault, 'init')
+    (vault / '.gitattributes').write_text('*.md text')
+    (vault / 'nota.md').write_text('# Nota\n')
+    (vault / 'FOTO.PNG').write_bytes(b'png')
+    try:
+        attachments.enable_offload(str(vault))
+        check = lambda path: _git(vault, 'check-attr', 'filter', '--', path).decode().rsplit(': ', 1)[1].strip()
+        assert check('nota.md') == 'unspecified' and check('FOTO.PNG') == 'vaultflow'
+        assert (vault / '.gitattributes').read_text().startswith('*.md text\n')
+
+        grande = os.urandom(2000)
+        (vault / 'datos grandes.bin').write_bytes(grande)
+        (vault / 'pequeno.bin').write_bytes(b'x')
+        assert attachments.prepare_backup(str(vault)) == ['.gitattributes']
+        assert attachments.prepare_backup(str(vault)) == []
+        assert check('datos grandes.bin') == 'vaultflow' and check('pequeno.bin') == 'unspecified'
+        _git(vault, 'add', '-A')
+        _git(vault, 'commit', '-m', 'Backup vaultflow - 1')
+        assert attachments.parse_pointer(_git(vault, 'show', 'HEAD:datos grandes.bin'))[1] == len(grande)
+        assert _git(vault, 'show', 'HEAD:nota.md') == b'# Nota\n'
+    finally:
+        close_all_sessions()
+
+
+def _pkt(*items):
+    return b''.join(b'%04x' % (len(item) + 4) + item for item in items) + b'0000'
+
+
+def _filter_session(pointer):
+    """Respuesta del filtro a un smudge de `pointer` (tras el handshake)."""
+    import io
+    stdin = io.BytesIO(_pkt(b'git-filter-client\n', b'version=2\n') + _pkt(b'capability=clean\n', b'capability=smudge\n')
+                       + _pkt(b'command=smudge\n', b'pathname=libro.pdf\n') + _pkt(pointer))
+    stdout = io.BytesIO()
+    attachments.filter_process(stdin, stdout)
+    handshake = _pkt(b'git-filter-server\n', b'version=2\n') + _pkt(b'capability=clean\n', b'capability=smudge\n')
+    return stdout.getvalue()[len(handshake):]
+
+
+def test_filter_reports_unreadable_blobs_before_sending_content(tmp_path, monkeypatch):
+    """Test que verifica que un blob ilegible se responde con status=error sin enviar contenido."""
+    _isolated_home(tmp_path, monkeypatch)
+    oid = 'a' * 64
+    os.makedirs(attachments.blob_path(attachments.get_store_dir(), oid))  # Existe pero no se puede abrir
+    assert _filter_session(attachments.make_pointer(oid, 10)) == _pkt(b'status=error\n')
+
+
+def test_filter_aborts_when_the_stream_fails_after_success(tmp_path, monkeypatch):
+    """Test que verifica que un fallo a mitad del contenido cierra el contenido y aborta el filtro."""
+    def failing(spool, store_dir):
+        yield b'parte'
+        raise OSError("disco desconectado")
+    _isolated_home(tmp_path, monkeypatch)
+    monkeypatch.setattr(attachments, '_smudge', failing)
+    response = _filter_session(b'contenido')
+    assert response == _pkt(b'status=success\n') + _pkt(b'parte') + _pkt(b'status=abort\n')
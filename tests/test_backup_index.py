@@ -0,0 +1,48 @@
+import os
+import subprocess
+from datetime import datetime
+from vaultflow.backup_index import BACKUP_REF_PREFIX, record_backup
+from vaultflow.git_utils import get_backup_commits, count_backup_commits, get_git_process_count
+
+
+def _commit(vault, message, date):
+    subprocess.run(['git', 'commit', '--allow-empty', '-m', message], cwd=vault, capture_output=True, check=True,
+                   env=dict(os.environ, GIT_COMMITTER_DATE=date, GIT_AUTHOR_DATE=date))
+
+
+def test_backups_are_backfilled_once_and_listed_from_refs(tmp_path):
+    """Test que verifica el relleno inicial del indice, la paginacion y el registro de nuevos backups."""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init'], cwd=vault, capture_output=True, check=True)
+    for month in range(1, 6):
+        _commit(vault, f"Backup vaultflow - {month}", f"2026-0{month}-01T10:00:00")
+    _commit(vault, "Cambio manual", "2026-06-01T10:00:00")
+
+    assert count_backup_commits(str(vault)) == 5
+    assert [b['message'] for b in get_backup_commits(2, str(vault), page=2)] == ["Backup vaultflow - 3", "Backup vaultflow - 2"]
+    in_range = get_backup_commits(10, str(vault), since=datetime(2026, 2, 1), until=datetime(2026, 3, 2))
+    assert [b['message'] for b in in_range] == ["Backup vaultflow - 3", "Backup vaultflow - 2"]
+
+    # El relleno no se repite y un backup nuevo se registra al crearlo
+    _commit(vault, "Backup vaultflow - 7", "2026-07-01T10:00:00")
+    assert record_backup(str(vault), datetime(2026, 7, 1, 10))
+    spawned = get_git_process_count()
+    latest = get_backup_commits(1, str(vault))
+    assert latest[0]['message'] == "Backup vaultflow - 7"
+    assert get_git_process_count() - spawned <= 1
+    refs = subprocess.run(['git', 'for-each-ref', '--format=%(refname)', BACKUP_REF_PREFIX], cwd=vault,
+                          capture_output=True, text=True).stdout.split()
+    assert len(refs) == 6
+
+
+def test_first_backup_on_fresh_repo_is_listed_once(tmp_path):
+    """Test que verifica que el primer backup de un repo nuevo no se registra dos veces (registro + relleno)."""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init'], cwd=vault, capture_output=True, check=True)
+    _commit(vault, "Backup vaultflow - 1", "2026-01-01T10:00:00")
+    assert record_backup(str(vault), datetime(2026, 1, 1, 10, 0, 5))
+    backups = get_backup_commits(10, str(vault))
+    assert [b['message'] for b in backups] == ["Backup vaultflow - 1"]
+    assert count_backup_commits(str(vault)) == 1
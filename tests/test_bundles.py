@@ -0,0 +1,53 @@
+import os
+import subprocess
+from vaultflow.bundles import export_bundle, import_bundle, pending_bundles
+
+
+def _git(path, *args):
+    return subprocess.run(['git', *args], cwd=path, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_bundles_are_incremental_per_destination_and_fast_forward(tmp_path):
+    """Test que verifica la exportacion incremental por destino y la importacion por fast-forward."""
+    source, target, usb = tmp_path / "a" / "vault", tmp_path / "b" / "vault", tmp_path / "usb"
+    source.mkdir(parents=True)
+    target.mkdir(parents=True)
+    _git(source, 'init', '-b', 'main')
+    _git(target, 'init', '-b', 'main')
+    (source / 'uno.md').write_text('uno\n')
+    _git(source, 'add', '-A')
+    _git(source, 'commit', '-m', 'Backup vaultflow - 1')
+
+    assert export_bundle(str(usb), str(source))[0]
+    (source / 'dos.md').write_text('dos\n')
+    _git(source, 'add', '-A')
+    _git(source, 'commit', '-m', 'Backup vaultflow - 2')
+    success, message = export_bundle(str(usb), str(source))
+    assert success and 'incremental' in message
+    assert 'Nada que exportar' in export_bundle(str(usb), str(source))[1]
+
+    first, second = pending_bundles(str(usb), str(target))
+    # El incremental solo trae los objetos nuevos: sin el primero no se puede aplicar
+    assert not import_bundle(second, str(target))[0]
+    assert os.path.getsize(second) < os.path.getsize(first) + 200
+    assert import_bundle(first, str(target))[0]
+    assert import_bundle(second, str(target))[0]
+    assert _git(target, 'rev-parse', 'HEAD') == _git(source, 'rev-parse', 'HEAD')
+    assert (target / 'dos.md').read_text() == 'dos\n' and _git(target, 'status', '--porcelain') == ''
+
+
+def test_pending_bundles_only_match_the_exact_vault_name(tmp_path):
+    """Test que verifica que en un USB compartido un vault no recoge los bundles de otro cuyo nombre empieza igual."""
+    usb = tmp_path / "usb"
+    for name in ('notes', 'notes-work'):
+        vault = tmp_path / name
+        vault.mkdir()
+        _git(vault, 'init', '-b', 'main')
+        _git(vault, 'commit', '--allow-empty', '-m', f'Backup vaultflow - {name}')
+        assert export_bundle(str(usb), str(vault))[0]
+    (usb / "notes-work-main-20240101T000000000000.bundle").write_bytes(b"")  # Sin separador: no es de ningun vault
+
+    mine = [os.path.basename(p) for p in pending_bundles(str(usb), str(tmp_path / 'notes'))]
+    assert len(mine) == 1 and mine[0].startswith("notes@main@")
+    theirs = [os.path.basename(p) for p in pending_bundles(str(usb), str(tmp_path / 'notes-work'))]
+    assert len(theirs) == 1 and theirs[0].startswith("notes-work@main@")
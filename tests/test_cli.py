@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import types
+from click.testing import CliRunner
+from vaultflow.cli import cli
+
+# Medido en desarrollo: ~65 ms (casi todo es click). El margen cubre maquinas lentas y CI.
+IMPORT_TIME_BUDGET_US = 250_000
+HEAVY_MODULES = ('rich', 'InquirerPy', 'pyfiglet', 'vaultflow.commands', 'vaultflow.interactive')
+
+
+def _run_python(code):
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True, cwd=project_root
+    )
+
+
+def test_cli_import_skips_heavy_modules_and_stays_within_budget():
+    """Test que verifica que importar la CLI no carga rich/InquirerPy/pyfiglet y es rapido."""
+    result = _run_python(
+        "import sys, vaultflow.cli; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert result.stdout.strip() == ''
+
+    cumulative_us = [
+        int(line.split('|')[1]) for line in result.stderr.splitlines()
+        if line.rstrip().endswith('| vaultflow.cli')
+    ]
+    assert cumulative_us and cumulative_us[0] < IMPORT_TIME_BUDGET_US
+
+
+def test_commands_import_leaves_feature_modules_to_each_command():
+    """Test que verifica que importar commands no carga rich ni los modulos de cada funcionalidad."""
+    feature_modules = ('rich', 'vaultflow.attachments', 'vaultflow.retention', 'vaultflow.bundles',
+                       'vaultflow.targets', 'vaultflow.restore', 'vaultflow.report', 'vaultflow.tune')
+    result = _run_python(
+        "import sys, vaultflow.commands; "
+        f"print(','.join(m for m in {feature_modules!r} if m in sys.modules))"
+    )
+    assert result.stdout.strip() == ''
+
+
+def test_banner_is_hidden_when_not_a_tty_or_disabled():
+    """Test que verifica que el banner no se imprime en invocaciones no interactivas."""
+    runner = CliRunner()
+    result = runner.invoke(cli, ['--no-banner', 'vaults'])
+    assert '|_____' not in result.output
+
+    result = runner.invoke(cli, ['vaults'])
+    assert '|_____' not in result.output
+
+
+def test_banner_is_shown_on_a_tty_unless_disabled(tmp_path, monkeypatch):
+    """Test que verifica que en una terminal se muestra el banner y que --no-banner y VAULTFLOW_NO_BANNER lo ocultan."""
+    from vaultflow import utils
+    tty = types.SimpleNamespace(stdout=types.SimpleNamespace(isatty=lambda: True))
+    monkeypatch.setattr(utils, 'sys', tty)
+    monkeypatch.setattr(utils, 'BANNER_CACHE_FILE', str(tmp_path / 'cache' / 'banner.txt'))
+    monkeypatch.delenv('VAULTFLOW_NO_BANNER', raising=False)
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['vaults'])
+    assert '|_____' in result.output
+    assert os.listdir(tmp_path / 'cache') == ['banner.txt']  # Sin temporales a medias
+    assert '|_____' in runner.invoke(cli, ['vaults']).output  # Ahora desde la cache
+
+    assert '|_____' not in runner.invoke(cli, ['--no-banner', 'vaults']).output
+    assert '|_____' not in runner.invoke(cli, ['vaults'], env={'VAULTFLOW_NO_BANNER': '1'}).output
@@ -1,7 +1,8 @@
+import json
 import pytest
 import subprocess
 import os
-from vaultflow.commands import initialize_vault, start_experiment
+from vaultflow.commands import backup_vault, initialize_vault, start_experiment
 from vaultflow.config import register_vault
 from vaultflow.git_utils import git_init
 
@@ -42,4 +43,27 @@ def test_cannot_start_experiment_when_already_in_experiment(tmp_path, capsys):
     result = subprocess.run(['git', 'branch', '--show-current'], 
                           capture_output=True, text=True)
     current_branch = result.stdout.strip()
-    assert current_branch == 'exp/primer-experimento'
\ No newline at end of file
+    assert current_branch == 'exp/primer-experimento'
+
+
+def test_backup_of_broken_vault_is_an_error(tmp_path):
+    """Test que verifica que si git no puede leer el estado del vault el backup falla en vez de darse por al dia."""
+    broken = tmp_path / "roto"
+    broken.mkdir()
+    (broken / ".git").write_text("gitdir: /no/existe\n")
+    result, message = backup_vault(str(broken), snapshot=False)
+    assert result == 'error' and 'estado de git' in message
+
+
+def test_backup_logs_the_number_of_files_not_folders(tmp_path):
+    """Test que verifica que el log de un backup cuenta cada archivo de una carpeta nueva."""
+    vault = tmp_path / "vault"
+    (vault / "proyecto").mkdir(parents=True)
+    subprocess.run(['git', 'init', '-b', 'main'], cwd=vault, capture_output=True, check=True)
+    subprocess.run(['git', 'commit', '--allow-empty', '-m', 'inicial'], cwd=vault, capture_output=True, check=True)
+    for name in ('uno', 'dos', 'tres'):
+        (vault / "proyecto" / f"{name}.md").write_text(f"{name}\n")
+    assert backup_vault(str(vault), snapshot=False)[0] == 'ok'
+    with open(vault / ".vaultflow_log.jsonl", encoding='utf-8') as f:
+        entry = json.loads(f.read().splitlines()[-1])
+    assert entry['command'] == 'backup' and entry['files'] == 3
@@ -0,0 +1,93 @@
+import json
+import threading
+from vaultflow import config
+
+
+def _use_tmp_config(tmp_path, monkeypatch):
+    config_dir = tmp_path / ".vaultflow"
+    monkeypatch.setattr(config, "CONFIG_DIR", str(config_dir))
+    monkeypatch.setattr(config, "CONFIG_FILE", str(config_dir / "config.json"))
+    monkeypatch.setattr(config, "CONFIG_LOCK_FILE", str(config_dir / "config.json.lock"))
+    monkeypatch.setattr(config, "_cache", {"key": None, "config": None, "vault_index": frozenset()})
+    return config_dir / "config.json"
+
+
+def test_config_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    """Test que verifica que la configuracion solo se vuelve a leer si el archivo cambia."""
+    config_file = _use_tmp_config(tmp_path, monkeypatch)
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    monkeypatch.chdir(vault)
+    config.register_vault(str(vault))
+
+    reads = []
+    original_read = config._read_config_file
+    monkeypatch.setattr(config, "_read_config_file", lambda: reads.append(1) or original_read())
+
+    for _ in range(5):
+        assert config.is_managed_vault()
+        assert config.get_current_vault_info()['is_managed']
+    assert reads == []
+
+    # Otra ejecucion reescribe el archivo: la cache se invalida por mtime/tamano/inodo
+    config_file.write_text(json.dumps({"managed_vaults": []}))
+    assert not config.is_managed_vault()
+    assert len(reads) == 1
+
+
+def test_parallel_registrations_are_not_lost(tmp_path, monkeypatch):
+    """Test que verifica que registros concurrentes no se pisan gracias al bloqueo."""
+    config_file = _use_tmp_config(tmp_path, monkeypatch)
+    paths = [str(tmp_path / f"vault_{i}") for i in range(20)]
+
+    threads = [threading.Thread(target=config.register_vault, args=(p,)) for p in paths]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert sorted(json.loads(config_file.read_text())["managed_vaults"]) == sorted(paths)
+
+
+def test_discovery_prunes_and_reuses_cached_listings(tmp_path, monkeypatch):
+    """Test que verifica que el escaneo poda directorios pesados y reutiliza la cache por mtime."""
+    _use_tmp_config(tmp_path, monkeypatch)
+    monkeypatch.setattr(config, "DISCOVERY_CACHE_FILE", str(tmp_path / ".vaultflow" / "discovery.json"))
+    base = tmp_path / "home"
+    for vault in (base / "notas", base / "node_modules" / "pkg", base / "a" / "b" / "c" / "profundo"):
+        (vault / ".git").mkdir(parents=True)
+        (vault / ".gitignore").write_text("# === Bloque gestionado por vaultflow ===\n")
+    (base / "proyecto" / ".git").mkdir(parents=True)  # Repo ajeno: no es un vault
+
+    assert config.scan_for_vaultflow_repos([str(base)]) == [str(base / "notas")]
+
+    scanned = []
+    original_scandir = config.os.scandir
+    monkeypatch.setattr(config.os, "scandir", lambda p: scanned.append(p) or original_scandir(p))
+    assert config.scan_for_vaultflow_repos([str(base)]) == [str(base / "notas")]
+    assert scanned == []
+
+    # Solo se vuelve a listar el directorio que cambio
+    (base / "otro").mkdir()
+    (base / "otro" / ".git").mkdir()
+    (base / "otro" / ".gitignore").write_text("# === Bloque gestionado por vaultflow ===\n")
+    assert sorted(config.scan_for_vaultflow_repos([str(base)])) == [str(base / "notas"), str(base / "otro")]
+    assert str(base) in scanned and str(base / "a") not in scanned
+
+
+def test_discovery_finds_vaults_known_only_by_their_backup_commits(tmp_path, monkeypatch):
+    """Test que verifica que un vault sin cabecera ni refs de vaultflow se descubre por sus commits y el resultado se cachea."""
+    import subprocess
+    _use_tmp_config(tmp_path, monkeypatch)
+    monkeypatch.setattr(config, "DISCOVERY_CACHE_FILE", str(tmp_path / ".vaultflow" / "discovery.json"))
+    base = tmp_path / "home"
+    vault, other = base / "antiguo", base / "proyecto"
+    for repo in (vault, other):
+        repo.mkdir(parents=True)
+        subprocess.run(['git', 'init', '-b', 'trunk'], cwd=repo, capture_output=True, check=True)
+    subprocess.run(['git', 'commit', '--allow-empty', '-m', 'Backup vaultflow - 1'], cwd=vault, capture_output=True, check=True)
+    subprocess.run(['git', 'commit', '--allow-empty', '-m', 'inicial'], cwd=other, capture_output=True, check=True)
+
+    assert config.scan_for_vaultflow_repos([str(base)]) == [str(vault)]
+    calls = []
+    monkeypatch.setattr(config, "_has_backup_commits", lambda path: calls.append(path) or False)
+    assert config.scan_for_vaultflow_repos([str(base)]) == [str(vault)]
+    assert calls == []
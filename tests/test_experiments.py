@@ -0,0 +1,37 @@
+import os
+import subprocess
+from vaultflow import config, experiments
+
+
+def _use_tmp_config(tmp_path, monkeypatch):
+    config_dir = tmp_path / ".vaultflow"
+    monkeypatch.setattr(config, "CONFIG_DIR", str(config_dir))
+    monkeypatch.setattr(config, "CONFIG_FILE", str(config_dir / "config.json"))
+    monkeypatch.setattr(config, "CONFIG_LOCK_FILE", str(config_dir / "config.json.lock"))
+    monkeypatch.setattr(config, "_cache", {"key": None, "config": None, "vault_index": frozenset()})
+
+
+def test_experiment_worktree_lifecycle(tmp_path, monkeypatch):
+    """Test que verifica que un experimento en worktree no cambia la rama del vault, se lista y se limpia."""
+    _use_tmp_config(tmp_path, monkeypatch)
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init', '-b', 'main'], cwd=vault, capture_output=True, check=True)
+    (vault / "nota.md").write_text("hola\n")
+    subprocess.run(['git', 'add', '.'], cwd=vault, capture_output=True, check=True)
+    subprocess.run(['git', 'commit', '-m', 'init'], cwd=vault, capture_output=True, check=True)
+
+    success, path = experiments.add_experiment_worktree('idea', repo=str(vault))
+    assert success and path == str(tmp_path / "vault.experiments" / "idea")
+    assert (tmp_path / "vault.experiments" / "idea" / "nota.md").exists()
+    head = subprocess.run(['git', 'symbolic-ref', '--short', 'HEAD'], cwd=vault, capture_output=True, text=True).stdout
+    assert head.strip() == 'main'
+    assert config.is_managed_vault(path)
+
+    [exp] = experiments.list_experiments(str(vault))
+    assert exp['name'] == 'idea' and exp['worktree'] == path and exp['size'] == len("hola\n")
+
+    assert experiments.remove_experiment_worktree(path, repo=str(vault))[0]
+    assert not os.path.exists(tmp_path / "vault.experiments")
+    assert not config.is_managed_vault(path)
+    assert experiments.list_experiments(str(vault))[0]['worktree'] is None  # La rama sigue hasta que se borre
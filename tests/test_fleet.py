@@ -0,0 +1,34 @@
+import subprocess
+from vaultflow import config
+from vaultflow.fleet import run_on_all_vaults
+
+
+def test_backup_all_runs_on_every_vault_without_changing_cwd(tmp_path, monkeypatch):
+    """Test que verifica que 'backup --all' respalda cada vault por su ruta, sin depender del cwd."""
+    config_dir = tmp_path / ".vaultflow"
+    monkeypatch.setattr(config, "CONFIG_DIR", str(config_dir))
+    monkeypatch.setattr(config, "CONFIG_FILE", str(config_dir / "config.json"))
+    monkeypatch.setattr(config, "CONFIG_LOCK_FILE", str(config_dir / "config.json.lock"))
+    monkeypatch.setattr(config, "_cache", {"key": None, "config": None, "vault_index": frozenset()})
+    monkeypatch.chdir(tmp_path)
+
+    vaults = []
+    for name in ("uno", "dos", "tres"):
+        vault = tmp_path / name
+        vault.mkdir()
+        subprocess.run(['git', 'init'], cwd=vault, capture_output=True, check=True)
+        subprocess.run(['git', 'commit', '--allow-empty', '-m', 'Initial commit'], cwd=vault, capture_output=True, check=True)
+        (vault / "nota.md").write_text(f"# {name}\n")
+        config.register_vault(str(vault))
+        vaults.append(vault)
+    (tmp_path / "tres" / "nota.md").unlink()  # Un vault sin cambios
+    config.register_vault(str(tmp_path / "borrado"))  # Un vault que ya no existe
+
+    results = run_on_all_vaults('backup', workers=2)
+
+    assert [r['success'] for r in results] == [True, True, True, False]
+    for vault in vaults[:2]:
+        log = subprocess.run(['git', 'log', '-1', '--pretty=%s'], cwd=vault, capture_output=True, text=True).stdout
+        assert log.startswith('Backup vaultflow - ')
+        assert (vault / ".vaultflow_log.jsonl").exists()
+    assert results[2]['detail'] == "Sin cambios"
@@ -0,0 +1,38 @@
+import os
+import subprocess
+from vaultflow.git_refs import open_refs
+from vaultflow.git_utils import branch_exists, get_current_branch, get_git_process_count
+
+
+def test_refs_are_read_without_git_in_worktrees_and_packed_refs(tmp_path):
+    """Test que verifica la lectura de refs empaquetados y de worktrees sin lanzar git."""
+    vault = tmp_path / "test_vault"
+    vault.mkdir()
+    worktree = tmp_path / "worktree"
+    original_cwd = os.getcwd()
+    os.chdir(vault)
+
+    try:
+        subprocess.run(['git', 'init'], capture_output=True, check=True)
+        subprocess.run(['git', 'commit', '--allow-empty', '-m', 'Initial commit'], capture_output=True, check=True)
+        subprocess.run(['git', 'branch', '-m', 'main'], capture_output=True, check=True)
+        subprocess.run(['git', 'branch', 'experiment'], capture_output=True, check=True)
+        subprocess.run(['git', 'pack-refs', '--all'], capture_output=True, check=True)
+        subprocess.run(['git', 'worktree', 'add', '-b', 'exp/idea', str(worktree)], capture_output=True, check=True)
+
+        reader = open_refs()
+        assert reader.head() == ('ref', 'refs/heads/main')
+        assert reader.resolve('refs/heads/experiment') == reader.resolve('HEAD')
+
+        spawned = get_git_process_count()
+        assert branch_exists('experiment')
+        assert not branch_exists('missing')
+        assert get_current_branch() == 'main'
+
+        os.chdir(worktree)
+        assert get_current_branch() == 'exp/idea'
+        assert branch_exists('main')
+        assert get_git_process_count() == spawned
+
+    finally:
+        os.chdir(original_cwd)
@@ -1,7 +1,11 @@
 import os
 import subprocess
 import pytest
-from vaultflow.git_utils import push_changes
+from vaultflow.git_utils import (
+    push_changes, get_current_branch, get_last_commit, branch_exists, create_branch,
+    get_git_process_count, get_repo_status, merge_without_checkout, delete_branch_ref,
+    query_cache, get_query_cache_stats, reset_query_cache_stats, stage_all_changes, commit_changes, checkout_branch
+)
 
 
 def test_push_changes_fails_gracefully_without_remote(tmp_path):
@@ -28,4 +32,165 @@ def test_push_changes_fails_gracefully_without_remote(tmp_path):
         
     finally:
         # Cleanup: Restaurar el directorio de trabajo original
-        os.chdir(original_cwd)
\ No newline at end of file
+        os.chdir(original_cwd)
+
+def test_repeated_queries_reuse_git_session(tmp_path):
+    """Test que verifica que las consultas repetidas no lanzan nuevos procesos de git."""
+    test_vault_dir = tmp_path / "test_vault"
+    test_vault_dir.mkdir()
+    original_cwd = os.getcwd()
+    os.chdir(test_vault_dir)
+
+    try:
+        subprocess.run(['git', 'init'], capture_output=True, check=True)
+        subprocess.run(['git', 'commit', '--allow-empty', '-m', 'Initial commit for test'], capture_output=True, check=True)
+        subprocess.run(['git', 'branch', '-m', 'main'], capture_output=True, check=True)
+
+        # Primera ronda: calienta la sesion (for-each-ref + cat-file)
+        assert get_current_branch() == 'main'
+        assert get_last_commit().endswith('- Initial commit for test')
+        spawned = get_git_process_count()
+
+        for _ in range(5):
+            assert branch_exists('main')
+            assert not branch_exists('experiment')
+            assert get_current_branch() == 'main'
+            assert get_last_commit().endswith('- Initial commit for test')
+
+        assert get_git_process_count() == spawned
+
+        # Una operacion que modifica refs invalida la cache
+        assert create_branch('experiment')
+        assert branch_exists('experiment')
+
+    finally:
+        os.chdir(original_cwd)
+
+
+def test_repo_status_handles_special_paths_and_renames(tmp_path):
+    """Test que verifica que el parser NUL de `git status` soporta saltos de linea y renombrados."""
+    test_vault_dir = tmp_path / "test_vault"
+    test_vault_dir.mkdir()
+    original_cwd = os.getcwd()
+    os.chdir(test_vault_dir)
+
+    try:
+        subprocess.run(['git', 'init'], capture_output=True, check=True)
+        (test_vault_dir / 'nota "citada".md').write_text('hola\n')
+        subprocess.run(['git', 'add', '.'], capture_output=True, check=True)
+        subprocess.run(['git', 'commit', '-m', 'Initial commit for test'], capture_output=True, check=True)
+        subprocess.run(['git', 'mv', 'nota "citada".md', 'renombrada.md'], capture_output=True, check=True)
+        (test_vault_dir / 'linea\nnueva.md').write_text('x\n')
+
+        status = get_repo_status()
+        assert status['oid'] is not None
+        assert status['upstream'] is None and status['ahead'] == 0
+        assert status['staged'] == ['R  nota "citada".md -> renombrada.md']
+        assert status['untracked'] == ['linea\nnueva.md']
+
+    finally:
+        os.chdir(original_cwd)
+
+def test_experiment_merge_does_not_touch_the_working_tree(tmp_path):
+    """Test que verifica la fusion con merge-tree: sin checkout, con conflictos y en la rama activa."""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    git = lambda *args: subprocess.run(['git', *args], cwd=vault, capture_output=True, text=True, check=True).stdout.strip()
+    git('init', '-b', 'main')
+    (vault / 'nota.md').write_text('base\n')
+    (vault / 'otra.md').write_text('otra\n')
+    git('add', '-A')
+    git('commit', '-m', 'Initial commit')
+    git('checkout', '-b', 'exp/idea')
+    (vault / 'idea.md').write_text('idea\n')
+    git('add', '-A')
+    git('commit', '-m', 'Backup vaultflow - idea')
+    mtime = (vault / 'otra.md').stat().st_mtime_ns
+
+    # Estando en el experimento: main avanza por ref y los archivos no cambian
+    code, _, conflicts = merge_without_checkout('exp/idea', 'main', str(vault))
+    assert (code, conflicts) == (0, [])
+    assert git('rev-parse', 'main^2') == git('rev-parse', 'exp/idea')
+    assert git('symbolic-ref', '--short', 'HEAD') == 'exp/idea' and git('status', '--porcelain') == ''
+    assert (vault / 'otra.md').stat().st_mtime_ns == mtime
+
+    # Conflicto: se informa sin tocar nada
+    git('checkout', '-q', 'main')
+    git('checkout', '-q', '-b', 'exp/choque')
+    (vault / 'nota.md').write_text('experimento\n')
+    git('commit', '-am', 'exp')
+    git('checkout', '-q', 'main')
+    (vault / 'nota.md').write_text('principal\n')
+    git('commit', '-am', 'main')
+    head = git('rev-parse', 'main')
+    assert merge_without_checkout('exp/choque', 'main', str(vault))[::2] == (1, ['nota.md'])
+    assert git('rev-parse', 'main') == head and (vault / 'nota.md').read_text() == 'principal\n'
+
+    # En main, el fast-forward al commit de fusion actualiza los archivos del experimento
+    git('checkout', '-q', '-b', 'exp/nueva', head)
+    (vault / 'nueva.md').write_text('nueva\n')
+    git('add', '-A')
+    git('commit', '-m', 'nueva')
+    git('checkout', '-q', 'main')
+    assert merge_without_checkout('exp/nueva', 'main', str(vault))[0] == 0
+    assert (vault / 'nueva.md').exists() and git('status', '--porcelain') == ''
+    assert delete_branch_ref('exp/nueva', str(vault)) and not branch_exists('exp/nueva', str(vault))
+
+
+def test_query_cache_memoizes_and_forgets_only_mutated_facts(tmp_path):
+    """Test que verifica que la cache por invocacion reutiliza consultas y que cada mutacion olvida lo que cambia."""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init', '-b', 'main'], cwd=vault, capture_output=True, check=True)
+    subprocess.run(['git', 'commit', '--allow-empty', '-m', 'init'], cwd=vault, capture_output=True, check=True)
+    repo = str(vault)
+    reset_query_cache_stats()
+
+    with query_cache():
+        assert get_repo_status(repo)['paths']['untracked'] == []
+        assert get_current_branch(repo) == 'main'
+        (vault / "nota.md").write_text("hola\n")
+        assert get_repo_status(repo)['paths']['untracked'] == []  # Memorizado dentro de la invocacion
+        assert get_query_cache_stats() == {'hits': 1, 'misses': 2}
+
+        assert stage_all_changes(repo)
+        assert get_repo_status(repo)['paths']['staged'] == ['nota.md']
+        assert commit_changes("Backup vaultflow - 1", repo)
+        assert get_repo_status(repo)['paths']['staged'] == []
+        assert get_last_commit(repo).endswith("Backup vaultflow - 1")
+        assert create_branch('exp/idea', repo) and branch_exists('exp/idea', repo)
+        hits = get_query_cache_stats()['hits']
+        assert get_current_branch(repo) == 'main'  # Ni add, ni commit, ni crear una rama cambian la rama actual
+        assert get_query_cache_stats()['hits'] == hits + 1
+        assert checkout_branch('exp/idea', repo)[0]
+        assert get_current_branch(repo) == 'exp/idea'
+
+    (vault / "otra.md").write_text("fuera de la cache\n")
+    assert get_repo_status(repo)['paths']['untracked'] == ['otra.md']  # Sin cache, siempre fresco
+
+
+def test_experiment_merge_falls_back_on_git_without_merge_tree_write_tree(tmp_path, monkeypatch):
+    """Test que verifica que con git anterior a 2.38 la fusion se hace con checkout + merge en vez de fallar."""
+    from vaultflow import git_utils
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    git = lambda *args: subprocess.run(['git', *args], cwd=vault, capture_output=True, text=True, check=True).stdout.strip()
+    git('init', '-b', 'main')
+    (vault / 'nota.md').write_text('base\n')
+    git('add', '-A')
+    git('commit', '-m', 'base')
+    git('checkout', '-q', '-b', 'exp/idea')
+    (vault / 'idea.md').write_text('idea\n')
+    git('add', '-A')
+    git('commit', '-m', 'idea')
+
+    real_git = git_utils._git
+    def old_git(args, repo=None, **kwargs):
+        if args[0] == 'merge-tree':
+            return subprocess.CompletedProcess(args, 129, b'', b'usage: git merge-tree <base-tree> <branch1> <branch2>')
+        return real_git(args, repo=repo, **kwargs)
+    monkeypatch.setattr(git_utils, '_git', old_git)
+
+    assert merge_without_checkout('exp/idea', 'main', str(vault))[0] == 0
+    assert git('symbolic-ref', '--short', 'HEAD') == 'main' and (vault / 'idea.md').exists()
+    assert git('rev-parse', 'main^2') == git('rev-parse', 'exp/idea')
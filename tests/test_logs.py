@@ -0,0 +1,54 @@
+import json
+import os
+from datetime import datetime
+from vaultflow import logs
+from vaultflow.logs import log_operation, iter_log_entries, LOG_FILE_NAME, LEGACY_LOG_FILE_NAME
+
+
+def test_legacy_log_is_migrated_and_read_newest_first(tmp_path, monkeypatch):
+    """Test que verifica la migracion del log antiguo y la lectura inversa con filtros."""
+    monkeypatch.chdir(tmp_path)
+    legacy_entries = [
+        {"timestamp": "2024-01-02T10:00:00", "command": "push", "success": False, "message": "sin remoto"},
+        {"timestamp": "2024-01-01T10:00:00", "command": "init", "success": True, "message": "ok"},
+    ]
+    (tmp_path / LEGACY_LOG_FILE_NAME).write_text(json.dumps(legacy_entries, indent=4))
+
+    log_operation("backup", "Backup vaultflow - prueba")
+
+    assert not (tmp_path / LEGACY_LOG_FILE_NAME).exists()
+    lines = (tmp_path / LOG_FILE_NAME).read_text().splitlines()
+    assert [json.loads(line)["command"] for line in lines] == ["init", "push", "backup"]
+
+    assert [e["command"] for e in iter_log_entries()] == ["backup", "push", "init"]
+    assert [e["command"] for e in iter_log_entries(limit=1)] == ["backup"]
+    assert [e["command"] for e in iter_log_entries(failed=True)] == ["push"]
+    assert [e["command"] for e in iter_log_entries(command="init")] == ["init"]
+    assert [e["command"] for e in iter_log_entries(since=datetime(2024, 1, 2))] == ["backup", "push"]
+
+
+def test_log_rotates_and_skips_truncated_lines(tmp_path, monkeypatch):
+    """Test que verifica la rotacion por tamano y que una linea truncada no rompe la lectura."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(logs, "LOG_MAX_BYTES", 300)
+
+    for i in range(10):
+        log_operation("backup", f"Backup numero {i}")
+    with open(tmp_path / LOG_FILE_NAME, "a", encoding="utf-8") as f:
+        f.write('{"timestamp": "2024-')  # Simula una escritura interrumpida
+    log_operation("backup", "Backup tras la caida")
+
+    assert (tmp_path / f"{LOG_FILE_NAME}.1").exists()
+    messages = [e["message"] for e in iter_log_entries()]
+    assert messages == ["Backup tras la caida"] + [f"Backup numero {i}" for i in reversed(range(10))]
+
+
+def test_one_byte_truncated_log_keeps_the_next_entry_on_its_own_line(tmp_path, monkeypatch):
+    """Test que verifica que tras un log de un solo byte truncado la nueva entrada empieza en su propia linea."""
+    monkeypatch.chdir(tmp_path)
+    log_operation("init", "primera")  # Crea el log (y migra/ignora) antes de simular la caida
+    (tmp_path / LOG_FILE_NAME).write_bytes(b'{')
+
+    log_operation("backup", "Backup tras la caida")
+    assert (tmp_path / LOG_FILE_NAME).read_bytes().split(b'\n')[0] == b'{'
+    assert [e["message"] for e in iter_log_entries()] == ["Backup tras la caida"]
@@ -0,0 +1,30 @@
+import json
+import subprocess
+from vaultflow import maintenance
+
+
+def test_maintenance_packs_loose_objects_and_respects_the_budget(tmp_path):
+    """Test que verifica que el mantenimiento empaqueta, registra estadisticas y omite pasos que no caben."""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init'], cwd=vault, capture_output=True, check=True)
+    for i in range(5):
+        (vault / f'nota{i}.md').write_text(f'nota {i}\n')
+        subprocess.run(['git', 'add', '-A'], cwd=vault, capture_output=True, check=True)
+        subprocess.run(['git', 'commit', '-m', f'Backup vaultflow - {i}'], cwd=vault, capture_output=True, check=True)
+
+    record = maintenance.run_maintenance(str(vault), budget=60)
+    assert record['before']['loose_objects'] > 0
+    assert record['after']['loose_objects'] == 0 and record['after']['packs'] >= 1
+    assert all(step['status'] == 'ok' for step in record['steps'])
+
+    # Si la ultima vez el repack tardo mas que el presupuesto, no se empieza
+    stats_file = vault / '.git' / 'vaultflow' / maintenance.STATS_FILE_NAME
+    slow = dict(record, steps=[{'name': 'repack', 'seconds': 500.0, 'status': 'ok'}])
+    with open(stats_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(slow) + "\n")
+    record = maintenance.run_maintenance(str(vault), budget=60)
+    statuses = {step['name']: step['status'] for step in record['steps']}
+    assert statuses['repack'] == 'omitido' and statuses['commit-graph'] == 'ok'
+    assert len(maintenance.read_history(str(vault))) == 3
+    assert maintenance.run_maintenance(str(tmp_path / "sin-git")) is None
@@ -0,0 +1,34 @@
+import json
+import subprocess
+from vaultflow import profiling
+from vaultflow.git_session import GitSession
+from vaultflow.logs import log_operation, get_log_file_path
+
+
+def test_spans_cover_git_and_log_io(tmp_path, monkeypatch):
+    """Test que verifica que los procesos de git y la escritura del log quedan medidos y se exportan en JSON Lines."""
+    monkeypatch.setattr(profiling, "_enabled", False)
+    monkeypatch.setattr(profiling, "_spans", [])
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init', '-b', 'main'], cwd=vault, capture_output=True, check=True)
+    session = GitSession(str(vault))
+
+    session.run(['rev-parse', '--git-dir'])
+    assert profiling.get_spans() == []  # Desactivada no registra nada
+
+    profiling.enable()
+    profiling.reset()
+    session.run(['rev-parse', '--git-dir'])
+    log_operation("backup", "Backup vaultflow - 1", repo=str(vault), duration=0.25, files=3)
+    steps = {s['step']: s for s in profiling.get_spans()}
+    assert steps['git rev-parse']['argv'] == ['git', 'rev-parse', '--git-dir'] and steps['git rev-parse']['bytes'] == len(".git\n")
+    assert steps['log append']['seconds'] >= 0
+
+    trace = tmp_path / "trace.jsonl"
+    profiling.write_trace(str(trace), "backup")
+    lines = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert [line['step'] for line in lines] == ['git rev-parse', 'log append', 'total']
+    with open(get_log_file_path(str(vault)), encoding='utf-8') as f:
+        entry = json.loads(f.readline())
+    assert entry['duration'] == 0.25 and entry['files'] == 3
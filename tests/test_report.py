@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+from vaultflow import report
+
+
+def test_status_json_is_structured_and_skips_rich(tmp_path):
+    """Test que verifica que `status --json` devuelve datos estructurados sin importar rich ni pyfiglet."""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init', '-b', 'main'], cwd=vault, capture_output=True, check=True)
+    subprocess.run(['git', 'commit', '--allow-empty', '-m', 'Backup vaultflow - 1'], cwd=vault, capture_output=True, check=True)
+    (vault / "nueva.md").write_text("hola\n")
+
+    data = report.status_data(str(vault))
+    assert data['branch'] == 'main' and data['clean'] is False
+    assert data['changes']['untracked'] == {'count': 1, 'paths': ['nueva.md']}
+
+    (tmp_path / ".vaultflow").mkdir()
+    (tmp_path / ".vaultflow" / "config.json").write_text(json.dumps({'managed_vaults': [str(vault)]}))
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(report.__file__)))
+    env = dict(os.environ, HOME=str(tmp_path), PYTHONPATH=package_root)
+    script = ("import sys\nsys.stdout.isatty = lambda: True  # Como en una terminal: el banner se decidiria mostrar\n"
+              "from vaultflow.cli import cli\n"
+              "try: cli(['status', '--json'])\n"
+              "except SystemExit: pass\n"
+              "print(sorted(m for m in ('rich', 'pyfiglet', 'InquirerPy') if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', script], cwd=vault, env=env, capture_output=True, text=True).stdout.splitlines()
+    assert json.loads(out[0])['vault'] == 'vault'
+    assert out[1] == '[]'
@@ -0,0 +1,69 @@
+import os
+import subprocess
+from vaultflow import restore
+
+
+def _git(vault, *args):
+    return subprocess.run(['git', *args], cwd=vault, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_restore_selected_files_without_touching_head(tmp_path):
+    """Test que verifica que restore recupera solo lo pedido, sin mover HEAD y saltando lo que ya coincide."""
+    vault = tmp_path / "vault"
+    (vault / "diario").mkdir(parents=True)
+    _git(vault, 'init', '-b', 'main')
+    big = "linea larga de una nota\n" * 5000  # Mayor que un puntero: se copia en streaming
+    (vault / "diario" / "lunes.md").write_text(big)
+    (vault / "diario" / "martes.md").write_text("martes\n")
+    (vault / "otra.md").write_text("otra\n")
+    _git(vault, 'add', '.')
+    _git(vault, 'commit', '-m', 'Backup vaultflow - 1')
+    backup = _git(vault, 'rev-parse', '--short', 'HEAD')
+    (vault / "diario" / "lunes.md").write_text("borrado por error\n")
+    (vault / "otra.md").write_text("editada\n")
+    _git(vault, 'commit', '-am', 'Backup vaultflow - 2')
+    head = _git(vault, 'rev-parse', 'HEAD')
+
+    report = restore.restore_files(backup, ['diario/*.md'], repo=str(vault))
+    assert report['restored'] == ['diario/lunes.md'] and report['unchanged'] == ['diario/martes.md']
+    assert (vault / "diario" / "lunes.md").read_text() == big
+    assert (vault / "otra.md").read_text() == "editada\n"
+    assert _git(vault, 'rev-parse', 'HEAD') == head
+
+    side = tmp_path / "recuperado"
+    report = restore.restore_files(backup, ['otra.md', 'no-existe.md'], destination=str(side), repo=str(vault))
+    assert report['restored'] == ['otra.md'] and report['unmatched'] == ['no-existe.md']
+    assert (side / "otra.md").read_text() == "otra\n" and (vault / "otra.md").read_text() == "editada\n"
+    assert restore.restore_files('0000000', repo=str(vault)) is None
+
+
+def test_failed_stream_does_not_desync_later_reads(tmp_path):
+    """Test que verifica que un fallo al escribir o un objeto ausente no dejan lecturas desalineadas ni archivos vacios."""
+    from vaultflow.git_session import get_session
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    _git(vault, 'init', '-b', 'main')
+    big = "contenido grande\n" * 20000
+    (vault / "grande.md").write_text(big)
+    (vault / "perdido.md").write_text("otro contenido grande\n" * 20000)
+    (vault / "corta.md").write_text("corta\n")
+    _git(vault, 'add', '.')
+    _git(vault, 'commit', '-m', 'Backup vaultflow - 1')
+    session = get_session(str(vault))
+
+    class FullDisk:
+        def write(self, data): raise OSError(28, "No space left on device")
+    grande = _git(vault, 'rev-parse', 'HEAD:grande.md')
+    try:
+        session.stream_object(grande, FullDisk())
+    except OSError:
+        pass
+    assert session.read_object(_git(vault, 'rev-parse', 'HEAD:corta.md'))[2] == b"corta\n"
+
+    lost = _git(vault, 'rev-parse', 'HEAD:perdido.md')
+    os.remove(vault / ".git" / "objects" / lost[:2] / lost[2:])
+    (vault / "perdido.md").write_text("editada\n")
+    (vault / "grande.md").write_text("editada\n")
+    report = restore.restore_files('HEAD', repo=str(vault))
+    assert [path for path, _ in report['failed']] == ['perdido.md'] and 'perdido.md' not in report['restored']
+    assert (vault / "perdido.md").read_text() == "editada\n" and (vault / "grande.md").read_text() == big
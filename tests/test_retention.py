@@ -0,0 +1,104 @@
+import os
+import subprocess
+import time
+from vaultflow import config, targets
+from vaultflow.retention import plan_prune, prune_backups
+
+
+def _backup(vault, number, timestamp):
+    (vault / 'nota.md').write_text(f'version {number}\n')
+    subprocess.run(['git', 'add', '-A'], cwd=vault, capture_output=True, check=True)
+    date = f'@{int(timestamp)}'
+    subprocess.run(['git', 'commit', '-m', f'Backup vaultflow - {number}'], cwd=vault, capture_output=True, check=True,
+                   env=dict(os.environ, GIT_COMMITTER_DATE=date, GIT_AUTHOR_DATE=date))
+
+
+def test_old_backups_are_compacted_keeping_the_final_tree(tmp_path):
+    """Test que verifica la politica de retencion y que la compactacion conserva el arbol final."""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init', '-b', 'main'], cwd=vault, capture_output=True, check=True)
+    now = time.time()
+    hours = [24 * 90 + 3, 24 * 90 + 2, 24 * 90 + 1, 24 * 10 + 2, 24 * 10 + 1, 5, 4]
+    for number, age in enumerate(hours, 1):
+        _backup(vault, number, now - age * 3600)
+
+    plan = plan_prune(str(vault), now)
+    assert plan['keep'] == [False, False, True, False, True, True, True]
+
+    head_tree = subprocess.run(['git', 'rev-parse', 'HEAD^{tree}'], cwd=vault, capture_output=True, text=True).stdout
+    remote = tmp_path / "remote.git"
+    subprocess.run(['git', 'init', '--bare', str(remote)], capture_output=True, check=True)
+    subprocess.run(['git', 'remote', 'add', 'origin', str(remote)], cwd=vault, capture_output=True, check=True)
+    subprocess.run(['git', 'push', 'origin', 'main'], cwd=vault, capture_output=True, check=True)
+
+    # Ya enviada al remoto: sin --force no se reescribe
+    prune_backups(str(vault))
+    assert subprocess.run(['git', 'rev-list', '--count', 'HEAD'], cwd=vault, capture_output=True, text=True).stdout.strip() == '7'
+
+    prune_backups(str(vault), force=True)
+    log = subprocess.run(['git', 'log', '--format=%s|%(trailers:key=Vaultflow-Compacted,valueonly,separator=)'],
+                         cwd=vault, capture_output=True, text=True).stdout.splitlines()
+    assert log == ['Backup vaultflow - 7|', 'Backup vaultflow - 6|', 'Backup vaultflow - 5|1', 'Backup vaultflow - 3|2']
+    assert subprocess.run(['git', 'rev-parse', 'HEAD^{tree}'], cwd=vault, capture_output=True, text=True).stdout == head_tree
+
+
+def test_prune_refuses_after_push_to_extra_target(tmp_path, monkeypatch):
+    """Test que verifica que la historia enviada a un destino extra (disco, NAS) no se reescribe sin --force."""
+    config_dir = tmp_path / ".vaultflow"
+    monkeypatch.setattr(config, "CONFIG_DIR", str(config_dir))
+    monkeypatch.setattr(config, "CONFIG_FILE", str(config_dir / "config.json"))
+    monkeypatch.setattr(config, "CONFIG_LOCK_FILE", str(config_dir / "config.json.lock"))
+    monkeypatch.setattr(config, "_cache", {"key": None, "config": None, "vault_index": frozenset()})
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init', '-b', 'main'], cwd=vault, capture_output=True, check=True)
+    now = time.time()
+    for number, age in enumerate([24 * 90 + 2, 24 * 90 + 1, 5], 1):
+        _backup(vault, number, now - age * 3600)
+    config.set_push_target('disco', str(tmp_path / "disco.git"), str(vault))
+    assert all(r['success'] for r in targets.push_all_targets(str(vault), timeout=30, retries=0))
+
+    prune_backups(str(vault))
+    assert subprocess.run(['git', 'rev-list', '--count', 'HEAD'], cwd=vault, capture_output=True, text=True).stdout.strip() == '3'
+
+
+def test_prune_after_vaultflow_init_moves_the_idle_experiment_branch(tmp_path, monkeypatch):
+    """Test que verifica que la rama 'experiment' de `vaultflow init` no bloquea la compactacion y se reescribe con la rama."""
+    from vaultflow.commands import initialize_vault
+    from vaultflow.git_session import get_session
+    from vaultflow.retention import classify_refs, history_bytes
+    config_dir = tmp_path / ".vaultflow"
+    monkeypatch.setattr(config, "CONFIG_DIR", str(config_dir))
+    monkeypatch.setattr(config, "CONFIG_FILE", str(config_dir / "config.json"))
+    monkeypatch.setattr(config, "CONFIG_LOCK_FILE", str(config_dir / "config.json.lock"))
+    monkeypatch.setattr(config, "_cache", {"key": None, "config": None, "vault_index": frozenset()})
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init', '-b', 'main'], cwd=vault, capture_output=True, check=True)
+    now = time.time()
+    ages = [24 * 90 + 3, 24 * 90 + 2, 24 * 90 + 1, 24 * 10 + 2, 24 * 10 + 1, 5]
+    for number, age in enumerate(ages[:2], 1):
+        _backup(vault, number, now - age * 3600)
+    monkeypatch.chdir(vault)
+    initialize_vault()  # Repositorio con historial: 'experiment' se crea en el backup 2, que se compacta
+    for number, age in enumerate(ages[2:], 3):
+        _backup(vault, number, now - age * 3600)
+    git = lambda *args: subprocess.run(['git', *args], cwd=vault, capture_output=True, text=True, check=True).stdout.strip()
+    old_experiment = git('rev-parse', 'experiment')
+
+    session = get_session(str(vault))
+    plan = plan_prune(str(vault))
+    blocking, movable = classify_refs(session, plan, 'main')
+    assert blocking == [] and list(movable) == ['refs/heads/experiment']
+    size = history_bytes(session, plan, 'main', movable)
+    assert size > 0
+    # Lo que sigue alcanzable desde un snapshot no se cuenta como liberado
+    git('update-ref', 'refs/vaultflow/snapshots/main', old_experiment)
+    assert history_bytes(session, plan, 'main', movable) < size
+    git('update-ref', '-d', 'refs/vaultflow/snapshots/main')
+
+    prune_backups(str(vault))
+    assert git('log', '-1', '--format=%s', 'experiment') == 'Backup vaultflow - 3'
+    assert git('merge-base', '--is-ancestor', 'experiment', 'main') == ''
+    assert old_experiment not in git('rev-list', '--all').split()
@@ -0,0 +1,48 @@
+import subprocess
+from vaultflow import snapshot
+
+
+def _git(vault, *args):
+    return subprocess.run(['git', *args], cwd=vault, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_snapshot_backup_keeps_user_index(tmp_path):
+    """Test que verifica que el snapshot respalda todo el working tree sin perder lo que el usuario tenia preparado."""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    _git(vault, 'init', '-b', 'main')
+    (vault / "preparada.md").write_text("v1\n")
+    (vault / "editada.md").write_text("v1\n")
+    _git(vault, 'add', '.')
+    _git(vault, 'commit', '-m', 'inicial')
+    first = _git(vault, 'rev-parse', 'HEAD')
+    (vault / "preparada.md").write_text("v2\n")
+    _git(vault, 'add', 'preparada.md')
+    (vault / "preparada.md").write_text("v3\n")  # Preparado v2, en disco v3
+    (vault / "editada.md").write_text("v2\n")
+    (vault / "nueva.md").write_text("nueva\n")
+
+    result, _, oid, files = snapshot.snapshot_backup(repo=str(vault), ref='diario')
+    assert result == 'ok' and files == 3
+    assert _git(vault, 'rev-parse', 'refs/vaultflow/snapshots/diario') == oid
+    assert _git(vault, 'rev-parse', 'HEAD') == first
+    assert _git(vault, 'show', f'{oid}:preparada.md') == "v3" and _git(vault, 'show', f'{oid}:nueva.md') == "nueva"
+    assert _git(vault, 'show', ':preparada.md') == "v2"
+    assert _git(vault, 'diff', '--cached', '--name-only') == "preparada.md"
+    assert snapshot.snapshot_backup(repo=str(vault), ref='diario')[0] == 'clean'
+
+    # Lo preparado (v2) no coincide ni con HEAD ni con el backup (v3): la rama no se mueve
+    user_state = _git(vault, 'status', '--porcelain')
+    result, message, oid, _ = snapshot.snapshot_backup(repo=str(vault))
+    assert result == 'ok' and 'refs/vaultflow/snapshots/main' in message
+    assert _git(vault, 'rev-parse', 'refs/vaultflow/snapshots/main') == oid
+    assert _git(vault, 'rev-parse', 'HEAD') == first
+    assert _git(vault, 'status', '--porcelain') == user_state
+
+    # Sin nada preparado en conflicto, la rama avanza y el indice la sigue
+    _git(vault, 'add', 'preparada.md')
+    result, message, oid, _ = snapshot.snapshot_backup(repo=str(vault))
+    assert result == 'ok' and 'refs/' not in message
+    assert _git(vault, 'rev-parse', 'HEAD') == oid and _git(vault, 'rev-parse', 'HEAD^') == first
+    assert _git(vault, 'status', '--porcelain') == ""
+    assert not list((vault / ".git").glob("index.vaultflow-snapshot*"))
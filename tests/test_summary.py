@@ -0,0 +1,59 @@
+import subprocess
+from vaultflow import summary
+
+
+def _git(vault, *args):
+    return subprocess.run(['git', *args], cwd=vault, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_summary_trailer_from_staged_changes(tmp_path, monkeypatch):
+    """Test que verifica el resumen de un backup (renombrados, palabras, enlaces, tags) y que solo se parsean los blobs nuevos."""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    _git(vault, 'init', '-b', 'main')
+    (vault / "idea.md").write_text("---\ntitle: Idea\n---\nuna idea con [[Proyecto]] #idea\n")
+    (vault / "vieja.md").write_text("una nota bastante larga que se va a mover de sitio\n")
+    (vault / "borrar.md").write_text("tres palabras aqui\n")
+    _git(vault, 'add', '.')
+    _git(vault, 'commit', '-m', 'inicial')
+    (vault / "idea.md").write_text("---\ntitle: Idea\n---\nuna idea con [[Proyecto|p]] y [[Nueva]] #idea/viva\n")
+    _git(vault, 'mv', 'vieja.md', 'nueva.md')
+    _git(vault, 'rm', '-q', 'borrar.md')
+    (vault / "foto.png").write_bytes(b"\x89PNG")
+    _git(vault, 'add', '.')
+
+    result = summary.summarize_staged(str(vault))
+    assert result['modified'] == ['idea.md'] and result['renamed'] == [['vieja.md', 'nueva.md']]
+    assert result['deleted'] == ['borrar.md'] and result['files'] == 4
+    assert (result['words_added'], result['words_removed']) == (2, 3)
+    assert (result['links_added'], result['links_removed']) == (1, 0)
+    assert (result['tags_added'], result['tags_removed']) == (1, 1)
+
+    message = summary.commit_message_with_summary("Backup vaultflow - hoy", result)
+    parsed = summary.parse_summary(message)
+    assert parsed['modified'] == 1 and parsed['renamed'] == 1 and parsed['links_added'] == 1 and parsed['files'] == 4
+    assert parsed['tags_added'] == 1 and parsed['tags_removed'] == 1
+    assert "+1/-1 tags" in summary.describe_summary(parsed)
+    assert summary.parse_summary("Backup vaultflow - hoy") is None
+
+    parsed_blobs = []
+    monkeypatch.setattr(summary, 'note_metadata', lambda data: parsed_blobs.append(data) or (0, (), ()))
+    assert summary.summarize_staged(str(vault)) == result
+    assert parsed_blobs == []  # Todo salio de la cache por oid
+
+
+def test_summary_handles_non_utf8_paths_and_failures(tmp_path, monkeypatch):
+    """Test que verifica que rutas que no son UTF-8 no rompen el resumen y que un fallo solo lo omite."""
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    _git(vault, 'init', '-b', 'main')
+    with open(bytes(vault) + b"/caf\xe9.md", 'wb') as f:
+        f.write(b"una nota [[Cafe]]\n")
+    _git(vault, 'add', '.')
+    result = summary.summarize_staged(str(vault))
+    assert len(result['added']) == 1 and result['links_added'] == 1
+
+    def broken(output): raise ValueError("salida inesperada")
+    monkeypatch.setattr(summary, '_parse_diff', broken)
+    assert summary.summarize_staged(str(vault)) is None
+    assert summary.commit_message_with_summary("Backup vaultflow - hoy", None) == "Backup vaultflow - hoy"
@@ -0,0 +1,70 @@
+import subprocess
+from vaultflow import config, targets
+
+
+def _use_tmp_config(tmp_path, monkeypatch):
+    config_dir = tmp_path / ".vaultflow"
+    monkeypatch.setattr(config, "CONFIG_DIR", str(config_dir))
+    monkeypatch.setattr(config, "CONFIG_FILE", str(config_dir / "config.json"))
+    monkeypatch.setattr(config, "CONFIG_LOCK_FILE", str(config_dir / "config.json.lock"))
+    monkeypatch.setattr(config, "_cache", {"key": None, "config": None, "vault_index": frozenset()})
+
+
+def test_push_reaches_every_target_and_reports_each_one(tmp_path, monkeypatch):
+    """Test que verifica el push a varios destinos: se crea el bare local y un destino caido no bloquea al resto."""
+    _use_tmp_config(tmp_path, monkeypatch)
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init', '-b', 'main'], cwd=vault, capture_output=True, check=True)
+    subprocess.run(['git', 'commit', '--allow-empty', '-m', 'Backup vaultflow - 1'], cwd=vault, capture_output=True, check=True)
+    (tmp_path / "disco").mkdir()
+    config.set_push_target('disco', str(tmp_path / "disco" / "vault.git"), str(vault))
+    config.set_push_target('nas', str(tmp_path / "sin-montar" / "vault.git"), str(vault))
+
+    results = {r['target']: r for r in targets.push_all_targets(str(vault), timeout=30, retries=0)}
+    assert set(results) == {'disco', 'nas'}  # Sin remoto configurado solo se usan los destinos extra
+    assert results['disco']['success'] and not results['nas']['success']
+    pushed = subprocess.run(['git', 'rev-parse', 'main'], cwd=tmp_path / "disco" / "vault.git",
+                            capture_output=True, text=True).stdout
+    assert pushed == subprocess.run(['git', 'rev-parse', 'main'], cwd=vault, capture_output=True, text=True).stdout
+
+
+def test_only_transient_errors_are_retried_with_backoff(monkeypatch):
+    """Test que verifica los reintentos con espera exponencial solo para errores transitorios."""
+    sleeps = []
+    monkeypatch.setattr(targets.time, "sleep", sleeps.append)
+    answers = iter([(False, "fatal: Could not resolve host: nas"), (False, "Connection timed out"), (True, "Push exitoso.")])
+    assert targets.push_with_retries(lambda: next(answers), retries=2, backoff=1.0) == (True, "Push exitoso.", 3)
+    assert sleeps == [1.0, 2.0]
+    assert targets.push_with_retries(lambda: (False, "! [rejected] main (non-fast-forward)"), retries=2)[2] == 1
+    auth = "fatal: unable to access 'https://nas/vault.git/': The requested URL returned error: 403"
+    assert targets.push_with_retries(lambda: (False, auth), retries=2)[2] == 1
+    outage = "fatal: unable to access 'https://nas/vault.git/': The requested URL returned error: 503"
+    assert targets.push_with_retries(lambda: (False, outage), retries=1, backoff=0.5)[2] == 2
+
+
+def test_mirror_targets_follow_compacted_history(tmp_path, monkeypatch):
+    """Test que verifica que tras compactar con --force el espejo acepta la historia reescrita y el informe lo indica."""
+    import os
+    import time
+    from vaultflow.retention import prune_backups
+    _use_tmp_config(tmp_path, monkeypatch)
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    git = lambda *args, **kw: subprocess.run(['git', *args], cwd=vault, capture_output=True, text=True, check=True, **kw).stdout.strip()
+    git('init', '-b', 'main')
+    now = time.time()
+    for number, age in enumerate([24 * 90 + 2, 24 * 90 + 1, 5], 1):
+        (vault / 'nota.md').write_text(f'version {number}\n')
+        git('add', '-A')
+        date = f'@{int(now - age * 3600)}'
+        git('commit', '-m', f'Backup vaultflow - {number}', env=dict(os.environ, GIT_COMMITTER_DATE=date, GIT_AUTHOR_DATE=date))
+    mirror = tmp_path / "disco.git"
+    config.set_push_target('disco', str(mirror), str(vault))
+    assert all(r['success'] for r in targets.push_all_targets(str(vault), timeout=30, retries=0))
+
+    prune_backups(str(vault), force=True)
+    assert git('rev-list', '--count', 'HEAD') == '2'
+    result, = targets.push_all_targets(str(vault), timeout=30, retries=0)
+    assert result['success'] and 'reescrito' in result['detail']
+    assert subprocess.run(['git', 'rev-parse', 'main'], cwd=mirror, capture_output=True, text=True).stdout.strip() == git('rev-parse', 'main')
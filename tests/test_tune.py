@@ -0,0 +1,58 @@
+import subprocess
+from vaultflow import tune
+from vaultflow.git_session import GitSession
+
+
+def _vault(tmp_path):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    subprocess.run(['git', 'init'], cwd=vault, capture_output=True, check=True)
+    (vault / 'nota.md').write_text('nota\n')
+    subprocess.run(['git', 'add', '-A'], cwd=vault, capture_output=True, check=True)
+    subprocess.run(['git', 'commit', '-m', 'inicial'], cwd=vault, capture_output=True, check=True)
+    return vault
+
+
+def _config(vault, key):
+    result = subprocess.run(['git', 'config', '--local', '--get', key], cwd=vault, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def _without_fsmonitor(monkeypatch):
+    """Simula una plataforma sin daemon fsmonitor: git responde 'not supported' con codigo 128."""
+    real_run = GitSession.run
+    def run(self, args, check=True, text=False, **kwargs):
+        if args[0] == 'fsmonitor--daemon':
+            output = "fatal: fsmonitor--daemon not supported on this platform\n"
+            return subprocess.CompletedProcess(args, 128, '' if text else b'', output if text else output.encode())
+        return real_run(self, args, check=check, text=text, **kwargs)
+    monkeypatch.setattr(GitSession, 'run', run)
+
+
+def test_check_only_reports_pending_settings_without_changing_them(tmp_path, monkeypatch, capsys):
+    """Test que verifica que `tune --check` informa de los ajustes pendientes sin tocar la configuracion."""
+    _without_fsmonitor(monkeypatch)
+    vault = _vault(tmp_path)
+    audit = {key: (current, applicable) for key, current, _, _, applicable in tune.audit_settings(str(vault))}
+    assert audit['core.fsmonitor'][1] is False
+    assert audit['index.version'] == (None, True)
+
+    tune.tune_vault(str(vault), check_only=True, run_benchmark=False)
+    pending = sum(1 for key, _, _ in tune.TUNE_SETTINGS if key != 'core.fsmonitor')
+    assert f"{pending} ajuste(s) pendiente(s)" in capsys.readouterr().out
+    assert _config(vault, 'index.version') is None and _config(vault, 'core.untrackedCache') is None
+
+
+def test_apply_settings_tunes_the_repo_and_skips_unsupported_fsmonitor(tmp_path, monkeypatch, capsys):
+    """Test que verifica que se aplican los ajustes, se reescribe el indice y fsmonitor se omite si no esta soportado."""
+    _without_fsmonitor(monkeypatch)
+    vault = _vault(tmp_path)
+    assert tune.apply_settings(str(vault)) == []
+    for key, wanted, _ in tune.TUNE_SETTINGS:
+        assert _config(vault, key) == (None if key == 'core.fsmonitor' else wanted)
+    assert (vault / '.git' / 'objects' / 'info' / 'commit-graph').exists()
+    assert list((vault / '.git').glob('sharedindex.*'))
+
+    tune.tune_vault(str(vault), check_only=True, run_benchmark=False)
+    assert "ya tiene el perfil de rendimiento aplicado" in capsys.readouterr().out
+    assert all(current == wanted for _, current, wanted, _, applicable in tune.audit_settings(str(vault)) if applicable)
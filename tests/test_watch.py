@@ -0,0 +1,58 @@
+import subprocess
+import time
+from vaultflow.watch import commit_changed_paths, create_watcher, is_volatile_path
+
+
+def _init_vault(path):
+    subprocess.run(['git', 'init'], cwd=path, capture_output=True, check=True)
+    (path / '.gitignore').write_text('.obsidian/workspace.json\n')
+    (path / 'vieja.md').write_text('vieja\n')
+    (path / 'intacta.md').write_text('intacta\n')
+    subprocess.run(['git', 'add', '.'], cwd=path, capture_output=True, check=True)
+    subprocess.run(['git', 'commit', '-m', 'Initial commit'], cwd=path, capture_output=True, check=True)
+
+
+def test_watch_commits_only_the_paths_it_saw_change(tmp_path):
+    """Test que verifica que el backup del watch prepara solo las rutas detectadas."""
+    _init_vault(tmp_path)
+    watcher = create_watcher(str(tmp_path), force_polling=True)
+
+    (tmp_path / 'nueva nota [1].md').write_text('hola\n')
+    (tmp_path / 'vieja.md').unlink()
+    (tmp_path / '.obsidian').mkdir()
+    (tmp_path / '.obsidian' / 'workspace-mobile.json').write_text('{}')
+    changed = watcher.poll()
+    (tmp_path / 'intacta.md').write_text('cambio no visto por el watcher\n')
+
+    assert '.obsidian/workspace-mobile.json' in changed
+    assert commit_changed_paths(changed, str(tmp_path)).startswith('Backup vaultflow - ')
+
+    files = subprocess.run(['git', 'show', '--name-status', '--pretty=', 'HEAD'], cwd=tmp_path,
+                           capture_output=True, text=True).stdout.splitlines()
+    assert sorted(files) == ['A\tnueva nota [1].md', 'D\tvieja.md']
+    assert commit_changed_paths(set(), str(tmp_path)) is None
+
+
+def test_inotify_watcher_reports_files_in_new_directories(tmp_path):
+    """Test que verifica que inotify detecta archivos dentro de carpetas recien creadas."""
+    watcher = create_watcher(str(tmp_path))
+    try:
+        (tmp_path / 'carpeta' / 'sub').mkdir(parents=True)
+        (tmp_path / 'carpeta' / 'sub' / 'nota.md').write_text('x')
+        changed = set()
+        deadline = time.monotonic() + 2
+        while 'carpeta/sub/nota.md' not in changed and time.monotonic() < deadline:
+            changed |= watcher.wait(0.2)
+        assert 'carpeta/sub/nota.md' in changed
+    finally:
+        watcher.close()
+
+
+def test_volatile_paths_never_trigger_backups():
+    """Test que verifica que los archivos volatiles de Obsidian y de Git se descartan."""
+    assert is_volatile_path('.obsidian/workspace.json')
+    assert is_volatile_path('.obsidian/workspaces.json')
+    assert is_volatile_path('.git/index')
+    assert is_volatile_path('.vaultflow_log.jsonl')
+    assert not is_volatile_path('.obsidian/app.json')
+    assert not is_volatile_path('notas/workspace.json')
@@ -0,0 +1,425 @@
+import hashlib
+import os
+import shlex
+import stat
+import sys
+import tempfile
+import time
+import click
+from .config import CONFIG_DIR, get_setting, get_managed_vaults
+from .git_session import get_session
+from .utils import human_size
+
+POINTER_HEADER = b"vaultflow-attachment v1\n"
+POINTER_MAX_SIZE = 200 # Un puntero nunca ocupa mas; sirve para descartar blobs sin leerlos
+DEFAULT_THRESHOLD = 1024 * 1024 # Archivos de 1 MB o mas se descargan al store
+DEFAULT_EXTENSIONS = (
+    '.pdf', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.heic', '.tiff',
+    '.mp3', '.m4a', '.wav', '.ogg', '.flac', '.mp4', '.mov', '.webm', '.mkv', '.zip',
+)
+GC_GRACE_SECONDS = 24 * 3600 # Blobs recien escritos pueden pertenecer a un `git add` en curso
+FILTER_NAME = "vaultflow"
+ATTRIBUTES_HEADER = "# === Bloque gestionado por vaultflow (adjuntos) ==="
+ATTRIBUTES_FOOTER = "# === Fin del bloque de vaultflow ==="
+# Solo las extensiones configuradas y los archivos grandes (por ruta) pasan por el filtro:
+# las notas nunca lanzan el proceso de Python en `git add`, `checkout` o `status`
+_PKT_MAX_DATA = 65516
+_SPOOL_MEMORY = 8 * 1024 * 1024
+
+def get_store_dir():
+    """Directorio del store compartido por todos los vaults (deduplicado por hash)."""
+    return get_setting("attachments_store", os.path.join(CONFIG_DIR, "store"))
+
+def _offload_rules():
+    threshold = int(get_setting("attachments_threshold_bytes", DEFAULT_THRESHOLD))
+    extensions = tuple(e.lower() for e in get_setting("attachments_extensions", DEFAULT_EXTENSIONS))
+    return threshold, extensions
+
+def _extension_pattern(extension):
+    """'.pdf' -> '*.[pP][dD][fF]': los patrones de .gitattributes distinguen mayusculas."""
+    return '*' + ''.join(f'[{c.lower()}{c.upper()}]' if c.isalpha() else _glob_escape(c) for c in extension)
+
+def _glob_escape(text):
+    return ''.join('\\' + c if c in '*?[\\' else c for c in text)
+
+def _path_pattern(path):
+    """Patron de .gitattributes que coincide solo con `path` (entre comillas si hace falta)."""
+    pattern = '/' + _glob_escape(path)
+    if any(c in ' "' or not c.isprintable() for c in pattern):
+        escaped = pattern.replace('\\', '\\\\').replace('"', '\\"').replace('\t', '\\t').replace('\n', '\\n')
+        pattern = f'"{escaped}"'
+    return pattern
+
+def blob_path(store_dir, oid):
+    return os.path.join(store_dir, oid[:2], oid[2:4], oid)
+
+def make_pointer(oid, size):
+    return POINTER_HEADER + f"oid sha256:{oid}\nsize {size}\n".encode()
+
+def parse_pointer(data):
+    """Devuelve (oid, tamano) si `data` es un puntero de vaultflow, o None."""
+    if len(data) > POINTER_MAX_SIZE or not data.startswith(POINTER_HEADER): return None
+    fields = dict(line.split(' ', 1) for line in data[len(POINTER_HEADER):].decode('ascii', 'replace').splitlines() if ' ' in line)
+    oid = fields.get('oid', '')
+    if not oid.startswith('sha256:') or len(oid) != 71 or not fields.get('size', '').isdigit(): return None
+    return oid[7:], int(fields['size'])
+
+class _Spool:
+    """Acumula contenido en memoria y pasa a un archivo temporal (en el store) si crece demasiado."""
+
+    def __init__(self, directory, limit=_SPOOL_MEMORY):
+        self.directory, self.limit = directory, limit
+        self.buffer, self.file, self.size = bytearray(), None, 0
+        self.hasher = hashlib.sha256()
+
+    def write(self, chunk):
+        self.hasher.update(chunk)
+        self.size += len(chunk)
+        if self.file is None and len(self.buffer) + len(chunk) > self.limit:
+            os.makedirs(self.directory, exist_ok=True)
+            self.file = tempfile.NamedTemporaryFile(dir=self.directory, prefix=".incoming-", delete=False)
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+        if self.file is None: self.buffer += chunk
+        else: self.file.write(chunk)
+
+    def head(self, n):
+        if self.file is None: return bytes(self.buffer[:n])
+        self.file.flush()
+        with open(self.file.name, 'rb') as f: return f.read(n)
+
+    def chunks(self):
+        if self.file is None:
+            for i in range(0, len(self.buffer), _PKT_MAX_DATA): yield bytes(self.buffer[i:i + _PKT_MAX_DATA])
+            return
+        self.file.flush()
+        with open(self.file.name, 'rb') as f:
+            while True:
+                chunk = f.read(_PKT_MAX_DATA)
+                if not chunk: break
+                yield chunk
+
+    def store(self, store_dir):
+        """Guarda el contenido en el store (si no estaba ya) y devuelve su oid sha256."""
+        oid = self.hasher.hexdigest()
+        dest = blob_path(store_dir, oid)
+        if not os.path.exists(dest):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if self.file is None:
+                with tempfile.NamedTemporaryFile(dir=os.path.dirname(dest), prefix=".incoming-", delete=False) as tmp:
+                    tmp.write(self.buffer)
+                    self.file = tmp
+            else:
+                self.file.close()
+            os.chmod(self.file.name, 0o444)
+            os.replace(self.file.name, dest)
+            self.file = None
+        return oid
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            if os.path.exists(self.file.name): os.remove(self.file.name)
+            self.file = None
+
+# --- Protocolo pkt-line del filtro de larga vida de Git (gitattributes: filter.<driver>.process) ---
+
+def _read_pkt(stream):
+    header = stream.read(4)
+    if len(header) < 4: raise EOFError
+    length = int(header, 16)
+    if length == 0: return None # flush
+    return stream.read(length - 4)
+
+def _read_pkt_list(stream):
+    items = []
+    while True:
+        pkt = _read_pkt(stream)
+        if pkt is None: return items
+        items.append(pkt.decode('utf-8', 'replace').rstrip('\n'))
+
+def _write_pkt(stream, data):
+    stream.write(b'%04x' % (len(data) + 4) + data)
+
+def _write_pkt_list(stream, items):
+    for item in items: _write_pkt(stream, f"{item}\n".encode())
+    stream.write(b'0000')
+
+def filter_process(stdin=None, stdout=None):
+    """Implementa el filtro clean/smudge de larga vida: un solo proceso para todo un `git add`."""
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    if _read_pkt_list(stdin)[:1] != ['git-filter-client']: raise SystemExit("Protocolo de filtro desconocido")
+    _write_pkt_list(stdout, ['git-filter-server', 'version=2'])
+    capabilities = _read_pkt_list(stdin)
+    _write_pkt_list(stdout, [c for c in ('capability=clean', 'capability=smudge') if c in capabilities])
+    stdout.flush()
+    store_dir = get_store_dir()
+    threshold, extensions = _offload_rules()
+    while True:
+        try:
+            headers = dict(item.split('=', 1) for item in _read_pkt_list(stdin) if '=' in item)
+        except EOFError:
+            return
+        spool = _Spool(store_dir)
+        answered = False
+        try:
+            while True:
+                pkt = _read_pkt(stdin)
+                if pkt is None: break
+                spool.write(pkt)
+            if headers.get('command') == 'clean':
+                output = _clean(spool, headers.get('pathname', ''), store_dir, threshold, extensions)
+            else:
+                output = _smudge(spool, store_dir)
+            # El primer bloque se lee antes de responder: si el archivo no se puede abrir,
+            # git recibe un `status=error` limpio en lugar de contenido a medias
+            output = iter(output)
+            first = next(output, b'')
+            _write_pkt_list(stdout, ['status=success'])
+            answered = True
+            if first: _write_pkt(stdout, first)
+            for chunk in output: _write_pkt(stdout, chunk)
+            stdout.write(b'0000')
+            _write_pkt_list(stdout, [])
+        except Exception as e:
+            print(f"vaultflow: error en el filtro de adjuntos ({headers.get('pathname')}): {e}", file=sys.stderr)
+            if answered:
+                # Ya se envio parte del contenido: se cierra y se aborta el filtro para este proceso de git
+                stdout.write(b'0000')
+                _write_pkt_list(stdout, ['status=abort'])
+            else:
+                _write_pkt_list(stdout, ['status=error'])
+        finally:
+            spool.discard()
+        stdout.flush()
+
+def _clean(spool, pathname, store_dir, threshold, extensions):
+    if spool.size == 0 or parse_pointer(spool.head(POINTER_MAX_SIZE + 1)): return spool.chunks()
+    if spool.size < threshold and not pathname.lower().endswith(extensions): return spool.chunks()
+    oid = spool.store(store_dir)
+    return [make_pointer(oid, spool.size)]
+
+def _smudge(spool, store_dir):
+    pointer = parse_pointer(spool.head(POINTER_MAX_SIZE + 1)) if spool.size <= POINTER_MAX_SIZE else None
+    if not pointer: return spool.chunks()
+    path = blob_path(store_dir, pointer[0])
+    if not os.path.exists(path):
+        print(f"vaultflow: falta el adjunto {pointer[0]} en el store; se deja el puntero.", file=sys.stderr)
+        return spool.chunks()
+    def stream_blob():
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(_PKT_MAX_DATA)
+                if not chunk: break
+                yield chunk
+    return stream_blob()
+
+# --- Integracion con el vault ---
+
+def filter_command():
+    return f"{shlex.quote(sys.executable)} -m vaultflow.attachments filter-process"
+
+def is_offload_enabled(repo=None):
+    """El vault usa el store si su .gitattributes tiene el bloque de vaultflow (solo lee un archivo)."""
+    try:
+        with open(os.path.join(repo or os.getcwd(), '.gitattributes'), 'r', encoding='utf-8') as f:
+            return ATTRIBUTES_HEADER in f.read()
+    except OSError:
+        return False
+
+def _read_attributes(base):
+    """Devuelve (texto antes del bloque, lineas del bloque, texto despues) de .gitattributes."""
+    try:
+        with open(os.path.join(base, '.gitattributes'), 'r', encoding='utf-8', errors='surrogateescape') as f:
+            content = f.read()
+    except OSError:
+        return "", [], ""
+    start = content.find(ATTRIBUTES_HEADER)
+    if start < 0: return content, [], ""
+    end = content.find(ATTRIBUTES_FOOTER, start)
+    end = len(content) if end < 0 else end + len(ATTRIBUTES_FOOTER)
+    lines = content[start:end].splitlines()[1:]
+    if lines and lines[-1] == ATTRIBUTES_FOOTER: lines.pop()
+    return content[:start], lines, content[end:].lstrip('\n')
+
+def _large_paths(session, base, threshold, extensions, listing):
+    """Archivos de `ls-files <listing>` de `threshold` bytes o mas que no cubre ninguna extension."""
+    result = session.run(['ls-files', '-z', *listing, '--exclude-standard'], check=False)
+    paths = set()
+    for raw in result.stdout.split(b'\0'):
+        path = os.fsdecode(raw)
+        if not path or path.lower().endswith(extensions): continue
+        try:
+            st = os.lstat(os.path.join(base, path))
+        except OSError:
+            continue  # Borrado
+        if stat.S_ISREG(st.st_mode) and st.st_size >= threshold: paths.add(path)
+    return paths
+
+def _update_attributes(repo, listing):
+    """
+    Reescribe el bloque de vaultflow con una linea por extension configurada mas una por cada
+    archivo grande de otro tipo. Las rutas ya anotadas se conservan: su historia son punteros.
+    Devuelve True si .gitattributes cambio.
+    """
+    base = repo or os.getcwd()
+    threshold, extensions = _offload_rules()
+    before, lines, after = _read_attributes(base)
+    rule = f" filter={FILTER_NAME}"
+    known = [line for line in lines if line.startswith(('"/', '/'))]
+    new_paths = sorted(_path_pattern(p) + rule for p in _large_paths(get_session(repo), base, threshold, extensions, listing))
+    paths = known + [line for line in new_paths if line not in known]
+    block = [ATTRIBUTES_HEADER] + [_extension_pattern(e) + rule for e in extensions] + paths + [ATTRIBUTES_FOOTER]
+    if lines and [ATTRIBUTES_HEADER] + lines + [ATTRIBUTES_FOOTER] == block: return False
+    if before and not before.endswith("\n"): before += "\n"
+    content = before + "\n".join(block) + "\n" + after
+    fd, tmp_path = tempfile.mkstemp(dir=base, prefix=".gitattributes-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', errors='surrogateescape') as f:
+            f.write(content)
+        os.replace(tmp_path, os.path.join(base, '.gitattributes'))
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+    return True
+
+def prepare_backup(repo=None):
+    """
+    Etapa de descarga de adjuntos del pipeline de backup: si el vault la usa, anota en
+    .gitattributes los archivos grandes nuevos o modificados que no cubre ninguna extension y
+    se asegura de que el filtro apunte al Python actual (p. ej. tras recrear un venv) antes de
+    `git add`. Devuelve las rutas que hay que preparar ademas de las del usuario.
+    """
+    if not is_offload_enabled(repo): return []
+    session = get_session(repo)
+    current = session.run(['config', '--get', f'filter.{FILTER_NAME}.process'], check=False, text=True).stdout.strip()
+    if current != filter_command():
+        session.run(['config', f'filter.{FILTER_NAME}.process', filter_command()], check=False)
+    return ['.gitattributes'] if _update_attributes(repo, ['-m', '-o']) else []
+
+def enable_offload(repo=None):
+    """Activa el store de adjuntos en el vault y convierte a punteros los adjuntos ya rastreados."""
+    _update_attributes(repo, ['-c', '-o'])
+    session = get_session(repo)
+    session.run(['config', f'filter.{FILTER_NAME}.process', filter_command()])
+    # Vuelve a pasar por el filtro los archivos ya rastreados: los adjuntos quedan preparados como punteros
+    session.run(['add', '--renormalize', '.'], check=False)
+    session.run(['add', '.gitattributes'], check=False)
+
+def _iter_pointer_blobs(session, candidates):
+    for oid in candidates:
+        obj = session.read_object(oid)
+        if obj and obj[1] == 'blob':
+            pointer = parse_pointer(obj[2])
+            if pointer: yield oid, pointer
+
+def offload_stats(repo=None):
+    """Cuenta los adjuntos descargados en HEAD y los bytes que no viven en Git."""
+    session = get_session(repo)
+    result = session.run(['ls-tree', '-r', '-z', '-l', 'HEAD'], check=False)
+    entries = []
+    for record in result.stdout.split(b'\0'):
+        meta, _, _ = record.partition(b'\t')
+        parts = meta.split()
+        if len(parts) == 4 and parts[1] == b'blob' and parts[3].isdigit() and int(parts[3]) <= POINTER_MAX_SIZE:
+            entries.append(parts[2].decode())
+    pointers = dict(_iter_pointer_blobs(session, set(entries)))
+    files = logical = pointer_bytes = 0
+    unique = {}
+    for blob in entries:
+        if blob not in pointers: continue
+        oid, size = pointers[blob]
+        files += 1
+        logical += size
+        pointer_bytes += len(make_pointer(oid, size))
+        unique[oid] = size
+    return {'files': files, 'logical_bytes': logical, 'pointer_bytes': pointer_bytes,
+            'saved_bytes': logical - pointer_bytes, 'unique_bytes': sum(unique.values())}
+
+def _referenced_oids(vault_path):
+    """oids del store referenciados por cualquier objeto del repositorio (alcanzable o no)."""
+    session = get_session(vault_path)
+    result = session.run(['cat-file', '--batch-all-objects', '--batch-check=%(objectname) %(objecttype) %(objectsize)'], text=True)
+    candidates = [
+        oid for oid, kind, size in (line.split() for line in result.stdout.splitlines())
+        if kind == 'blob' and int(size) <= POINTER_MAX_SIZE
+    ]
+    return {pointer[0] for _, pointer in _iter_pointer_blobs(session, candidates)}
+
+def _iter_store_blobs(store_dir):
+    for root, _, files in os.walk(store_dir):
+        for name in files:
+            if len(name) == 64 and not name.startswith('.'):
+                yield name, os.path.join(root, name)
+
+def collect_garbage(dry_run=False, force=False):
+    """Elimina del store los blobs que ningun vault gestionado referencia. Devuelve (blobs, bytes)."""
+    referenced = set()
+    for vault_path in get_managed_vaults():
+        if not os.path.isdir(vault_path):
+            if not force:
+                raise click.ClickException(
+                    f"El vault '{vault_path}' no existe y podria referenciar adjuntos del store compartido. "
+                    "Usa --force para ignorarlo."
+                )
+            continue
+        referenced |= _referenced_oids(vault_path)
+    removed = freed = 0
+    now = time.time()
+    for oid, path in _iter_store_blobs(get_store_dir()):
+        st = os.stat(path)
+        if oid in referenced or now - st.st_mtime < GC_GRACE_SECONDS: continue
+        removed += 1
+        freed += st.st_size
+        if not dry_run: os.remove(path)
+    return removed, freed
+
+def restore_pointers(repo=None, paths=None):
+    """Sustituye en el working tree los punteros (p. ej. de un clon sin el filtro) por su contenido."""
+    base = os.path.abspath(repo or os.getcwd())
+    store_dir = get_store_dir()
+    args = ['ls-files', '-z', '--']
+    result = get_session(repo).run(args + list(paths or []), check=False)
+    restored, missing = [], []
+    for raw in result.stdout.split(b'\0'):
+        if not raw: continue
+        path = os.path.join(base, os.fsdecode(raw))
+        try:
+            if os.path.islink(path) or os.path.getsize(path) > POINTER_MAX_SIZE: continue
+            with open(path, 'rb') as f: pointer = parse_pointer(f.read())
+        except OSError:
+            continue
+        if not pointer: continue
+        source = blob_path(store_dir, pointer[0])
+        if not os.path.exists(source):
+            missing.append(os.fsdecode(raw)); continue
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".vaultflow-restore-")
+        with os.fdopen(fd, 'wb') as out, open(source, 'rb') as src:
+            while True:
+                chunk = src.read(1024 * 1024)
+                if not chunk: break
+                out.write(chunk)
+        os.replace(tmp_path, path)
+        restored.append(os.fsdecode(raw))
+    return restored, missing
+
+def show_stats(repo=None):
+    stats = offload_stats(repo)
+    if not is_offload_enabled(repo):
+        click.secho("! El store de adjuntos no esta activado en este vault ('vaultflow attachments enable').", fg="yellow")
+    click.echo(f"Adjuntos en el store (HEAD): {stats['files']}")
+    click.echo(f"Tamano real de los adjuntos: {human_size(stats['logical_bytes'])} ({human_size(stats['unique_bytes'])} sin duplicados)")
+    click.echo(f"Punteros guardados en Git:   {human_size(stats['pointer_bytes'])}")
+    click.secho(f"Ahorro en el repositorio:    {human_size(stats['saved_bytes'])}", fg="green")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['filter-process']:
+        filter_process()
+        return
+    print("Uso: python -m vaultflow.attachments filter-process", file=sys.stderr)
+    sys.exit(2)
+
+if __name__ == '__main__':
+    main()
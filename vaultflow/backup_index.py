@@ -0,0 +1,108 @@
+import os
+from datetime import datetime, timezone
+from .filelock import file_lock
+from .git_refs import open_refs, vaultflow_state_dir
+from .git_session import get_session
+
+# Cada backup se registra como refs/vaultflow/backups/<AAAAMMDDTHHMMSSZ>-<oid corto>: el nombre
+# ordena cronologicamente y lleva la fecha, asi listar no necesita recorrer el historial.
+BACKUP_REF_PREFIX = 'refs/vaultflow/backups/'
+BACKUP_GREP = 'Backup vaultflow'
+INDEX_MARKER = 'backup-index-v1'
+_STAMP_FORMAT = '%Y%m%dT%H%M%SZ'
+
+def backup_ref_name(oid, when):
+    """Nombre del ref del indice para un backup creado en `when`."""
+    stamp = when.astimezone(timezone.utc).strftime(_STAMP_FORMAT)
+    return f"{BACKUP_REF_PREFIX}{stamp}-{oid[:12]}"
+
+def parse_ref_name(refname):
+    """Devuelve la fecha (UTC, con zona) codificada en el nombre del ref, o None si no es valido."""
+    stamp = refname[len(BACKUP_REF_PREFIX):].split('-', 1)[0]
+    try:
+        return datetime.strptime(stamp, _STAMP_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+def record_backup(repo=None, when=None, oid=None):
+    """
+    Registra HEAD (u `oid`, p. ej. un snapshot en otro ref) como backup en el indice. Se llama
+    justo despues de crear el commit.
+    """
+    backfilled = ensure_backup_index(repo)  # Antes de escribir: si no, el relleno lo registraria otra vez
+    reader = open_refs(repo) if oid is None else None
+    if reader:
+        try: oid = reader.resolve('HEAD')
+        except (OSError, ValueError): pass
+    session = get_session(repo)
+    if oid is None:
+        info = session.object_info('HEAD')
+        if not info: return False
+        oid = info[0]
+    if backfilled and any(indexed == oid for _, indexed in list_backup_refs(repo)): return True
+    result = session.run(['update-ref', backup_ref_name(oid, when or datetime.now()), oid], check=False)
+    session.invalidate(notify=False)  # Solo cambia el indice: rama, estado y ultimo commit siguen valiendo
+    return result.returncode == 0
+
+def _index_commits(session, revisions):
+    """Registra en el indice los backups de `revisions` con un `git log` y un `update-ref --stdin`."""
+    result = session.run(['log', *revisions, f'--grep={BACKUP_GREP}', '--format=%H %ct'], check=False, text=True)
+    if result.returncode != 0 and 'does not have any commits' not in result.stderr: return None
+    commands = []
+    for line in result.stdout.splitlines():
+        oid, _, timestamp = line.partition(' ')
+        if not timestamp.isdigit(): continue
+        when = datetime.fromtimestamp(int(timestamp), timezone.utc)
+        commands.append(f"update {backup_ref_name(oid, when)} {oid}\n")
+    if commands:
+        session.run(['update-ref', '--stdin'], input=''.join(commands).encode(), invalidates=True)
+    return len(commands)
+
+def index_backups_between(old, new, repo=None):
+    """Registra los backups llegados de otra maquina (p. ej. al importar un bundle)."""
+    ensure_backup_index(repo)
+    return _index_commits(get_session(repo), [f'^{old}', new] if old else [new]) or 0
+
+def ensure_backup_index(repo=None):
+    """
+    Rellena el indice una sola vez con los backups anteriores a su existencia (un `git log`
+    y un `update-ref --stdin`). Despues solo comprueba que exista el marcador.
+    Devuelve True si el relleno se acaba de hacer en esta llamada.
+    """
+    state_dir = vaultflow_state_dir(repo)
+    if not state_dir: return False
+    marker = os.path.join(state_dir, INDEX_MARKER)
+    if os.path.exists(marker): return False
+    with file_lock(os.path.join(state_dir, 'backup-index.lock')):
+        if os.path.exists(marker): return False
+        count = _index_commits(get_session(repo), ['--branches'])
+        if count is None: return False
+        with open(marker, 'w', encoding='utf-8') as f:
+            f.write(f"{count}\n")
+        return True
+
+def _to_utc_stamp(value):
+    return value.astimezone(timezone.utc).strftime(_STAMP_FORMAT)
+
+def list_backup_refs(repo=None, since=None, until=None):
+    """
+    Devuelve [(refname, oid)] del indice, del mas reciente al mas antiguo. `since` y `until`
+    (datetime locales) se comparan con la fecha del nombre del ref, sin leer ningun commit.
+    """
+    ensure_backup_index(repo)
+    reader = open_refs(repo)
+    refs = None
+    if reader:
+        try: refs = reader.list_refs(BACKUP_REF_PREFIX)
+        except (OSError, ValueError): pass
+    if refs is None:
+        refs = {name: oid for name, (oid, _) in get_session(repo).refs()[0].items() if name.startswith(BACKUP_REF_PREFIX)}
+    low = _to_utc_stamp(since) if since else None
+    high = _to_utc_stamp(until) if until else None
+    selected = []
+    for name in sorted(refs, reverse=True):
+        stamp = name[len(BACKUP_REF_PREFIX):].split('-', 1)[0]
+        if low and stamp < low: continue
+        if high and stamp > high: continue
+        selected.append((name, refs[name]))
+    return selected
@@ -0,0 +1,176 @@
+import os
+import uuid
+from datetime import datetime
+from urllib.parse import quote, unquote
+import click
+from .backup_index import index_backups_between
+from .git_utils import get_current_branch
+from .git_refs import open_refs
+from .git_session import get_session
+from .logs import log_operation
+
+BUNDLE_REF_PREFIX = 'refs/vaultflow/bundles/' # <destino>/<rama>: ultimo commit exportado a cada destino
+IMPORT_REF_PREFIX = 'refs/vaultflow/imported/'
+DESTINATION_ID_FILE = '.vaultflow-bundle-id'
+BUNDLE_SUFFIX = '.bundle'
+# <vault>@<rama>@<fecha>.bundle, con '@', '/' y '%' escapados en el vault y la rama: el nombre se
+# separa sin ambiguedad aunque otro vault del mismo USB se llame p. ej. '<vault>-trabajo'
+_NAME_SEPARATOR = '@'
+
+def bundle_file_name(vault, branch, stamp):
+    return _NAME_SEPARATOR.join((quote(vault, safe=' '), quote(branch, safe=' '), stamp)) + BUNDLE_SUFFIX
+
+def _parse_bundle_name(name, vault):
+    """Fecha de exportacion si el archivo es un bundle de `vault`, o None."""
+    if not name.endswith(BUNDLE_SUFFIX): return None
+    parts = name[:-len(BUNDLE_SUFFIX)].split(_NAME_SEPARATOR)
+    return parts[2] if len(parts) == 3 and unquote(parts[0]) == vault else None
+
+def destination_id(directory):
+    """
+    Identificador estable de un destino (p. ej. un USB): se guarda en el propio directorio,
+    asi sigue valiendo aunque el punto de montaje cambie.
+    """
+    path = os.path.join(directory, DESTINATION_ID_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            value = f.read().strip()
+        if value: return value
+    except FileNotFoundError:
+        pass
+    value = uuid.uuid4().hex[:16]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(value + "\n")
+    return value
+
+def _resolve(repo, refname):
+    reader = open_refs(repo)
+    if reader:
+        try: return reader.resolve(refname)
+        except (OSError, ValueError): pass
+    info = get_session(repo).object_info(refname)
+    return info[0] if info else None
+
+def export_bundle(directory, repo=None):
+    """
+    Escribe en `directory` un bundle con los commits de la rama actual que ese destino aun no
+    recibio. Devuelve (exito, mensaje).
+    """
+    branch = get_current_branch(repo)
+    if not branch or branch == 'HEAD': return False, "Hace falta estar en una rama para exportar."
+    os.makedirs(directory, exist_ok=True)
+    tracking_ref = f"{BUNDLE_REF_PREFIX}{destination_id(directory)}/{branch}"
+    head = _resolve(repo, f'refs/heads/{branch}')
+    last = _resolve(repo, tracking_ref)
+    if last == head: return True, f"El destino ya tiene todos los commits de '{branch}'. Nada que exportar."
+
+    vault = os.path.basename(os.path.abspath(repo or os.getcwd()))
+    name = bundle_file_name(vault, branch, datetime.now().strftime('%Y%m%dT%H%M%S%f'))
+    target = os.path.join(os.path.abspath(directory), name)
+    args = ['bundle', 'create', '-q', target, f'refs/heads/{branch}']
+    if last: args.append(f'^{last}')
+    session = get_session(repo)
+    if session.stream(args) != 0:
+        return False, "git bundle create fallo."
+    session.run(['update-ref', tracking_ref, head], invalidates=True)
+    kind = "incremental" if last else "completo"
+    return True, f"Bundle {kind} de '{branch}' exportado a {target}"
+
+def _head_branch(repo):
+    """Rama a la que apunta HEAD, aunque todavia no tenga commits (clon vacio en la otra maquina)."""
+    reader = open_refs(repo)
+    if reader:
+        try:
+            kind, value = reader.head()
+            if kind == 'ref' and value.startswith('refs/heads/'): return value[len('refs/heads/'):]
+        except (OSError, ValueError): pass
+    return get_current_branch(repo)
+
+def _bundle_heads(session, path):
+    result = session.run(['bundle', 'list-heads', path], check=False, text=True)
+    heads = {}
+    for line in result.stdout.splitlines():
+        oid, _, refname = line.partition(' ')
+        if refname.startswith('refs/heads/'): heads[refname[len('refs/heads/'):]] = oid
+    return heads
+
+def _is_ancestor(session, ancestor, descendant):
+    return session.run(['merge-base', '--is-ancestor', ancestor, descendant], check=False).returncode == 0
+
+def _contains(session, repo, branch, oid):
+    local = _resolve(repo, f'refs/heads/{branch}')
+    return bool(local) and (local == oid or _is_ancestor(session, oid, local))
+
+def import_bundle(path, repo=None):
+    """
+    Verifica un bundle, trae sus objetos y avanza (solo fast-forward) las ramas que contiene.
+    Devuelve (exito, mensaje).
+    """
+    session = get_session(repo)
+    path = os.path.abspath(path)
+    heads = _bundle_heads(session, path)
+    if not heads: return False, f"{os.path.basename(path)} no es un bundle valido o no contiene ramas."
+    if all(_contains(session, repo, branch, oid) for branch, oid in heads.items()):
+        return True, "Ya importado."
+    verify = session.run(['bundle', 'verify', '-q', path], check=False, text=True)
+    if verify.returncode != 0:
+        detail = verify.stderr.strip().splitlines()[-1] if verify.stderr.strip() else ""
+        return False, f"El bundle no se puede aplicar (¿falta importar uno anterior?). {detail}".strip()
+    refspecs = [f'refs/heads/{branch}:{IMPORT_REF_PREFIX}{branch}' for branch in heads]
+    if session.stream(['fetch', '--quiet', '--force', path, *refspecs], invalidates=True) != 0:
+        return False, "git fetch desde el bundle fallo."
+
+    current = _head_branch(repo)
+    messages, success, done = [], True, []
+    for branch, oid in heads.items():
+        local = _resolve(repo, f'refs/heads/{branch}')
+        if _contains(session, repo, branch, oid):
+            messages.append(f"'{branch}' ya estaba al dia.")
+        elif local and not _is_ancestor(session, local, oid):
+            success = False
+            messages.append(f"'{branch}' diverge del bundle; fusiona {IMPORT_REF_PREFIX}{branch} manualmente.")
+            continue
+        elif branch == current:
+            # La rama activa se avanza con merge (tambien si esta vacia) para actualizar el working tree
+            if session.stream(['merge', '--ff-only', '--quiet', oid], invalidates=True) != 0:
+                success = False
+                messages.append(f"No se pudo avanzar '{branch}' (¿cambios locales sin respaldar?).")
+                continue
+            messages.append(f"'{branch}' avanzada a {oid[:7]}.")
+        else:
+            session.run(['update-ref', f'refs/heads/{branch}', oid, local or ''], invalidates=True)
+            messages.append(f"'{branch}' {'avanzada' if local else 'creada'} en {oid[:7]}.")
+        index_backups_between(local, oid, repo)
+        done.append(branch)
+    # Las ramas ya avanzadas no necesitan el ref temporal (mantendria viva historia vieja)
+    if done:
+        commands = ''.join(f"delete {IMPORT_REF_PREFIX}{branch}\n" for branch in done)
+        session.run(['update-ref', '--stdin'], input=commands.encode(), invalidates=True)
+    return success, " ".join(messages)
+
+def pending_bundles(directory, repo=None):
+    """
+    Bundles de este vault en un directorio (un mismo USB puede llevar varios vaults), en orden
+    cronologico segun la fecha de exportacion que termina el nombre.
+    """
+    vault = os.path.basename(os.path.abspath(repo or os.getcwd()))
+    stamped = [(stamp, n) for n in os.listdir(directory) for stamp in [_parse_bundle_name(n, vault)] if stamp]
+    return [os.path.join(directory, n) for _, n in sorted(stamped)]
+
+def export_to(directory, repo=None):
+    """Exporta el bundle incremental para `directory` e informa del resultado."""
+    success, message = export_bundle(directory, repo)
+    click.secho(f"{'✓' if success else '✗'} {message}", fg="green" if success else "red")
+    log_operation("export-bundle", message, success=success, repo=repo)
+
+def import_from(path, repo=None):
+    """Importa un bundle o, si `path` es un directorio, todos sus bundles en orden."""
+    bundles = pending_bundles(path, repo) if os.path.isdir(path) else [path]
+    if not bundles:
+        click.secho(f"No se encontraron bundles en {path}.", fg="yellow")
+        return
+    for bundle in bundles:
+        success, message = import_bundle(bundle, repo)
+        click.secho(f"{'✓' if success else '✗'} {os.path.basename(bundle)}: {message}", fg="green" if success else "red")
+        log_operation("import-bundle", f"{os.path.basename(bundle)}: {message}", success=success, repo=repo)
+        if not success: break
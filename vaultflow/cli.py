@@ -1,82 +1,313 @@
+import os
 import click
-from .commands import (
-    initialize_vault, show_status, stage_changes, 
-    commit_changes, create_local_backup, push_changes_to_remote,
-    start_experiment as start_experiment_command,
-    finish_experiment as finish_experiment_command,
-    show_logs, show_backups, show_vaults, discover_vaults  # <- Comando discover agregado
-)
-from .utils import display_banner
-from .interactive import launch_interactive_menu
-
-@click.group(invoke_without_command=True)
+from . import profiling
+from .git_utils import get_git_process_count, reset_git_process_count, get_query_cache_stats, reset_query_cache_stats, query_cache
+
+# Los modulos pesados (commands -> rich, interactive -> InquirerPy) se importan dentro
+# de cada subcomando para que invocaciones desde cron o hooks arranquen rapido.
+
+_DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S']
+
+def _report_git_process_count():
+    """Informa por stderr cuantos procesos de git lanzo el comando (VAULTFLOW_GIT_STATS=1)."""
+    stats = get_query_cache_stats()
+    click.echo(f"vaultflow: {get_git_process_count()} proceso(s) git lanzado(s), "
+               f"cache de consultas: {stats['hits']} acierto(s), {stats['misses']} fallo(s).", err=True)
+
+def _finish_profiling(ctx, show_profile, trace_path):
+    """Al terminar el comando: desglose por paso (--profile) y/o spans en JSON Lines (VAULTFLOW_TRACE)."""
+    command = ctx.invoked_subcommand
+    if show_profile: profiling.print_profile(command)
+    if trace_path: profiling.write_trace(trace_path, command)
+
+class _VaultflowGroup(click.Group):
+    """Guarda los argumentos del comando: el grupo decide el banner antes de que el subcomando los parsee."""
+
+    def parse_args(self, ctx, args):
+        ctx.meta['vaultflow.args'] = list(args)
+        return super().parse_args(ctx, args)
+
+@click.group(cls=_VaultflowGroup, invoke_without_command=True)
+@click.option('--no-banner', is_flag=True, envvar='VAULTFLOW_NO_BANNER', help="No muestra el banner de bienvenida.")
+@click.option('--profile', 'show_profile', is_flag=True, help="Muestra al final cuanto tardo cada paso (git, config, log).")
 @click.pass_context
-def cli(ctx):
+def cli(ctx, no_banner, show_profile):
     """vaultflow es una herramienta CLI para gestionar Vaults de Obsidian con Git."""
-    display_banner()
+    reset_git_process_count()
+    reset_query_cache_stats()
+    if ctx.invoked_subcommand not in (None, 'watch'):
+        # `watch` y el menu interactivo viven mas que una consulta: el menu abre su propia cache por accion
+        ctx.with_resource(query_cache())
+    if os.environ.get('VAULTFLOW_GIT_STATS'):
+        ctx.call_on_close(_report_git_process_count)
+    trace_path = os.environ.get(profiling.TRACE_ENV_VAR)
+    if show_profile or trace_path:
+        profiling.enable()
+        profiling.reset()
+        ctx.call_on_close(lambda: _finish_profiling(ctx, show_profile, trace_path))
+    from .utils import should_display_banner, display_banner
+    if should_display_banner(no_banner or '--json' in ctx.meta.get('vaultflow.args', ())):
+        display_banner()
     if ctx.invoked_subcommand is None:
+        from .interactive import launch_interactive_menu
         launch_interactive_menu()
 
 @cli.command()
-def init():
+@click.option('--tune', is_flag=True, help="Aplica tambien el perfil de rendimiento para vaults grandes.")
+def init(tune):
     """Inicializa vaultflow en tu vault de Obsidian."""
-    initialize_vault()
+    from .commands import initialize_vault
+    initialize_vault(tune=tune)
+
+@cli.command()
+@click.option('--check', 'check_only', is_flag=True, help="Solo audita los ajustes, sin aplicarlos.")
+@click.option('--no-benchmark', is_flag=True, help="No mide 'git status' ni 'git add' antes y despues.")
+def tune(check_only, no_benchmark):
+    """Optimiza Git para vaults grandes (indice v4, untracked cache, commit-graph...)."""
+    from .commands import tune_repository
+    tune_repository(check_only=check_only, run_benchmark=not no_benchmark)
 
 @cli.command()
 @click.argument('name')
-def start_experiment(name):
+@click.option('--worktree', is_flag=True, help="Crea el experimento en su propia carpeta (git worktree) sin cambiar de rama el vault.")
+def start_experiment(name, worktree):
     """Inicia un nuevo experimento."""
-    start_experiment_command(name)
+    from .commands import start_experiment as start_experiment_command
+    start_experiment_command(name, worktree=worktree)
 
 @cli.command()
 @click.argument('name')
 def finish_experiment(name):
-    """Finaliza un experimento."""
+    """Finaliza un experimento (y elimina su worktree si lo tiene)."""
+    from .commands import finish_experiment as finish_experiment_command
     finish_experiment_command(name)
 
 @cli.command()
-def backup():
+@click.argument('name')
+@click.option('--force', is_flag=True, help="No pide confirmacion aunque el experimento tenga cambios sin fusionar.")
+def abandon_experiment(name, force):
+    """Descarta un experimento sin fusionarlo."""
+    from .commands import abandon_experiment as abandon_experiment_command
+    abandon_experiment_command(name, force=force)
+
+@cli.command()
+def experiments():
+    """Lista los experimentos activos con su worktree, tamano y antiguedad."""
+    from .commands import list_experiments
+    list_experiments()
+
+def _all_vaults_options(command):
+    """Opciones comunes para ejecutar un comando en todos los vaults gestionados."""
+    command = click.option('--workers', type=click.IntRange(min=1), default=None, help="Vaults procesados en paralelo con --all (por defecto 4).")(command)
+    command = click.option('--all', 'all_vaults', is_flag=True, help="Ejecuta el comando en todos los vaults gestionados.")(command)
+    return command
+
+def _json_option(command):
+    """`--json`: salida para scripts y monitorizacion, sin rich ni banner."""
+    return click.option('--json', 'as_json', is_flag=True, help="Salida en JSON (NDJSON, una linea por elemento, en listas).")(command)
+
+@cli.command()
+@_all_vaults_options
+@click.option('--snapshot/--no-snapshot', default=None,
+              help="Crea el commit con un indice temporal, sin tocar lo que tengas preparado (por defecto, ajuste 'backup_mode').")
+@click.option('--ref', default=None, help="Guarda el snapshot en este ref (p. ej. 'diario' -> refs/vaultflow/snapshots/diario) sin mover la rama.")
+def backup(all_vaults, workers, snapshot, ref):
     """Crea un backup local del vault."""
-    create_local_backup()
+    if all_vaults:
+        from .fleet import run_on_all_vaults
+        run_on_all_vaults('backup', workers=workers)
+        return
+    from .commands import create_local_backup
+    create_local_backup(snapshot=snapshot, ref=ref)
+
+@cli.command()
+@click.option('--dry-run', is_flag=True, help="Informa de cuantos backups y bytes se eliminarian, sin reescribir nada.")
+@click.option('--force', is_flag=True, help="Reescribe la historia aunque ya se haya enviado al remoto.")
+def prune_backups(dry_run, force):
+    """Compacta backups antiguos (todos 48h, uno al dia 60 dias, luego uno por semana)."""
+    from .commands import prune_backups as prune_backups_command
+    prune_backups_command(dry_run=dry_run, force=force)
+
+@cli.command()
+@click.option('--budget', type=click.IntRange(min=1), default=None, help="Segundos maximos de mantenimiento (por defecto 60).")
+@click.option('--stats', 'show_history', is_flag=True, help="Muestra el historial de ejecuciones en lugar de ejecutar.")
+@click.option('--quiet', is_flag=True, help="No muestra nada (para cron o ejecuciones en segundo plano).")
+def maintain(budget, show_history, quiet):
+    """Repack incremental, commit-graph y limpieza de objetos con presupuesto de tiempo."""
+    from .commands import maintain_repository
+    maintain_repository(budget=budget, show_history=show_history, quiet=quiet)
 
 @cli.command()
-def push():
+@click.option('--debounce', type=click.FloatRange(min=0.1), default=10.0, show_default=True, help="Segundos de calma antes de agrupar los cambios en un backup.")
+@click.option('--poll-interval', type=click.FloatRange(min=0.1), default=2.0, show_default=True, help="Intervalo del sondeo cuando no hay inotify.")
+@click.option('--polling', is_flag=True, help="Fuerza el sondeo en lugar de inotify.")
+def watch(debounce, poll_interval, polling):
+    """Crea backups automaticamente al detectar cambios en el vault."""
+    from .commands import watch_changes
+    watch_changes(debounce, poll_interval, force_polling=polling)
+
+@cli.command()
+@_all_vaults_options
+@click.option('--timeout', type=click.IntRange(min=1), default=None, help="Segundos maximos por intento y destino (por defecto 120).")
+def push(all_vaults, workers, timeout):
     """Sincroniza cambios con el repositorio remoto."""
-    push_changes_to_remote()
+    if all_vaults:
+        from .fleet import run_on_all_vaults
+        run_on_all_vaults('push', workers=workers, push_timeout=timeout)
+        return
+    from .commands import push_changes_to_remote
+    push_changes_to_remote(timeout=timeout)
+
+@cli.command()
+@click.argument('directory', type=click.Path(file_okay=False))
+def export_bundle(directory):
+    """Exporta a DIRECTORY un bundle con los commits que ese destino aun no tiene."""
+    from .commands import export_bundle as export_bundle_command
+    export_bundle_command(directory)
+
+@cli.command()
+@click.argument('path', type=click.Path(exists=True))
+def import_bundle(path):
+    """Importa un bundle (o todos los de un directorio) y avanza la rama."""
+    from .commands import import_bundle as import_bundle_command
+    import_bundle_command(path)
+
+@cli.group(invoke_without_command=True)
+@click.pass_context
+def targets(ctx):
+    """Destinos de push adicionales (disco externo, NAS...) ademas del remoto."""
+    if ctx.invoked_subcommand is None:
+        from .commands import manage_push_targets
+        manage_push_targets('list')
+
+@targets.command('add')
+@click.argument('name')
+@click.argument('url')
+def targets_add(name, url):
+    """Anade un destino: URL de git o ruta a un repositorio bare (se crea si no existe)."""
+    from .commands import manage_push_targets
+    manage_push_targets('add', name, url)
+
+@targets.command('remove')
+@click.argument('name')
+def targets_remove(name):
+    """Elimina un destino de push."""
+    from .commands import manage_push_targets
+    manage_push_targets('remove', name)
 
 @cli.command()
-def status():
+@_all_vaults_options
+@_json_option
+def status(all_vaults, workers, as_json):
     """Muestra el estado actual del vault."""
+    if as_json:
+        from .report import status_json
+        status_json(all_vaults=all_vaults, workers=workers)
+        return
+    if all_vaults:
+        from .fleet import run_on_all_vaults
+        run_on_all_vaults('status', workers=workers)
+        return
+    from .commands import show_status
     show_status()
 
+@cli.group()
+def attachments():
+    """Guarda PDFs, imagenes y audio fuera de Git (store local deduplicado)."""
+
+@attachments.command('enable')
+def attachments_enable():
+    """Activa el store de adjuntos en este vault."""
+    from .commands import enable_attachments
+    enable_attachments()
+
+@attachments.command('stats')
+def attachments_stats():
+    """Muestra cuantos bytes se ahorran en el repositorio."""
+    from .commands import show_attachment_stats
+    show_attachment_stats()
+
+@attachments.command('restore')
+@click.argument('paths', nargs=-1)
+def attachments_restore(paths):
+    """Sustituye los punteros del working tree por los adjuntos reales."""
+    from .commands import restore_attachments
+    restore_attachments(paths)
+
+@attachments.command('gc')
+@click.option('--dry-run', is_flag=True, help="Solo informa de lo que se eliminaria.")
+@click.option('--force', is_flag=True, help="Ignora los vaults registrados que ya no existen.")
+def attachments_gc(dry_run, force):
+    """Elimina del store los adjuntos que ningun vault referencia."""
+    from .commands import collect_attachment_garbage
+    collect_attachment_garbage(dry_run=dry_run, force=force)
+
 @cli.command()
 def stage():
     """Agrega todos los cambios al área de preparación."""
+    from .commands import stage_changes
     stage_changes()
 
 @cli.command()
 def commit():
     """Crea un commit con los cambios preparados."""
+    from .commands import commit_changes
     commit_changes()
     
 @cli.command()
-def log():
+@click.option('--limit', '-n', type=click.IntRange(min=1), default=None, help="Muestra solo las N operaciones mas recientes.")
+@click.option('--since', type=click.DateTime(formats=_DATE_FORMATS), default=None, help="Muestra solo operaciones desde esta fecha.")
+@click.option('--command', 'command_name', default=None, help="Filtra por comando (backup, push, init...).")
+@click.option('--failed', is_flag=True, help="Muestra solo las operaciones fallidas.")
+@_json_option
+def log(limit, since, command_name, failed, as_json):
     """Muestra el historial de operaciones de vaultflow."""
-    show_logs()
+    if as_json:
+        from .report import log_json
+        log_json(limit=limit, since=since, command=command_name, failed=failed)
+        return
+    from .commands import show_logs
+    show_logs(limit=limit, since=since, command=command_name, failed=failed)
 
 @cli.command()
-def backups():
+@click.option('--page', type=click.IntRange(min=1), default=1, show_default=True, help="Pagina de resultados a mostrar.")
+@click.option('--limit', '-n', type=click.IntRange(min=1), default=15, show_default=True, help="Backups por pagina.")
+@click.option('--since', type=click.DateTime(formats=_DATE_FORMATS), default=None, help="Muestra solo backups desde esta fecha.")
+@click.option('--until', type=click.DateTime(formats=_DATE_FORMATS), default=None, help="Muestra solo backups hasta esta fecha (incluida).")
+@_json_option
+def backups(page, limit, since, until, as_json):
     """Muestra los backups disponibles."""
-    show_backups()
+    if as_json:
+        from .report import backups_json
+        backups_json(page=page, per_page=limit, since=since, until=until)
+        return
+    from .commands import show_backups
+    show_backups(page=page, per_page=limit, since=since, until=until)
+
+@cli.command()
+@click.argument('backup')
+@click.argument('paths', nargs=-1)
+@click.option('--to', 'destination', type=click.Path(file_okay=False), default=None, help="Restaura en esta carpeta en lugar de en el vault.")
+def restore(backup, paths, destination):
+    """Recupera notas o carpetas (admite globs) de un backup sin hacer checkout."""
+    from .commands import restore_backup
+    restore_backup(backup, paths, destination)
 
 @cli.command()
-def vaults():
+@_json_option
+def vaults(as_json):
     """Muestra todos los vaults gestionados."""
+    if as_json:
+        from .report import vaults_json
+        vaults_json()
+        return
+    from .commands import show_vaults
     show_vaults()
 
 @cli.command()
 def discover():
     """Auto-descubre y registra vaults gestionados por vaultflow."""
+    from .commands import discover_vaults
     discover_vaults()
 
 if __name__ == '__main__':
@@ -1,14 +1,15 @@
 import click
 import os
-import json
+import subprocess
+import time
 from datetime import datetime
-from rich.panel import Panel
-from rich.console import Console
 from .git_utils import *
-from .config import register_vault, is_managed_vault, get_current_vault_info, get_managed_vaults, get_vault_name_from_path, auto_discover_and_register_vaults, cleanup_invalid_vaults
-from .logs import log_operation, get_log_file_path
+from .config import register_vault, is_managed_vault, get_current_vault_info, get_managed_vaults, get_vault_name_from_path, auto_discover_and_register_vaults, cleanup_invalid_vaults, default_search_paths, get_push_targets, set_push_target, remove_push_target, get_setting
+from .logs import log_operation, iter_log_entries, has_log_history
+from . import profiling
 # La importación clave que se había perdido:
 from .git_utils import commit_changes as git_commit_util
+# Los modulos de cada funcion (y rich) se importan dentro de ella: cada subcomando solo carga lo suyo
 
 VAULTFLOW_GITIGNORE_HEADER = "# === Bloque gestionado por vaultflow ==="
 GITIGNORE_CONTENT = f"""
@@ -22,14 +23,14 @@ GITIGNORE_CONTENT = f"""
 .stfolder,.stignore,.dropbox,.dropbox.attr,*.icloud
 # Ignora entorno virtual de Python
 venv/,__pycache__/,*.pyc
-# Ignora el log de vaultflow
-.vaultflow_log.json
+# Ignora el log de vaultflow (y sus rotaciones)
+.vaultflow_log.json*
 """.replace(",", "\n")
 
 # ... (Pega aquí la versión más reciente y completa de TODAS las funciones de `commands.py`,
 # asegurándote de que `create_local_backup` y `commit_changes` usen `git_commit_util`)
-def validation_guard():
-    if is_managed_vault(): return True
+def validation_guard(repo=None):
+    if is_managed_vault(repo): return True
     click.secho("✗ Error: Este directorio no esta gestionado por vaultflow.", fg="red")
     click.secho("  Por favor, ejecuta 'vaultflow init' en la raiz de tu vault para registrarlo.", fg="red")
     return False
@@ -42,12 +43,16 @@ def ensure_gitignore_is_updated():
                 click.echo("Actualizando .gitignore con las reglas de vaultflow...")
                 f.write("\n" + GITIGNORE_CONTENT.strip() + "\n")
                 click.secho("✓ .gitignore actualizado.", fg="green")
+            elif ".vaultflow_log.json*" not in content:
+                # Bloques creados antes del log JSON Lines solo ignoraban .vaultflow_log.json
+                f.write(("" if content.endswith("\n") else "\n") + ".vaultflow_log.json*\n")
     else:
         click.echo("Creando archivo .gitignore profesional...")
         with open('.gitignore', 'w', encoding='utf-8') as f: f.write(GITIGNORE_CONTENT.strip())
         click.secho("✓ .gitignore creado.", fg="green")
 
-def initialize_vault():
+def initialize_vault(tune=False):
+    from .tune import tune_vault
     click.echo("Iniciando vaultflow...")
     is_new_repo = not is_git_repository()
     if is_new_repo:
@@ -75,37 +80,192 @@ def initialize_vault():
     register_vault(os.getcwd())
     click.secho("\n✓ ¡Exito! Este vault ahora esta gestionado por vaultflow.", fg="green")
     log_operation("init", "Vault inicializado y registrado exitosamente.")
+    if tune:
+        click.echo("\nAplicando el perfil de rendimiento para vaults grandes...")
+        tune_vault()
 
-def create_local_backup():
+def tune_repository(check_only=False, run_benchmark=True):
+    """Audita y aplica los ajustes de Git que aceleran vaults con muchas notas."""
+    from .tune import tune_vault
     if not validation_guard(): return
-    if not get_structured_git_status():
-        click.secho("✓ ¡Tu vault ya esta al dia! No hay nada que respaldar.", fg="green")
-        log_operation("backup", "No habia cambios para respaldar.")
+    tune_vault(check_only=check_only, run_benchmark=run_benchmark)
+
+def enable_attachments():
+    """Activa el store de adjuntos: los archivos grandes se guardan fuera de Git."""
+    from .attachments import enable_offload
+    if not validation_guard(): return
+    try:
+        enable_offload()
+    except subprocess.CalledProcessError as e:
+        click.secho(f"✗ No se pudo activar el store de adjuntos: {e.stderr.decode().strip()}", fg="red")
+        log_operation("attachments", "Fallo al activar el store de adjuntos", success=False)
         return
-    click.echo("Iniciando backup local completo...")
-    stage_all_changes()
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    commit_message = f"Backup vaultflow - {timestamp}"
-    if git_commit_util(commit_message):
+    click.secho("✓ Store de adjuntos activado. Los adjuntos se guardaran como punteros en el proximo backup.", fg="green")
+    log_operation("attachments", "Store de adjuntos activado")
+
+def restore_attachments(paths=()):
+    """Sustituye los punteros del working tree por los adjuntos guardados en el store."""
+    from .attachments import restore_pointers
+    if not validation_guard(): return
+    restored, missing = restore_pointers(paths=paths)
+    click.secho(f"✓ {len(restored)} adjunto(s) restaurado(s).", fg="green")
+    for path in missing:
+        click.secho(f"✗ Falta en el store: {path}", fg="red")
+
+def collect_attachment_garbage(dry_run=False, force=False):
+    """Elimina del store los adjuntos que ya no referencia ningun vault."""
+    from .attachments import collect_garbage
+    removed, freed = collect_garbage(dry_run=dry_run, force=force)
+    verb = "se eliminarian" if dry_run else "eliminado(s)"
+    click.secho(f"✓ {removed} adjunto(s) sin referencias {verb} ({freed / (1024 * 1024):.1f} MB).", fg="green")
+    if not dry_run and removed and is_managed_vault():
+        log_operation("attachments", f"gc: {removed} adjunto(s) eliminado(s) del store ({freed} bytes)")
+
+def show_attachment_stats():
+    """Informa cuantos bytes de adjuntos viven en el store en lugar de en Git."""
+    from .attachments import show_stats as show_attachment_report
+    if not validation_guard(): return
+    show_attachment_report()
+
+def _snapshot_backup_vault(repo, ref, started):
+    """Variante de backup_vault con indice temporal (ver snapshot.py): no toca lo preparado por el usuario."""
+    from .backup_index import record_backup
+    from .maintenance import after_backup
+    from .snapshot import snapshot_backup
+    now = datetime.now()
+    result, message, oid, files = snapshot_backup(repo=repo, ref=ref, when=now)
+    duration = time.perf_counter() - started
+    if result == 'ok':
+        record_backup(repo, now, oid=oid)
+        log_operation("backup", message, repo=repo, duration=duration, files=files)
+        after_backup(repo)
+    else:
+        log_operation("backup", message, success=result != 'error', repo=repo, duration=duration, files=files)
+    return result, message
+
+def backup_vault(repo=None, snapshot=None, ref=None):
+    """
+    Crea el commit de backup de un vault sin imprimir nada (apto para hilos).
+    Con `snapshot` (por defecto, el ajuste `backup_mode: snapshot`) o un `ref` de destino
+    usa el modo snapshot. Devuelve (resultado, mensaje) con resultado 'ok', 'clean' o 'error'.
+    """
+    from .attachments import prepare_backup
+    from .backup_index import record_backup
+    from .maintenance import after_backup
+    from .summary import summarize_staged, commit_message_with_summary
+    started = time.perf_counter()
+    prepare_backup(repo)
+    if snapshot is None: snapshot = get_setting('backup_mode') == 'snapshot'
+    if snapshot or ref: return _snapshot_backup_vault(repo, ref, started)
+    status = get_repo_status(repo)
+    if status is None:  # git fallo: un vault roto no puede contar como "al dia"
+        log_operation("backup", "No se pudo leer el estado de git", success=False, repo=repo, duration=time.perf_counter() - started)
+        return 'error', "No se pudo leer el estado de git"
+    changed = {path for key in ('staged', 'modified', 'untracked') for path in status['paths'][key]}
+    if not changed:
+        log_operation("backup", "No habia cambios para respaldar.", repo=repo, duration=time.perf_counter() - started, files=0)
+        return 'clean', "No habia cambios para respaldar."
+    stage_all_changes(repo)
+    summary = summarize_staged(repo)
+    files = summary['files'] if summary else count_staged_paths(repo)  # `changed` agrupa carpetas nuevas en una ruta
+    now = datetime.now()
+    commit_message = f"Backup vaultflow - {now.strftime('%Y-%m-%d %H:%M:%S')}"
+    if git_commit_util(commit_message_with_summary(commit_message, summary), repo):
+        record_backup(repo, now)
+        log_operation("backup", commit_message, repo=repo, duration=time.perf_counter() - started, files=files)
+        after_backup(repo)
+        return 'ok', commit_message
+    log_operation("backup", "Fallo al crear el backup (commit)", success=False, repo=repo, duration=time.perf_counter() - started)
+    return 'error', "Fallo al crear el backup (commit)"
+
+def prune_backups(dry_run=False, force=False):
+    """Compacta los backups antiguos segun la politica de retencion configurada."""
+    from .retention import prune_backups as prune_backup_history
+    if not validation_guard(): return
+    prune_backup_history(dry_run=dry_run, force=force)
+
+def maintain_repository(budget=None, show_history=False, quiet=False):
+    """Mantenimiento incremental del repositorio (pensado para cron)."""
+    from .maintenance import maintain_vault, show_maintenance_history
+    if not validation_guard(): return
+    if show_history:
+        show_maintenance_history()
+        return
+    maintain_vault(budget=budget, quiet=quiet)
+
+def export_bundle(directory):
+    """Sincronizacion sin red: exporta los commits nuevos a un directorio (p. ej. un USB)."""
+    from .bundles import export_to
+    if not validation_guard(): return
+    export_to(directory)
+
+def import_bundle(path):
+    """Importa bundles exportados en otra maquina y avanza las ramas (solo fast-forward)."""
+    from .bundles import import_from
+    if not validation_guard(): return
+    import_from(path)
+
+def create_local_backup(repo=None, snapshot=None, ref=None):
+    from .snapshot import snapshot_ref
+    if not validation_guard(repo): return
+    result, message = backup_vault(repo, snapshot=snapshot, ref=ref)
+    if result == 'clean':
+        click.secho("✓ ¡Tu vault ya esta al dia! No hay nada que respaldar.", fg="green")
+    elif result == 'ok':
         click.secho("\n✓ Backup local completado exitosamente.", fg="green")
-        log_operation("backup", commit_message)
-        show_status()
+        click.echo(f"  {message}" + (f" -> {snapshot_ref(ref)}" if ref else ""))  # Incluye si el snapshot no movio la rama
+        if ref: return
+        with profiling.span("show_status"):
+            show_status(repo)
     else:
-        click.secho("✗ Error al crear el backup.", fg="red")
-        log_operation("backup", "Fallo al crear el backup (commit)", success=False)
+        click.secho(f"✗ Error al crear el backup. {message}", fg="red")
 
-def push_changes_to_remote():
+def watch_changes(debounce, poll_interval, force_polling=False):
+    """Backups automaticos a partir de eventos del sistema de archivos."""
     if not validation_guard(): return
+    from .watch import watch_vault
+    log_operation("watch", f"Vigilancia iniciada (debounce {debounce:g}s).")
+    watch_vault(debounce=debounce, poll_interval=poll_interval, force_polling=force_polling)
+
+def push_changes_to_remote(repo=None, timeout=None):
+    from .targets import push_all_targets, push_with_retries, print_push_report
+    if not validation_guard(repo): return
+    if get_push_targets(repo):
+        click.echo("Sincronizando con todos los destinos de push...")
+        results = push_all_targets(repo, timeout=timeout)
+        print_push_report(results)
+        failed = sum(1 for r in results if not r['success'])
+        if failed: click.secho(f"✗ {failed} destino(s) con errores.", fg="red")
+        else: click.secho("✓ Push completado en todos los destinos.", fg="green")
+        return
     click.echo("Sincronizando con el repositorio remoto...")
-    success, message = push_changes()
+    success, message, _ = push_with_retries(lambda: push_changes(repo, timeout=timeout))
     if success:
         click.secho(f"✓ {message}", fg="green")
-        log_operation("push", message)
+        log_operation("push", message, repo=repo)
     else:
         click.secho(f"✗ Error durante la sincronizacion:\n{message}", fg="red")
-        log_operation("push", message, success=False)
+        log_operation("push", message, success=False, repo=repo)
+
+def manage_push_targets(action='list', name=None, url=None):
+    """Anade, elimina o lista los destinos de push adicionales del vault actual."""
+    from .targets import show_targets
+    if not validation_guard(): return
+    if action == 'add':
+        set_push_target(name, url)
+        click.secho(f"✓ Destino '{name}' configurado: {url}", fg="green")
+    elif action == 'remove':
+        if remove_push_target(name): click.secho(f"✓ Destino '{name}' eliminado.", fg="green")
+        else: click.secho(f"✗ No existe el destino '{name}'.", fg="red")
+    else:
+        show_targets()
 
-def start_experiment(name):
+def start_experiment(name, worktree=False):
+    """
+    Crea la rama `exp/<name>` desde 'main'. Con `worktree`, el experimento vive en su propio
+    directorio y el vault no cambia de rama: cambiar de contexto es cambiar de carpeta.
+    """
+    from .experiments import add_experiment_worktree
     if not validation_guard(): return
     
     # Verificar si ya estamos en un experimento (zona de seguridad)
@@ -126,6 +286,17 @@ def start_experiment(name):
         click.secho("  Por favor, usa un nombre sin espacios.", fg="yellow")
         return
     if branch_exists(exp_name): click.secho(f"✗ Error: El experimento '{exp_name}' ya existe.", fg="red"); return
+    if worktree:
+        success, result = add_experiment_worktree(name)
+        if not success:
+            click.secho(f"✗ Error al crear el worktree del experimento:\n  {result}", fg="red")
+            log_operation("start-experiment", f"Fallo al crear el worktree de '{exp_name}': {result}", success=False)
+            return
+        msg = f"Iniciado nuevo experimento en rama '{exp_name}' con worktree en {result}."
+        click.secho(f"\n✓ ¡Exito! {msg}", fg="green")
+        click.secho(f"  Abre esa carpeta como vault en Obsidian; tu vault sigue en '{get_current_branch()}'.", fg="cyan")
+        log_operation("start-experiment", msg)
+        return
     success, msg = checkout_branch('main')
     if not success:
         click.secho(f"✗ Error al cambiar a 'main':\n  Git dice: {msg}", fg="red"); return
@@ -139,35 +310,89 @@ def start_experiment(name):
         log_operation("start-experiment", f"Fallo al crear la rama '{exp_name}'", success=False)
 
 def finish_experiment(name):
+    from .experiments import find_experiment_worktree
     if not validation_guard(): return
     exp_name = f"exp/{name}"
     if not branch_exists(exp_name):
         click.secho(f"✗ Error: El experimento '{exp_name}' no existe.", fg="red"); return
-    success, msg = checkout_branch('main')
-    if not success:
-        click.secho(f"✗ Error al cambiar a 'main'.\n  Git dice: {msg}", fg="red"); return
-    status_code, merge_msg = merge_branch(exp_name)
+    worktree = find_experiment_worktree(exp_name)
+    if worktree and not worktree['prunable']:
+        # Lo editado en el worktree se respalda antes de fusionar, para no dejar nada fuera
+        result, message = backup_vault(worktree['path'])
+        if result == 'error':
+            click.secho(f"✗ No se pudo respaldar el worktree del experimento: {message}", fg="red"); return
+        if result == 'ok': click.secho(f"✓ Cambios del experimento respaldados: {message}", fg="green")
+    status_code, merge_msg, conflicts = merge_without_checkout(exp_name, 'main')
     if status_code == 0:
         click.secho(f"✓ {merge_msg}", fg="green")
         log_operation("finish-experiment", f"Fusion de '{exp_name}' en 'main' exitosa.")
-        if click.confirm(f"¿Quieres borrar la rama de experimento '{exp_name}'?"):
-            if delete_branch(exp_name):
+        if worktree:
+            _cleanup_experiment(exp_name, worktree, force=True)
+        elif get_current_branch() == exp_name:
+            # La fusion no toca los archivos: el cambio a 'main' queda en manos del usuario
+            click.secho(f"  Sigues en '{exp_name}'. Cambia a 'main' con 'git checkout main' cuando quieras.", fg="cyan")
+        elif click.confirm(f"¿Quieres borrar la rama de experimento '{exp_name}'?"):
+            if delete_branch_ref(exp_name):
                 click.secho("✓ Rama de experimento borrada.", fg="green")
                 log_operation("finish-experiment", f"Rama '{exp_name}' borrada.")
     elif status_code == 1:
         click.secho(f"✗ {merge_msg}", fg="yellow")
-        log_operation("finish-experiment", f"Conflicto de fusion al intentar finalizar '{exp_name}'.", success=False)
+        for path in conflicts:
+            click.secho(f"  - {path}", fg="yellow")
+        log_operation("finish-experiment", f"Conflicto de fusion al intentar finalizar '{exp_name}' ({len(conflicts)} archivo(s)).", success=False)
     else:
         click.secho(f"✗ {merge_msg}", fg="red")
         log_operation("finish-experiment", f"Error de fusion al intentar finalizar '{exp_name}': {merge_msg}", success=False)
 
-def show_status():
+def _cleanup_experiment(exp_name, worktree, force=False):
+    """Quita el worktree del experimento (si lo tiene) y borra su rama."""
+    from .experiments import remove_experiment_worktree
+    if worktree:
+        success, msg = remove_experiment_worktree(worktree['path'], force=force)
+        if not success:
+            click.secho(f"✗ No se pudo eliminar el worktree {worktree['path']}:\n  {msg}", fg="red")
+            return False
+        click.secho(f"✓ Worktree {worktree['path']} eliminado.", fg="green")
+    if not delete_branch_ref(exp_name):
+        click.secho(f"✗ No se pudo borrar la rama '{exp_name}'.", fg="red")
+        return False
+    click.secho("✓ Rama de experimento borrada.", fg="green")
+    log_operation("finish-experiment", f"Experimento '{exp_name}' limpiado.")
+    return True
+
+def abandon_experiment(name, force=False):
+    """Descarta un experimento sin fusionarlo: elimina su worktree y su rama."""
+    from .experiments import find_experiment_worktree
     if not validation_guard(): return
+    exp_name = f"exp/{name}"
+    if not branch_exists(exp_name):
+        click.secho(f"✗ Error: El experimento '{exp_name}' no existe.", fg="red"); return
+    if get_current_branch() == exp_name:
+        click.secho(f"✗ Estas en '{exp_name}'. Cambia a 'main' con 'git checkout main' antes de descartarlo.", fg="red"); return
+    worktree = find_experiment_worktree(exp_name)
+    if not force and not is_ancestor(exp_name, 'main'):
+        if not click.confirm(f"'{exp_name}' tiene cambios que no estan en 'main'. ¿Descartarlo igualmente?"): return
+        force = True
+    if _cleanup_experiment(exp_name, worktree, force=force):
+        log_operation("abandon-experiment", f"Experimento '{exp_name}' descartado.")
+
+def list_experiments():
+    """Lista los experimentos activos con su worktree, tamano y antiguedad."""
+    from .experiments import show_experiments
+    if not validation_guard(): return
+    show_experiments()
+
+def show_status(repo=None):
+    from rich.console import Console
+    from rich.panel import Panel
+    from .report import collect_status
+    if not validation_guard(repo): return
     console = Console()
     
     # Obtener información del vault actual
-    vault_info = get_current_vault_info()
-    managed_vaults = get_managed_vaults()
+    status = collect_status(repo)
+    vault_info, repo_status = status['vault'], status['git']
+    last_commit, backups = status['last_commit'], status['backups']
     
     # Sección de información del vault
     vault_section = f"[bold blue]Vault actual:[/] [cyan]{vault_info['name']}[/]\n"
@@ -177,11 +402,13 @@ def show_status():
         vault_section += "[dim]Usa 'vaultflow vaults' para ver todos o cambiar de vault[/]\n"
     
     # Sección de Git
-    git_section = f"\n[bold]Rama actual:[/] [cyan]{get_current_branch()}[/]\n"
-    git_section += f"[bold]Ultimo backup:[/] [cyan]{get_last_commit()}[/]\n"
+    git_section = f"\n[bold]Rama actual:[/] [cyan]{repo_status.get('branch')}[/]\n"
+    if repo_status.get('upstream'):
+        git_section += (f"[bold]Rama remota:[/] [cyan]{repo_status['upstream']}[/] "
+                        f"([green]{repo_status['ahead']} por enviar[/], [yellow]{repo_status['behind']} por recibir[/])\n")
+    git_section += f"[bold]Ultimo backup:[/] [cyan]{last_commit}[/]\n"
     
     # Sección de backups recientes
-    backups = get_backup_commits(5)
     if backups:
         git_section += "\n[bold green]Backups recientes:[/]\n"
         for i, backup in enumerate(backups):
@@ -191,8 +418,8 @@ def show_status():
     
     # Sección de estado de cambios
     status_section = ""
-    structured_status = get_structured_git_status()
-    if structured_status:
+    structured_status = {key: repo_status.get(key) for key in ('staged', 'modified', 'untracked')}
+    if any(structured_status.values()):
         status_section += "\n"
         if structured_status.get('staged'):
             status_section += "[bold]Cambios listos (staged):[/]\n"
@@ -225,55 +452,78 @@ def stage_changes():
     else: click.secho("✗ Error al ejecutar 'git add'.", fg="red")
 
 def commit_changes():
+    from .backup_index import record_backup
     if not validation_guard(): return
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    commit_message = f"Backup vaultflow - {timestamp}"
+    now = datetime.now()
+    commit_message = f"Backup vaultflow - {now.strftime('%Y-%m-%d %H:%M:%S')}"
     if git_commit_util(commit_message):
+        record_backup(when=now)
         click.secho("✓ Backup local creado exitosamente.", fg="green")
         show_status()
     else:
         click.secho("✗ Error al crear el backup. Posible causa: No hay cambios preparados.", fg="red")
 
-def show_logs():
+def show_logs(limit=None, since=None, command=None, failed=False):
+    from rich.console import Console
     if not validation_guard(): return
-    log_file = get_log_file_path()
-    if not os.path.exists(log_file):
+    if not has_log_history():
         click.secho("No se ha encontrado ningun historial de operaciones.", fg="yellow"); return
-    with open(log_file, 'r', encoding='utf-8') as f:
-        logs = json.load(f)
     console = Console()
     console.print("[bold magenta]Historial de Operaciones de vaultflow[/]")
     console.print("[magenta]" + "-" * 60 + "[/magenta]")
-    for entry in logs:
+    for entry in iter_log_entries(limit=limit, since=since, command=command, failed=failed):
         status = "[green]✓ EXITO[/green]" if entry["success"] else "[red]✗ FALLO[/red]"
         ts = datetime.fromisoformat(entry["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
         console.print(f"[{ts}] - {status} - [bold]{entry['command']}[/bold]: {entry['message']}")
 
-def show_backups():
-    """Muestra los backups disponibles con opciones interactivas."""
+def show_backups(page=1, per_page=15, since=None, until=None):
+    """Muestra los backups disponibles, paginados y opcionalmente filtrados por fecha."""
+    from rich.console import Console
+    from .summary import describe_summary
     if not validation_guard(): return
     
     console = Console()
-    backups = get_backup_commits(15)  # Obtener más backups para la vista detallada
+    if until and until.time() == datetime.min.time():
+        until = until.replace(hour=23, minute=59, second=59)  # --until con solo fecha incluye todo ese dia
+    total = count_backup_commits(since=since, until=until)
+    backups = get_backup_commits(per_page, page=page, since=since, until=until)
     
     if not backups:
-        console.print("[yellow]No se encontraron backups de vaultflow en este vault.[/yellow]")
+        if total and page > 1:
+            console.print(f"[yellow]La pagina {page} esta vacia: solo hay {total} backup(s).[/yellow]")
+        else:
+            console.print("[yellow]No se encontraron backups de vaultflow en este vault.[/yellow]")
         return
     
-    console.print("[bold magenta]Backups Disponibles[/bold magenta]")
+    pages = (total + per_page - 1) // per_page
+    console.print(f"[bold magenta]Backups Disponibles[/bold magenta] [dim](pagina {page} de {pages}, {total} en total)[/dim]")
     console.print("[magenta]" + "=" * 60 + "[/magenta]")
     
     for i, backup in enumerate(backups):
-        status_indicator = "[green]● ACTUAL[/green]" if i == 0 else "[dim]○[/dim]"
+        status_indicator = "[green]● ACTUAL[/green]" if i == 0 and page == 1 and not until else "[dim]○[/dim]"
         console.print(f"{status_indicator} [cyan]{backup['hash']}[/cyan] - [yellow]{backup['date']}[/yellow]")
         console.print(f"    [dim]{backup['message']}[/dim]")
+        if backup['summary']:
+            console.print(f"    [dim]{describe_summary(backup['summary'])}[/dim]")
         console.print()
     
-    console.print("[dim]Para navegar a un backup específico, usa: git checkout <hash>[/dim]")
-    console.print("[dim]Para volver al estado más reciente, usa: git checkout main[/dim]")
+    if page < pages:
+        console.print(f"[dim]Para ver mas backups, usa: vaultflow backups --page {page + 1}[/dim]")
+    console.print("[dim]Para recuperar notas de un backup, usa: vaultflow restore <hash> <ruta o glob>[/dim]")
+    console.print("[dim]Para recuperarlas en otra carpeta sin tocar el vault, añade: --to <carpeta>[/dim]")
+
+def restore_backup(backup, paths=(), destination=None):
+    """Recupera archivos de un backup sin hacer checkout (HEAD y el resto del vault no cambian)."""
+    from .restore import restore_from_backup
+    if not validation_guard(): return
+    if not paths and not destination and not click.confirm(
+            "Sin rutas se restauran todos los archivos del backup sobre el vault. ¿Continuar?"):
+        return
+    restore_from_backup(backup, list(paths), destination)
 
 def show_vaults():
     """Muestra todos los vaults gestionados con opción de cambiar."""
+    from rich.console import Console
     console = Console()
     managed_vaults = get_managed_vaults()
     current_vault = get_current_vault_info()
@@ -305,6 +555,7 @@ def show_vaults():
 
 def discover_vaults():
     """Auto-descubre y registra vaults gestionados por vaultflow."""
+    from rich.console import Console
     console = Console()
     
     console.print("[yellow]🔍 Buscando vaults gestionados por vaultflow...[/yellow]")
@@ -332,17 +583,7 @@ def discover_vaults():
         else:
             console.print("[yellow]⚠ No se encontraron vaults gestionados por vaultflow en ubicaciones comunes.[/yellow]")
             console.print("\n[dim]Ubicaciones buscadas:[/dim]")
-            home = os.path.expanduser("~")
-            locations = [
-                os.path.join(home, "Documents"),
-                os.path.join(home, "Obsidian.Vaults"),
-                os.path.join(home, "vaults"),
-                "C:\\Obsidian.Vaults",
-                "/Users/Shared/Obsidian.Vaults",
-                "/home/obsidian",
-                home
-            ]
-            for location in locations:
+            for location in default_search_paths():
                 exists = "✓" if os.path.exists(location) else "✗"
                 console.print(f"  [dim]{exists} {location}[/dim]")
             
@@ -1,55 +1,176 @@
 import os
 import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from . import profiling
+from .filelock import file_lock
+from .git_refs import open_refs
+from .backup_index import BACKUP_REF_PREFIX
 
 CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".vaultflow")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
+CONFIG_LOCK_FILE = CONFIG_FILE + ".lock"
+DISCOVERY_CACHE_FILE = os.path.join(CONFIG_DIR, "discovery_cache.json")
+
+# Directorios que nunca contienen vaults y que hacen muy lento el escaneo
+DISCOVERY_PRUNE_DIRS = frozenset({
+    'node_modules', '.cache', 'venv', '.venv', '__pycache__', '.git', '.obsidian', '.Trash',
+    '.local', '.npm', '.cargo', '.rustup', '.gradle', '.m2', '.tox', 'site-packages',
+    'Library', 'AppData', '$RECYCLE.BIN',
+})
+DISCOVERY_MAX_DEPTH = 2 # Se examinan la base y hasta dos niveles por debajo
+DISCOVERY_WORKERS = 16
+
+# Cache en proceso: se reutiliza mientras el archivo no cambie (mtime, tamano e inodo)
+_cache = {"key": None, "config": None, "vault_index": frozenset()}
+
+def normalize_vault_path(path):
+    """Normaliza la ruta de un vault para compararla (absoluta y sin distinguir mayusculas en Windows)."""
+    return os.path.normcase(os.path.abspath(path))
 
 def _ensure_config_exists():
     os.makedirs(CONFIG_DIR, exist_ok=True)
     if not os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump({"managed_vaults": []}, f, indent=4)
+        with file_lock(CONFIG_LOCK_FILE):
+            if not os.path.exists(CONFIG_FILE):
+                _save_config({"managed_vaults": []})
 
-def _load_config():
-    _ensure_config_exists()
+def _config_key():
+    st = os.stat(CONFIG_FILE)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _read_config_file():
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
+        with profiling.span("config read", CONFIG_FILE) as span, open(CONFIG_FILE, 'r') as f:
+            data = f.read()
+            if span is not None: span['bytes'] = len(data)
+            return json.loads(data)
     except json.JSONDecodeError:
         return {"managed_vaults": []} # Si el archivo está corrupto, empezamos de cero
 
+def _remember(key, config):
+    _cache["key"] = key
+    _cache["config"] = config
+    _cache["vault_index"] = frozenset(normalize_vault_path(p) for p in config.get("managed_vaults", []))
+
+def _load_config():
+    """Devuelve la configuracion (solo lectura); usa la cache si el archivo no ha cambiado."""
+    try:
+        key = _config_key()
+    except FileNotFoundError:
+        _ensure_config_exists()
+        key = _config_key()
+    if _cache["key"] != key:
+        _remember(key, _read_config_file())
+    return _cache["config"]
+
 def _save_config(config_data):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config_data, f, indent=4)
+    """Escritura atomica: archivo temporal en el mismo directorio y rename."""
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CONFIG_DIR, prefix=".config-", suffix=".tmp")
+    try:
+        with profiling.span("config write", CONFIG_FILE) as span, os.fdopen(fd, 'w') as f:
+            data = json.dumps(config_data, indent=4)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            if span is not None: span['bytes'] = len(data)
+        os.replace(tmp_path, CONFIG_FILE)
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+    _remember(_config_key(), config_data)
+
+def _update_config(mutate):
+    """
+    Lee, modifica y guarda la configuracion bajo un bloqueo consultivo, para que varias
+    ejecuciones en paralelo (p. ej. desde cron) no se pisen. `mutate` devuelve True si cambio algo.
+    """
+    _ensure_config_exists()
+    with file_lock(CONFIG_LOCK_FILE):
+        config = _read_config_file()
+        changed = mutate(config)
+        if changed: _save_config(config)
+        else: _remember(_config_key(), config)
+    return config
 
 def register_vault(vault_path):
-    config = _load_config()
     abs_path = os.path.abspath(vault_path)
-    if abs_path not in config["managed_vaults"]:
-        config["managed_vaults"].append(abs_path)
-        _save_config(config)
+    def add_vault(config):
+        vaults = config.setdefault("managed_vaults", [])
+        if normalize_vault_path(abs_path) in {normalize_vault_path(p) for p in vaults}: return False
+        vaults.append(abs_path)
+        return True
+    _update_config(add_vault)
     return True
 
+def unregister_vault(vault_path):
+    """Quita un vault de la configuracion. Devuelve False si no estaba registrado."""
+    key = normalize_vault_path(os.path.abspath(vault_path))
+    def remove_vault(config):
+        vaults = config.get("managed_vaults", [])
+        kept = [p for p in vaults if normalize_vault_path(p) != key]
+        if len(kept) == len(vaults): return False
+        config["managed_vaults"] = kept
+        return True
+    config = _update_config(remove_vault)
+    return key not in {normalize_vault_path(p) for p in config.get("managed_vaults", [])}
+
+def get_setting(key, default=None):
+    """Devuelve un ajuste global de ~/.vaultflow/config.json (o `default` si no esta definido)."""
+    return _load_config().get(key, default)
+
+def get_push_targets(path=None):
+    """Destinos de push adicionales del vault: {nombre: url o ruta}."""
+    key = normalize_vault_path(path or os.getcwd())
+    targets = _load_config().get("push_targets", {})
+    return dict(next((t for p, t in targets.items() if normalize_vault_path(p) == key), {}))
+
+def set_push_target(name, url, path=None):
+    """Anade o reemplaza un destino de push del vault."""
+    abs_path = os.path.abspath(path or os.getcwd())
+    def add_target(config):
+        targets = config.setdefault("push_targets", {})
+        key = next((p for p in targets if normalize_vault_path(p) == normalize_vault_path(abs_path)), abs_path)
+        if targets.get(key, {}).get(name) == url: return False
+        targets.setdefault(key, {})[name] = url
+        return True
+    _update_config(add_target)
+
+def remove_push_target(name, path=None):
+    """Elimina un destino de push. Devuelve False si no existia."""
+    abs_path = os.path.abspath(path or os.getcwd())
+    removed = []
+    def drop_target(config):
+        for key, targets in config.get("push_targets", {}).items():
+            if normalize_vault_path(key) == normalize_vault_path(abs_path) and name in targets:
+                del targets[name]
+                removed.append(name)
+                return True
+        return False
+    _update_config(drop_target)
+    return bool(removed)
+
 def get_managed_vaults():
     """Devuelve la lista de rutas de los vaults gestionados."""
     config = _load_config()
-    return config.get("managed_vaults", [])
+    return list(config.get("managed_vaults", []))
 
-def is_managed_vault():
-    """Verifica si el directorio actual está registrado."""
-    current_path = os.path.abspath(os.getcwd())
-    return current_path in get_managed_vaults()
+def is_managed_vault(path=None):
+    """Verifica si el vault indicado (por defecto, el directorio actual) está registrado."""
+    _load_config()
+    return normalize_vault_path(path or os.getcwd()) in _cache["vault_index"]
 
-def get_current_vault_info():
-    """Obtiene información del vault actual."""
-    current_path = os.path.abspath(os.getcwd())
+def get_current_vault_info(path=None):
+    """Obtiene información del vault indicado (por defecto, el directorio actual)."""
+    current_path = os.path.abspath(path or os.getcwd())
     vault_name = os.path.basename(current_path)
     managed_vaults = get_managed_vaults()
     
     return {
         'name': vault_name,
         'path': current_path,
-        'is_managed': current_path in managed_vaults,
+        'is_managed': normalize_vault_path(current_path) in _cache["vault_index"],
         'total_managed_vaults': len(managed_vaults)
     }
 
@@ -57,8 +178,11 @@ def get_vault_name_from_path(path):
     """Extrae el nombre del vault desde su ruta."""
     return os.path.basename(path)
 
-def is_vaultflow_repository(path):
-    """Verifica si un directorio es un repositorio gestionado por vaultflow."""
+def is_vaultflow_repository(path, allow_git=True):
+    """
+    Verifica si un directorio es un repositorio gestionado por vaultflow. Primero mira el
+    disco (.gitignore y refs); solo si `allow_git` lanza `git log` como ultimo recurso.
+    """
     try:
         # Verificar si tiene Git
         git_dir = os.path.join(path, '.git')
@@ -72,87 +196,192 @@ def is_vaultflow_repository(path):
                 content = f.read()
                 if "# === Bloque gestionado por vaultflow ===" in content:
                     return True
+
+        # Verificar si tiene las ramas que crea 'vaultflow init'
+        refs = open_refs(path)
+        if refs:
+            try:
+                if refs.resolve('refs/heads/main') and refs.resolve('refs/heads/experiment'):
+                    return True
+                if refs.list_refs(BACKUP_REF_PREFIX):  # Indice de backups de vaultflow
+                    return True
+            except (OSError, ValueError):
+                pass
+        if not allow_git:
+            return False
         
         # Verificar si tiene commits con patron de vaultflow
-        import subprocess
-        result = subprocess.run(
-            ['git', 'log', '--grep=Backup vaultflow', '--oneline', '-1'],
-            cwd=path,
-            capture_output=True,
-            text=True
-        )
-        return result.returncode == 0 and bool(result.stdout.strip())
+        return _has_backup_commits(path)
         
     except Exception:
         return False
 
+def _has_backup_commits(path):
+    """Ultimo recurso: el repositorio tiene algun commit de backup de vaultflow (lanza `git log`)."""
+    import subprocess
+    argv = ['git', 'log', '--grep=Backup vaultflow', '--oneline', '-1']
+    with profiling.span("git log", argv):
+        result = subprocess.run(argv, cwd=path, capture_output=True, text=True)
+    return result.returncode == 0 and bool(result.stdout.strip())
+
+def _cached_backup_commits(path, entry):
+    """
+    `_has_backup_commits` para el escaneo, guardado en la entrada de la cache junto al mtime de
+    .git: cada commit o checkout lo cambia, asi que `git log` solo se repite si el repositorio se movio.
+    """
+    try:
+        git_mtime_ns = os.stat(os.path.join(path, '.git')).st_mtime_ns
+    except OSError:
+        return False
+    cached = entry.get("git_check")
+    if cached and cached[0] == git_mtime_ns: return cached[1]
+    try:
+        found = _has_backup_commits(path)
+    except OSError:
+        found = False
+    entry["git_check"] = [git_mtime_ns, found]
+    return found
+
+def default_search_paths():
+    """Ubicaciones comunes donde se buscan vaults."""
+    home = os.path.expanduser("~")
+    return [
+        os.path.join(home, "Documents"),
+        os.path.join(home, "Obsidian.Vaults"),  # Obsidian default user home
+        os.path.join(home, "vaults"),
+        "C:\\Obsidian.Vaults",  # Obsidian default Windows global
+        "/Users/Shared/Obsidian.Vaults",  # macOS shared
+        "/home/obsidian",  # Linux common
+        home  # Home directory itself
+    ]
+
+def _load_discovery_cache():
+    try:
+        with profiling.span("discovery cache read", DISCOVERY_CACHE_FILE), open(DISCOVERY_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache.get("dirs", {}) if cache.get("version") == 1 else {}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def _save_discovery_cache(dirs):
+    try:
+        os.makedirs(CONFIG_DIR, exist_ok=True)
+        tmp_path = f"{DISCOVERY_CACHE_FILE}.{os.getpid()}.tmp"
+        with profiling.span("discovery cache write", DISCOVERY_CACHE_FILE), open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "dirs": dirs}, f)
+        os.replace(tmp_path, DISCOVERY_CACHE_FILE)
+    except OSError:
+        pass # La cache es opcional
+
+def _scan_directory(path, cached):
+    """
+    Lista los subdirectorios de `path` con os.scandir. Si el mtime del directorio coincide
+    con la cache, reutiliza el listado anterior sin volver a leerlo.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, False
+    if cached and cached.get("mtime_ns") == mtime_ns:
+        entry = cached
+    else:
+        subdirs, has_git = [], False
+        try:
+            with os.scandir(path) as it:
+                for item in it:
+                    if item.name == '.git':
+                        has_git = True
+                    elif item.name not in DISCOVERY_PRUNE_DIRS and item.is_dir(follow_symlinks=False):
+                        subdirs.append(item.name)
+        except OSError:
+            pass # Sin permisos u otro error: se trata como vacio
+        entry = {"mtime_ns": mtime_ns, "subdirs": subdirs, "has_git": has_git}
+        if cached and "git_check" in cached: entry["git_check"] = cached["git_check"]
+    # Primero las comprobaciones en disco (cabecera y refs); `git log` solo para los que no pasan
+    is_vault = entry["has_git"] and (is_vaultflow_repository(path, allow_git=False) or _cached_backup_commits(path, entry))
+    return entry, is_vault
+
 def scan_for_vaultflow_repos(search_paths=None):
-    """Escanea directorios comunes buscando repositorios de vaultflow."""
+    """
+    Escanea directorios comunes buscando repositorios de vaultflow, nivel a nivel y en
+    paralelo. Los directorios sin cambios (mismo mtime) se resuelven desde la cache.
+    """
     if search_paths is None:
-        home = os.path.expanduser("~")
-        search_paths = [
-            os.path.join(home, "Documents"),
-            os.path.join(home, "Obsidian.Vaults"),  # Obsidian default user home
-            os.path.join(home, "vaults"),
-            "C:\\Obsidian.Vaults",  # Obsidian default Windows global
-            "/Users/Shared/Obsidian.Vaults",  # macOS shared
-            "/home/obsidian",  # Linux common
-            home  # Home directory itself
-        ]
+        search_paths = default_search_paths()
     
+    cache = _load_discovery_cache()
+    new_cache = {}
     found_vaults = []
-    
+    visited = set()
+    level = []
     for base_path in search_paths:
-        if not os.path.exists(base_path):
-            continue
-            
-        # Buscar hasta 3 niveles de profundidad
-        for root, dirs, files in os.walk(base_path):
-            # Limitar profundidad para evitar escaneos muy lentos
-            depth = root[len(base_path):].count(os.sep)
-            if depth > 2:
-                dirs[:] = []  # No buscar mas profundo
-                continue
-                
-            if is_vaultflow_repository(root):
-                found_vaults.append(os.path.abspath(root))
-                dirs[:] = []  # No buscar dentro de vaults encontrados
+        if os.path.isdir(base_path):
+            level.append(os.path.abspath(base_path))
+    
+    depth = 0
+    with ThreadPoolExecutor(max_workers=DISCOVERY_WORKERS) as executor:
+        while level:
+            # Un mismo directorio puede alcanzarse desde varias bases (p. ej. ~ y ~/Documents)
+            pending = []
+            for path in level:
+                key = normalize_vault_path(path)
+                if key not in visited:
+                    visited.add(key)
+                    pending.append(path)
+            level = pending
+            results = executor.map(lambda p: _scan_directory(p, cache.get(p)), level)
+            next_level = []
+            for path, (entry, is_vault) in zip(level, results):
+                if entry is None: continue
+                new_cache[path] = entry
+                if is_vault:
+                    found_vaults.append(path)  # No buscar dentro de vaults encontrados
+                elif depth < DISCOVERY_MAX_DEPTH:
+                    next_level.extend(os.path.join(path, name) for name in entry["subdirs"])
+            level = next_level
+            depth += 1
     
+    _save_discovery_cache(new_cache)
     return found_vaults
 
 def cleanup_invalid_vaults():
     """Limpia vaults que ya no existen del archivo de configuración."""
-    config = _load_config()
-    managed_vaults = config.get("managed_vaults", [])
-    
-    # Filtrar vaults que aún existen
-    valid_vaults = []
-    for vault_path in managed_vaults:
-        if os.path.exists(vault_path) and is_vaultflow_repository(vault_path):
-            valid_vaults.append(vault_path)
-    
-    # Actualizar configuración si hay cambios
-    if len(valid_vaults) != len(managed_vaults):
+    # La validacion se hace en paralelo y fuera del bloqueo: puede tocar el disco de cada vault
+    managed_vaults = get_managed_vaults()
+    with ThreadPoolExecutor(max_workers=DISCOVERY_WORKERS) as executor:
+        validity = list(executor.map(lambda p: os.path.exists(p) and is_vaultflow_repository(p), managed_vaults))
+    invalid = {normalize_vault_path(p) for p, valid in zip(managed_vaults, validity) if not valid}
+    if not invalid: return 0
+    removed = []
+    def drop_invalid(config):
+        managed_vaults = config.get("managed_vaults", [])
+        valid_vaults = [p for p in managed_vaults if normalize_vault_path(p) not in invalid]
+        removed.append(len(managed_vaults) - len(valid_vaults))
         config["managed_vaults"] = valid_vaults
-        _save_config(config)
-        
-    return len(managed_vaults) - len(valid_vaults)  # Cantidad eliminada
+        return removed[0] > 0
+    _update_config(drop_invalid)
+    return removed[0]  # Cantidad eliminada
 
 def auto_discover_and_register_vaults():
     """Auto-descubre vaults y los registra automáticamente."""
     # Limpiar vaults inválidos primero
     cleanup_invalid_vaults()
     
-    # Obtener vaults actualmente registrados
-    current_vaults = set(get_managed_vaults())
-    
     # Escanear por nuevos vaults
     discovered_vaults = scan_for_vaultflow_repos()
     new_vaults = []
     
-    for vault_path in discovered_vaults:
-        if vault_path not in current_vaults:
-            register_vault(vault_path)
-            new_vaults.append(vault_path)
+    # Registrar todos los nuevos de una vez (una sola escritura de la configuración)
+    def add_new_vaults(config):
+        vaults = config.setdefault("managed_vaults", [])
+        current_vaults = {normalize_vault_path(p) for p in vaults}
+        for vault_path in discovered_vaults:
+            if normalize_vault_path(vault_path) not in current_vaults:
+                vaults.append(vault_path)
+                current_vaults.add(normalize_vault_path(vault_path))
+                new_vaults.append(vault_path)
+        return bool(new_vaults)
+    if discovered_vaults:
+        _update_config(add_new_vaults)
     
     return new_vaults
@@ -0,0 +1,140 @@
+import os
+import time
+import click
+from .config import get_setting, register_vault, unregister_vault
+from .git_refs import find_git_dir, open_refs
+from .git_session import get_session
+from .utils import human_size
+
+EXPERIMENT_PREFIX = 'exp/'
+
+def experiment_worktree_path(name, repo=None):
+    """
+    Directorio del worktree de un experimento: junto al vault (nunca dentro, para que Obsidian
+    no lo indexe), en `<vault>.experiments/<nombre>` o bajo `experiments_dir` si esta configurado.
+    """
+    vault = os.path.abspath(repo or os.getcwd())
+    base = get_setting('experiments_dir') or os.path.join(os.path.dirname(vault), f"{os.path.basename(vault)}.experiments")
+    return os.path.join(os.path.expanduser(base), name)
+
+def list_worktrees(repo=None):
+    """[{path, head, branch, locked, prunable}] segun `git worktree list --porcelain -z`."""
+    result = get_session(repo).run(['worktree', 'list', '--porcelain', '-z'], check=False)
+    worktrees, current = [], None
+    for field in result.stdout.split(b'\0'):
+        if not field:
+            current = None
+            continue
+        key, _, value = os.fsdecode(field).partition(' ')
+        if key == 'worktree':
+            current = {'path': value, 'head': None, 'branch': None, 'locked': False, 'prunable': False}
+            worktrees.append(current)
+        elif current is not None:
+            if key == 'HEAD': current['head'] = value
+            elif key == 'branch': current['branch'] = value[len('refs/heads/'):] if value.startswith('refs/heads/') else value
+            elif key in ('locked', 'prunable'): current[key] = True
+    return worktrees
+
+def _directory_size(path):
+    total, stack = 0, [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.name == '.git': continue
+                    if entry.is_dir(follow_symlinks=False): stack.append(entry.path)
+                    else:
+                        try: total += entry.stat(follow_symlinks=False).st_size
+                        except OSError: pass
+        except OSError:
+            continue
+    return total
+
+def _worktree_created_at(path):
+    """Fecha de creacion del worktree: el archivo `commondir` de su directorio de administracion no cambia."""
+    try:
+        found = find_git_dir(path)
+        return os.stat(os.path.join(found[0], 'commondir')).st_mtime if found else None
+    except OSError:
+        return None
+
+def list_experiments(repo=None):
+    """Experimentos activos (ramas exp/*), con su worktree si lo tienen, tamano y antiguedad."""
+    reader = open_refs(repo)
+    if reader:
+        branches = {name[len('refs/heads/'):]: oid for name, oid in reader.list_refs(f'refs/heads/{EXPERIMENT_PREFIX}').items()}
+    else:
+        branches = {name[len('refs/heads/'):]: oid for name, (oid, _) in get_session(repo).refs()[0].items()
+                    if name.startswith(f'refs/heads/{EXPERIMENT_PREFIX}')}
+    worktrees = {wt['branch']: wt for wt in list_worktrees(repo) if wt['branch'] in branches}
+    now = time.time()
+    experiments = []
+    for branch in sorted(branches):
+        wt = worktrees.get(branch)
+        created = _worktree_created_at(wt['path']) if wt and not wt['prunable'] else None
+        experiments.append({
+            'name': branch[len(EXPERIMENT_PREFIX):],
+            'branch': branch,
+            'oid': branches[branch],
+            'worktree': wt['path'] if wt else None,
+            'missing': bool(wt and wt['prunable']),
+            'size': _directory_size(wt['path']) if wt and not wt['prunable'] else None,
+            'age': now - created if created else None,
+        })
+    return experiments
+
+def find_experiment_worktree(branch, repo=None):
+    return next((wt for wt in list_worktrees(repo) if wt['branch'] == branch), None)
+
+def add_experiment_worktree(name, base='main', repo=None):
+    """Crea `exp/<name>` desde `base` en su propio worktree, sin tocar los archivos del vault."""
+    path = experiment_worktree_path(name, repo)
+    if os.path.exists(path): return False, f"Ya existe el directorio {path}."
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    result = get_session(repo).run(['worktree', 'add', '-q', '-b', f'{EXPERIMENT_PREFIX}{name}', path, base],
+                                   check=False, text=True, invalidates=True)
+    if result.returncode != 0: return False, result.stderr.strip()
+    register_vault(path)  # Para que los comandos de vaultflow funcionen dentro del experimento
+    return True, path
+
+def remove_experiment_worktree(path, force=False, repo=None):
+    """Elimina el worktree de un experimento y lo quita de los vaults gestionados."""
+    args = ['worktree', 'remove', path] + (['--force'] if force else [])
+    result = get_session(repo).run(args, check=False, text=True, invalidates=True)
+    if result.returncode != 0: return False, result.stderr.strip()
+    unregister_vault(path)
+    parent = os.path.dirname(path)
+    try: os.rmdir(parent)  # Solo si era el ultimo experimento
+    except OSError: pass
+    return True, "Worktree eliminado."
+
+def _human_age(seconds):
+    if seconds < 3600: return f"{int(seconds // 60)} min"
+    if seconds < 86400: return f"{int(seconds // 3600)} h"
+    return f"{int(seconds // 86400)} d"
+
+def show_experiments(repo=None):
+    """Tabla con los experimentos activos y, si tienen worktree, su ubicacion, tamano y antiguedad."""
+    from rich.console import Console
+    from rich.table import Table
+
+    experiments = list_experiments(repo)
+    if not experiments:
+        click.secho("No hay experimentos activos. Empieza uno con 'vaultflow start-experiment'.", fg="yellow")
+        return
+    table = Table(title="Experimentos activos", title_style="bold magenta", border_style="magenta")
+    table.add_column("Experimento", style="cyan")
+    table.add_column("Commit", style="dim")
+    table.add_column("Worktree", overflow="fold")
+    table.add_column("Tamano", justify="right")
+    table.add_column("Antiguedad", justify="right")
+    for exp in experiments:
+        if exp['missing']: location = f"[red]{exp['worktree']} (no encontrado)[/red]"
+        else: location = exp['worktree'] or "[dim]en el vault (checkout)[/dim]"
+        table.add_row(
+            exp['name'], exp['oid'][:7], location,
+            human_size(exp['size']) if exp['size'] is not None else "-",
+            _human_age(exp['age']) if exp['age'] is not None else "-",
+        )
+    Console().print(table)
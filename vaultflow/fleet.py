@@ -0,0 +1,105 @@
+import os
+import time
+import click
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .config import get_managed_vaults, get_vault_name_from_path
+from .targets import push_all_targets
+
+FLEET_WORKERS = 4
+FLEET_PUSH_TIMEOUT = 120 # Segundos por vault: un remoto lento no bloquea al resto
+
+def _backup(vault_path, push_timeout):
+    from .commands import backup_vault
+    result, message = backup_vault(vault_path)
+    return result != 'error', "Sin cambios" if result == 'clean' else message
+
+def _status(vault_path, push_timeout):
+    from .report import collect_status
+    git = collect_status(vault_path, backups_limit=1)['git']
+    if not git: return False, "No se pudo leer el estado de git"
+    changes = sum(len(git[key]) for key in ('staged', 'modified', 'untracked'))
+    detail = f"{git['branch']}"
+    if git['upstream']: detail += f" ↑{git['ahead']} ↓{git['behind']}"
+    detail += f" · {changes} cambio(s) pendiente(s)" if changes else " · al dia"
+    return True, detail
+
+def _push(vault_path, push_timeout):
+    results = push_all_targets(vault_path, timeout=push_timeout)
+    if len(results) == 1:
+        message = results[0]['detail'].strip()
+        return results[0]['success'], message.splitlines()[0] if message else message
+    detail = ", ".join(f"{r['target']} {'✓' if r['success'] else '✗'}" for r in results)
+    return all(r['success'] for r in results), detail
+
+FLEET_ACTIONS = {'backup': _backup, 'status': _status, 'push': _push}
+
+def _run_one(action, vault_path, push_timeout):
+    started = time.monotonic()
+    try:
+        if not os.path.isdir(vault_path):
+            success, detail = False, "El directorio del vault no existe"
+        else:
+            success, detail = FLEET_ACTIONS[action](vault_path, push_timeout)
+    except Exception as e:
+        success, detail = False, f"Error inesperado: {e}"
+    return {
+        'vault': vault_path,
+        'success': success,
+        'detail': detail,
+        'duration': time.monotonic() - started,
+    }
+
+def run_on_all_vaults(action, workers=None, push_timeout=None):
+    """
+    Ejecuta `backup`, `status` o `push` en todos los vaults gestionados con un pool de hilos
+    acotado, mostrando el progreso de cada vault y una tabla resumen al final.
+    """
+    workers = workers or FLEET_WORKERS
+    push_timeout = push_timeout or FLEET_PUSH_TIMEOUT
+    vaults = get_managed_vaults()
+    if not vaults:
+        click.secho("No hay vaults gestionados por vaultflow.", fg="yellow")
+        return []
+
+    click.echo(f"Ejecutando '{action}' en {len(vaults)} vault(s) ({min(workers, len(vaults))} en paralelo)...")
+    started = time.monotonic()
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_one, action, vault, push_timeout) for vault in vaults]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            mark, color = ("✓", "green") if result['success'] else ("✗", "red")
+            click.secho(
+                f"  [{done}/{len(vaults)}] {mark} {get_vault_name_from_path(result['vault'])} "
+                f"({result['duration']:.2f}s) - {result['detail']}", fg=color
+            )
+
+    order = {vault: i for i, vault in enumerate(vaults)}
+    results.sort(key=lambda r: order[r['vault']])
+    _print_summary(action, results, time.monotonic() - started)
+    return results
+
+def _print_summary(action, results, elapsed):
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title=f"Resumen de '{action}' en todos los vaults", title_style="bold magenta", border_style="magenta")
+    table.add_column("Vault", style="cyan")
+    table.add_column("Resultado")
+    table.add_column("Detalle", overflow="fold")
+    table.add_column("Tiempo", justify="right")
+    for result in results:
+        table.add_row(
+            get_vault_name_from_path(result['vault']),
+            "[green]✓ EXITO[/green]" if result['success'] else "[red]✗ FALLO[/red]",
+            result['detail'],
+            f"{result['duration']:.2f}s",
+        )
+    failed = sum(1 for r in results if not r['success'])
+    console = Console()
+    console.print(table)
+    console.print(
+        f"[bold]{len(results) - failed} correcto(s)[/], "
+        f"[{'red' if failed else 'dim'}]{failed} con errores[/] en {elapsed:.2f}s"
+    )
@@ -0,0 +1,126 @@
+import os
+import re
+
+# Refs que viven en el directorio propio de cada worktree y no en el comun
+_PER_WORKTREE_PREFIXES = ('refs/bisect/', 'refs/worktree/', 'refs/rewritten/')
+_OID_RE = re.compile(r'^[0-9a-f]{40}([0-9a-f]{24})?$')
+_packed_cache = {}
+
+def find_git_dir(path):
+    """
+    Localiza el directorio de Git de un working tree, siguiendo archivos `.git` con
+    `gitdir:` (worktrees y submodulos). Devuelve (git_dir, common_dir) o None.
+    """
+    dot_git = os.path.join(path, '.git')
+    if os.path.isdir(dot_git):
+        git_dir = dot_git
+    elif os.path.isfile(dot_git):
+        with open(dot_git, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        if not content.startswith('gitdir:'): return None
+        git_dir = os.path.normpath(os.path.join(path, content[len('gitdir:'):].strip()))
+        if not os.path.isdir(git_dir): return None
+    else:
+        return None
+    common_dir = git_dir
+    commondir_file = os.path.join(git_dir, 'commondir')
+    if os.path.isfile(commondir_file):
+        with open(commondir_file, 'r', encoding='utf-8') as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    return git_dir, common_dir
+
+def vaultflow_state_dir(path=None):
+    """
+    Directorio de estado de vaultflow dentro del git dir comun (compartido por los worktrees),
+    creado si hace falta. Devuelve None si `path` no es un repositorio.
+    """
+    found = find_git_dir(os.path.abspath(path or os.getcwd()))
+    if not found: return None
+    state_dir = os.path.join(found[1], 'vaultflow')
+    os.makedirs(state_dir, exist_ok=True)
+    return state_dir
+
+class RefReader:
+    """Lee HEAD, refs sueltos y `packed-refs` directamente del disco, sin lanzar git."""
+
+    def __init__(self, git_dir, common_dir):
+        self.git_dir = git_dir
+        self.common_dir = common_dir
+
+    def _ref_base(self, refname):
+        if refname == 'HEAD' or refname.startswith(_PER_WORKTREE_PREFIXES): return self.git_dir
+        return self.common_dir
+
+    def _read_loose(self, refname):
+        try:
+            with open(os.path.join(self._ref_base(refname), *refname.split('/')), 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return None
+
+    def packed_refs(self):
+        """Devuelve {refname: oid} de `packed-refs`, cacheado por mtime y tamano."""
+        packed_file = os.path.join(self.common_dir, 'packed-refs')
+        try:
+            st = os.stat(packed_file)
+        except FileNotFoundError:
+            return {}
+        key = (st.st_mtime_ns, st.st_size)
+        cached = _packed_cache.get(packed_file)
+        if cached and cached[0] == key: return cached[1]
+        refs = {}
+        with open(packed_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line or line[0] in '#^': continue
+                oid, _, name = line.rstrip('\n').partition(' ')
+                if not _OID_RE.match(oid): raise ValueError(f"packed-refs invalido: {line!r}")
+                refs[name] = oid
+        _packed_cache[packed_file] = (key, refs)
+        return refs
+
+    def head(self):
+        """Devuelve ('ref', refname) si HEAD es simbolico o ('oid', oid) si esta separado."""
+        content = self._read_loose('HEAD')
+        if content is None: raise ValueError("HEAD no encontrado")
+        if content.startswith('ref:'): return 'ref', content[4:].strip()
+        if _OID_RE.match(content): return 'oid', content
+        raise ValueError(f"HEAD con formato desconocido: {content!r}")
+
+    def resolve(self, refname, depth=5):
+        """Resuelve un ref (siguiendo refs simbolicos) a su oid, o None si no existe."""
+        if depth <= 0 or '..' in refname or refname.startswith('/') or '\\' in refname:
+            raise ValueError(f"Ref no soportado: {refname!r}")
+        content = self._read_loose(refname)
+        if content is None:
+            if refname == 'HEAD' or refname.startswith(_PER_WORKTREE_PREFIXES): return None
+            return self.packed_refs().get(refname)
+        if content.startswith('ref:'): return self.resolve(content[4:].strip(), depth - 1)
+        if _OID_RE.match(content): return content
+        raise ValueError(f"Ref con formato desconocido: {refname!r}")
+
+    def list_refs(self, prefix):
+        """Devuelve {refname: oid} de todos los refs bajo un prefijo (sueltos y empaquetados)."""
+        refs = {name: oid for name, oid in self.packed_refs().items() if name.startswith(prefix)}
+        base = os.path.join(self._ref_base(prefix), *prefix.rstrip('/').split('/'))
+        if not os.path.isdir(base): return refs
+        for root, _, files in os.walk(base):
+            for file_name in files:
+                refname = os.path.relpath(os.path.join(root, file_name), self._ref_base(prefix)).replace(os.sep, '/')
+                if file_name.endswith('.lock'): continue
+                oid = self._read_loose(refname)
+                if oid and _OID_RE.match(oid): refs[refname] = oid
+        return refs
+
+def open_refs(path=None):
+    """
+    Devuelve un RefReader para el repositorio en `path` (por defecto, el directorio actual),
+    o None si no es un repositorio o usa un formato que no sabemos leer (p. ej. reftable).
+    """
+    try:
+        found = find_git_dir(path or os.getcwd())
+    except OSError:
+        return None
+    if not found: return None
+    git_dir, common_dir = found
+    if os.path.exists(os.path.join(common_dir, 'reftable')): return None
+    return RefReader(git_dir, common_dir)
@@ -0,0 +1,235 @@
+import atexit
+import os
+import subprocess
+import threading
+import time
+from . import profiling
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_spawn_lock = threading.Lock()
+_spawn_count = 0
+_invalidation_listeners = []
+
+def _count_spawn():
+    global _spawn_count
+    with _spawn_lock:
+        _spawn_count += 1
+
+def get_spawn_count():
+    """Devuelve cuantos procesos de git se han lanzado desde el ultimo reinicio."""
+    return _spawn_count
+
+def add_invalidation_listener(listener):
+    """Registra `listener(repo_path)`, llamado cada vez que una sesion se invalida (p. ej. la cache de consultas)."""
+    _invalidation_listeners.append(listener)
+
+def reset_spawn_count():
+    """Reinicia el contador de procesos de git lanzados."""
+    global _spawn_count
+    with _spawn_lock:
+        _spawn_count = 0
+
+class _TracedPopen(subprocess.Popen):
+    """Popen que, con la instrumentacion activa, registra su duracion al cerrarse con `with`."""
+
+    def __init__(self, argv, **kwargs):
+        self._traced_started = time.perf_counter()
+        super().__init__(argv, **kwargs)
+
+    def __exit__(self, *exc):
+        try:
+            return super().__exit__(*exc)
+        finally:
+            profiling.record_span(f"git {self.args[1]}", list(self.args), self._traced_started)
+
+class GitSession:
+    """
+    Mantiene procesos `git cat-file --batch` / `--batch-check` de larga vida para un
+    repositorio y cachea los refs obtenidos con una unica llamada a `git for-each-ref`.
+    """
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self._lock = threading.Lock()
+        self._batch = None
+        self._batch_check = None
+        self._refs = None
+
+    def run(self, args, check=True, text=False, input=None, timeout=None, env=None, invalidates=False):
+        """Ejecuta un comando de git en el repositorio, contando el proceso lanzado."""
+        _count_spawn()
+        try:
+            with profiling.span(f"git {args[0]}", ['git', *args]) as span:
+                result = subprocess.run(
+                    ['git', *args], cwd=self.repo_path, capture_output=True,
+                    check=check, text=text, input=input, timeout=timeout, env=env
+                )
+                if span is not None: span['bytes'] = len(result.stdout or '') + len(result.stderr or '')
+                return result
+        finally:
+            if invalidates: self.invalidate()
+
+    def stream(self, args, timeout=None, env=None, invalidates=False):
+        """
+        Ejecuta un comando de git dejando su salida y su progreso en la terminal, sin acumularlos
+        en memoria (bundles, fetch...). Devuelve el codigo de salida.
+        """
+        _count_spawn()
+        try:
+            with profiling.span(f"git {args[0]}", ['git', *args]):
+                return subprocess.run(
+                    ['git', *args], cwd=self.repo_path, stdin=subprocess.DEVNULL, timeout=timeout, env=env
+                ).returncode
+        finally:
+            if invalidates: self.invalidate()
+
+    def popen(self, args, stdin=subprocess.DEVNULL, stderr=subprocess.DEVNULL):
+        """Lanza un comando de git con la salida en streaming (stdout como pipe binario)."""
+        _count_spawn()
+        cls = _TracedPopen if profiling.is_enabled() else subprocess.Popen
+        return cls(
+            ['git', *args], cwd=self.repo_path,
+            stdin=stdin, stdout=subprocess.PIPE, stderr=stderr
+        )
+
+    def invalidate(self, notify=True):
+        """
+        Descarta los refs cacheados tras una operacion que modifica el repositorio. Con `notify`
+        tambien avisa a los listeners; quien sabe que datos concretos cambio lo desactiva.
+        """
+        self._refs = None
+        if notify:
+            for listener in _invalidation_listeners: listener(self.repo_path)
+
+    def refs(self):
+        """Devuelve ({refname: (oid, oid_corto)}, ref_de_HEAD) con un solo `for-each-ref`."""
+        refs = self._refs
+        if refs is None:
+            result = self.run(
+                ['for-each-ref', '--format=%(objectname)%09%(objectname:short)%09%(HEAD)%09%(refname)'],
+                check=False, text=True
+            )
+            table, head = {}, None
+            if result.returncode == 0:
+                for line in result.stdout.splitlines():
+                    parts = line.split('\t', 3)
+                    if len(parts) != 4: continue
+                    oid, short, mark, name = parts
+                    table[name] = (oid, short)
+                    if mark == '*': head = name
+            refs = self._refs = (table, head)
+        return refs
+
+    def short_oid(self, oid):
+        """Abrevia un oid reutilizando la abreviatura de git si algun ref apunta a el."""
+        for full, short in self.refs()[0].values():
+            if full == oid: return short
+        return oid[:7]
+
+    def _start_cat_file(self, mode):
+        _count_spawn()
+        return subprocess.Popen(
+            ['git', 'cat-file', mode], cwd=self.repo_path,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+
+    def _query(self, attr, mode, name):
+        with profiling.span(f"git cat-file {mode}", ['git', 'cat-file', mode]) as span:
+            parts, proc = self._query_unmeasured(attr, mode, name)
+            if span is not None and parts and len(parts) == 3: span['bytes'] = int(parts[2])
+        return parts, proc
+
+    def _query_unmeasured(self, attr, mode, name):
+        proc = getattr(self, attr)
+        if proc is None or proc.poll() is not None:
+            proc = self._start_cat_file(mode)
+            setattr(self, attr, proc)
+        try:
+            proc.stdin.write(name.encode('utf-8') + b'\n')
+            proc.stdin.flush()
+            header = proc.stdout.readline()
+        except (BrokenPipeError, OSError):
+            header = b''
+        if not header:
+            self._discard(attr, proc)
+            return None, proc
+        return header.split(), proc
+
+    def _discard(self, attr, proc):
+        """Mata un cat-file cuyo pipe quedo a medias: la siguiente consulta arranca uno nuevo."""
+        proc.kill(); proc.wait()
+        if getattr(self, attr) is proc: setattr(self, attr, None)
+
+    def object_info(self, name):
+        """Devuelve (oid, tipo, tamano) de un objeto o None si no existe."""
+        if '\n' in name: return None
+        with self._lock:
+            parts, _ = self._query('_batch_check', '--batch-check', name)
+        if not parts or len(parts) != 3: return None
+        return parts[0].decode(), parts[1].decode(), int(parts[2])
+
+    def read_object(self, name):
+        """Devuelve (oid, tipo, contenido) de un objeto o None si no existe."""
+        if '\n' in name: return None
+        with self._lock:
+            parts, proc = self._query('_batch', '--batch', name)
+            if not parts or len(parts) != 3: return None
+            size = int(parts[2])
+            data = proc.stdout.read(size + 1)[:size]
+        return parts[0].decode(), parts[1].decode(), data
+
+    def stream_object(self, name, out, chunk_size=1024 * 1024):
+        """
+        Copia el contenido de un objeto a `out` por bloques, sin cargarlo entero en memoria.
+        Devuelve el numero de bytes escritos o None si el objeto no existe.
+        """
+        if '\n' in name: return None
+        with self._lock:
+            parts, proc = self._query('_batch', '--batch', name)
+            if not parts or len(parts) != 3: return None
+            remaining = size = int(parts[2])
+            try:
+                while remaining:
+                    chunk = proc.stdout.read(min(chunk_size, remaining))
+                    if not chunk: raise OSError(f"cat-file termino antes de tiempo leyendo {name}")
+                    out.write(chunk)
+                    remaining -= len(chunk)
+                proc.stdout.read(1)  # Salto de linea que cierra cada objeto en --batch
+            except BaseException:
+                # Lo que quede del objeto sigue en el pipe y desalinearia las lecturas siguientes
+                self._discard('_batch', proc)
+                raise
+        return size
+
+    def close(self):
+        """Cierra los procesos de larga vida del repositorio."""
+        with self._lock:
+            for attr in ('_batch', '_batch_check'):
+                proc = getattr(self, attr)
+                if proc is None: continue
+                try:
+                    proc.stdin.close()
+                    proc.wait(timeout=1)
+                except Exception:
+                    proc.kill()
+                setattr(self, attr, None)
+
+def get_session(repo_path=None):
+    """Devuelve la sesion de git asociada a un repositorio (por defecto, el directorio actual)."""
+    key = os.path.abspath(repo_path or os.getcwd())
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = GitSession(key)
+        return session
+
+def close_all_sessions():
+    """Cierra todas las sesiones abiertas."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+atexit.register(close_all_sessions)
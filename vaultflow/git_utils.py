@@ -1,69 +1,287 @@
 import os
 import subprocess
+import threading
+from contextlib import contextmanager
+from .git_session import add_invalidation_listener, get_session, get_spawn_count, reset_spawn_count
+from .git_refs import find_git_dir, open_refs
+from .backup_index import list_backup_refs, parse_ref_name
+from .summary import parse_summary
 
-def is_git_repository():
-    """Verifica si el directorio actual es un repositorio de Git."""
-    return os.path.isdir('.git')
+# Cache de consultas por invocacion: dentro de `query_cache()` los datos de git (rama, estado,
+# ultimo commit...) se calculan una vez por repositorio. Las funciones que modifican el repo
+# olvidan solo los datos que cambian; cualquier otra escritura con `invalidates=True` los olvida todos.
+_query_cache = None
+_query_lock = threading.Lock()
+_query_stats = {'hits': 0, 'misses': 0}
 
-def git_init():
-    try: subprocess.run(['git', 'init'], check=True, capture_output=True); return True
-    except: return False
+@contextmanager
+def query_cache():
+    """Memoriza las consultas de git mientras dura el bloque (un comando de la CLI o del menu)."""
+    global _query_cache
+    previous, _query_cache = _query_cache, {}
+    try:
+        yield
+    finally:
+        _query_cache = previous
+
+def get_query_cache_stats():
+    """Aciertos y fallos de la cache de consultas desde el ultimo reinicio (para depurar)."""
+    with _query_lock:
+        return dict(_query_stats)
+
+def reset_query_cache_stats():
+    with _query_lock:
+        _query_stats.update(hits=0, misses=0)
+
+def _repo_key(repo):
+    return os.path.abspath(repo or os.getcwd())
+
+def _memoized(fact, repo, compute):
+    cache = _query_cache
+    if cache is None: return compute()
+    key = _repo_key(repo)
+    with _query_lock:
+        facts = cache.setdefault(key, {})
+        if fact in facts:
+            _query_stats['hits'] += 1
+            return facts[fact]
+        _query_stats['misses'] += 1
+    value = compute()
+    with _query_lock:
+        cache.setdefault(key, {})[fact] = value
+    return value
+
+def _forget(repo, *facts):
+    """Olvida los datos indicados del repositorio (todos si no se indica ninguno)."""
+    cache = _query_cache
+    if cache is None: return
+    with _query_lock:
+        known = cache.get(_repo_key(repo))
+        if not known: return
+        if not facts:
+            known.clear()
+            return
+        for fact in facts:
+            if callable(fact):
+                for key in [k for k in known if fact(k, known[k])]: del known[key]
+            else:
+                known.pop(fact, None)
+
+add_invalidation_listener(_forget)
+
+def _git(args, repo=None, **kwargs):
+    return get_session(repo).run(args, **kwargs)
+
+def _mutate(args, repo, facts, refs=True, **kwargs):
+    """Ejecuta un comando que modifica el repositorio y olvida solo `facts` (aunque falle)."""
+    try:
+        return _git(args, repo=repo, **kwargs)
+    finally:
+        if refs: get_session(repo).invalidate(notify=False)
+        _forget(repo, *facts)
+
+def _unborn_branch(key, value):
+    """La rama actual sin commits se leia como None: el primer commit la cambia."""
+    return key == 'branch' and value is None
+
+def _non_interactive_env():
+    """Entorno para git sin preguntas de credenciales (ejecuciones en segundo plano o en paralelo)."""
+    env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    env.setdefault('GIT_SSH_COMMAND', 'ssh -o BatchMode=yes')
+    return env
 
-def create_initial_commit():
-    try: subprocess.run(['git', 'commit', '--allow-empty', '-m', 'Initial commit by vaultflow'], check=True, capture_output=True); return True
+def _commit_subject(data):
+    """Extrae el asunto (primer parrafo) del contenido crudo de un commit."""
+    message = data.split(b'\n\n', 1)[1] if b'\n\n' in data else b''
+    paragraph = message.decode('utf-8', errors='replace').strip().split('\n\n', 1)[0]
+    return ' '.join(line.strip() for line in paragraph.splitlines())
+
+def is_git_repository(repo=None):
+    """Verifica si el directorio actual es un repositorio de Git (incluye worktrees)."""
+    try: return find_git_dir(repo or os.getcwd()) is not None
+    except OSError: return False
+
+def git_init(repo=None):
+    try: _git(['init'], repo=repo, invalidates=True); return True
     except: return False
 
-def rename_branch(old, new):
-    try: subprocess.run(['git', 'branch', '-m', old, new], check=True, capture_output=True); return True
+def create_initial_commit(repo=None):
+    try: _git(['commit', '--allow-empty', '-m', 'Initial commit by vaultflow'], repo=repo, invalidates=True); return True
     except: return False
 
-def branch_exists(name):
-    try: return subprocess.run(['git', 'show-ref', '--verify', f'refs/heads/{name}'], check=True, capture_output=True).returncode == 0
+def rename_branch(old, new, repo=None):
+    try: _git(['branch', '-m', old, new], repo=repo, invalidates=True); return True
     except: return False
 
-def create_branch(name):
-    try: subprocess.run(['git', 'branch', name], check=True, capture_output=True); return True
+def branch_exists(name, repo=None):
+    return _memoized(('branch_exists', name), repo, lambda: _read_branch_exists(name, repo))
+
+def _read_branch_exists(name, repo=None):
+    reader = open_refs(repo)
+    if reader:
+        try: return reader.resolve(f'refs/heads/{name}') is not None
+        except (OSError, ValueError): pass
+    return f'refs/heads/{name}' in get_session(repo).refs()[0]
+
+def create_branch(name, repo=None):
+    try: _mutate(['branch', name], repo, [('branch_exists', name)]); return True
     except: return False
 
-def get_current_branch():
-    try: return subprocess.run(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
-    except: return None
+def get_current_branch(repo=None):
+    return _memoized('branch', repo, lambda: _read_current_branch(repo))
+
+def _read_current_branch(repo=None):
+    reader = open_refs(repo)
+    if reader:
+        try:
+            kind, value = reader.head()
+            if kind == 'oid': return 'HEAD'
+            if reader.resolve(value) is None: return None  # Rama sin commits
+            return value[len('refs/heads/'):] if value.startswith('refs/heads/') else value
+        except (OSError, ValueError): pass
+    session = get_session(repo)
+    head = session.refs()[1]
+    if head: return head[len('refs/heads/'):] if head.startswith('refs/heads/') else head
+    # Sin rama marcada: HEAD separado (devuelve 'HEAD') o rama sin commits (None)
+    return 'HEAD' if session.object_info('HEAD') else None
+
+def get_last_commit(repo=None):
+    return _memoized('last_commit', repo, lambda: _read_last_commit(repo))
+
+def _read_last_commit(repo=None):
+    session = get_session(repo)
+    commit = session.read_object('HEAD')
+    if not commit or commit[1] != 'commit': return "No hay commits todavia."
+    return f"{session.short_oid(commit[0])} - {_commit_subject(commit[2])}"
+
+def _iter_nul_records(stream, chunk_size=65536):
+    """Recorre una salida `-z` de git registro a registro sin cargarla entera en memoria."""
+    pending = b''
+    while True:
+        chunk = stream.read1(chunk_size)
+        if not chunk: break
+        records = (pending + chunk).split(b'\0')
+        pending = records.pop()
+        yield from records
+    if pending: yield pending
 
-def get_last_commit():
-    try: return subprocess.run(['git', 'log', '-1', '--pretty=format:%h - %s'], capture_output=True, text=True, check=True).stdout.strip()
-    except: return "No hay commits todavia."
+def _status_line(xy, path, orig_path=None):
+    code = xy.replace('.', ' ')
+    shown = f"{orig_path} -> {path}" if orig_path else path
+    return f"{code} {shown}".strip()
 
-def get_structured_git_status():
+def get_repo_status(repo=None):
+    """
+    Obtiene rama, upstream, ahead/behind y cambios del vault con una sola llamada a
+    `git status --porcelain=v2 --branch -z`. Devuelve None si git falla.
+    """
+    return _memoized('status', repo, lambda: _read_repo_status(repo))
+
+def _read_repo_status(repo=None):
+    status = {
+        'oid': None, 'branch': None, 'upstream': None, 'ahead': 0, 'behind': 0,
+        'staged': [], 'modified': [], 'untracked': [],
+        'paths': {'staged': [], 'modified': [], 'untracked': []}  # Rutas sin codigo de estado
+    }
     try:
-        result = subprocess.run(['git', 'status', '--porcelain'], capture_output=True, text=True, check=True)
-        output = result.stdout.strip()
-        if not output: return None
-        status_map = {'staged': [], 'modified': [], 'untracked': []}
-        for line in output.split('\n'):
-            if not line: continue
-            code, path = line[:2], line[3:]
-            if code.startswith('??'): status_map['untracked'].append(path)
-            else:
-                if code[0] in ('A', 'M', 'D', 'R', 'C'): status_map['staged'].append(line.strip())
-                if code[1] == 'M': status_map['modified'].append(line.strip())
-        return status_map if any(status_map.values()) else None
-    except: return None
+        proc = get_session(repo).popen(['status', '--porcelain=v2', '--branch', '-z'])
+    except OSError:
+        return None
+    with proc:
+        records = _iter_nul_records(proc.stdout)
+        for raw in records:
+            record = os.fsdecode(raw)
+            kind = record[:1]
+            if kind == '#':
+                key, _, value = record[2:].partition(' ')
+                if key == 'branch.oid': status['oid'] = None if value == '(initial)' else value
+                elif key == 'branch.head': status['branch'] = 'HEAD' if value == '(detached)' else value
+                elif key == 'branch.upstream': status['upstream'] = value
+                elif key == 'branch.ab':
+                    ahead, _, behind = value.partition(' ')
+                    status['ahead'], status['behind'] = int(ahead), abs(int(behind))
+            elif kind in ('1', '2', 'u'):
+                # 1: cambio ordinario, 2: renombrado/copiado (sigue el path original), u: sin fusionar
+                fields = record.split(' ', {'1': 8, '2': 9, 'u': 10}[kind])
+                xy, path = fields[1], fields[-1]
+                orig_path = os.fsdecode(next(records, b'')) if kind == '2' else None
+                line = _status_line(xy, path, orig_path)
+                if xy[0] in ('A', 'M', 'D', 'R', 'C'):
+                    status['staged'].append(line); status['paths']['staged'].append(path)
+                if xy[1] == 'M':
+                    status['modified'].append(line); status['paths']['modified'].append(path)
+            elif kind == '?':
+                status['untracked'].append(record[2:]); status['paths']['untracked'].append(record[2:])
+    if proc.returncode != 0: return None
+    return status
+
+def get_structured_git_status(repo=None):
+    status = get_repo_status(repo)
+    if not status: return None
+    status_map = {key: status[key] for key in ('staged', 'modified', 'untracked')}
+    return status_map if any(status_map.values()) else None
 
-def stage_all_changes():
-    try: subprocess.run(['git', 'add', '.'], check=True, capture_output=True); return True
+def stage_all_changes(repo=None):
+    try: _mutate(['add', '.'], repo, ['status'], refs=False); return True
     except: return False
 
-def commit_changes(message):
-    try: subprocess.run(['git', 'commit', '-m', message], check=True, capture_output=True); return True
+def filter_ignored_paths(paths, repo=None):
+    """Descarta las rutas que Git ignora (.gitignore, info/exclude...) con un solo `check-ignore`."""
+    if not paths: return []
+    result = _git(['check-ignore', '--stdin', '-z'], repo=repo, check=False,
+                  input=b'\0'.join(os.fsencode(p) for p in paths) + b'\0')
+    if result.returncode not in (0, 1): return list(paths)
+    ignored = {os.fsdecode(p) for p in result.stdout.split(b'\0') if p}
+    return [p for p in paths if p not in ignored]
+
+def stage_paths(paths, repo=None):
+    """
+    Prepara solo las rutas indicadas (altas, cambios y borrados) en lugar de `git add .`.
+    Las rutas se pasan por stdin separadas por NUL y se tratan de forma literal.
+    """
+    base = os.path.abspath(repo or os.getcwd())
+    existing, missing = [], []
+    for p in paths:
+        (existing if os.path.lexists(os.path.join(base, p)) else missing).append(p)
+    _forget(repo, 'status')
+    try:
+        if existing:
+            _git(['--literal-pathspecs', 'add', '--all', '--pathspec-from-file=-', '--pathspec-file-nul'],
+                 repo=repo, input=b'\0'.join(os.fsencode(p) for p in existing))
+        if missing:
+            _git(['--literal-pathspecs', 'rm', '--cached', '-r', '-q', '--ignore-unmatch',
+                  '--pathspec-from-file=-', '--pathspec-file-nul'],
+                 repo=repo, input=b'\0'.join(os.fsencode(p) for p in missing))
+        return True
+    except:
+        return False
+
+def has_staged_changes(repo=None):
+    """Indica si el indice tiene cambios respecto a HEAD."""
+    return _git(['diff', '--cached', '--quiet'], repo=repo, check=False).returncode == 1
+
+def count_staged_paths(repo=None):
+    """Archivos del indice que difieren de HEAD (rutas reales: una carpeta nueva cuenta cada archivo)."""
+    result = _git(['diff', '--cached', '--name-only', '-z'], repo=repo, check=False)
+    return len([p for p in result.stdout.split(b'\0') if p]) if result.returncode == 0 else None
+
+def commit_changes(message, repo=None):
+    try: _mutate(['commit', '-m', message], repo, ['status', 'last_commit', _unborn_branch]); return True
     except: return False
 
-def push_changes():
-    """Intenta un git push, devolviendo el error específico si falla."""
-    current_branch = get_current_branch()
+def push_changes(repo=None, timeout=None, allow_prompt=True):
+    """
+    Intenta un git push, devolviendo el error específico si falla. Con `timeout` el push se
+    cancela al agotarse; con `allow_prompt=False` git no pide credenciales por terminal.
+    """
+    current_branch = get_current_branch(repo)
     if not current_branch: return False, "No se pudo determinar la rama actual."
+    env = None if allow_prompt else _non_interactive_env()
     try:
-        subprocess.run(['git', 'push'], check=True, capture_output=True)
+        _git(['push'], repo=repo, timeout=timeout, env=env, invalidates=True)
         return True, "Push exitoso."
+    except subprocess.TimeoutExpired:
+        return False, f"Tiempo agotado: el remoto no respondio en {timeout} segundos."
     except subprocess.CalledProcessError as e:
         error_msg = e.stderr.decode()
         if 'No configured push destination' in error_msg:
@@ -75,63 +293,181 @@ def push_changes():
   Luego, intenta 'vaultflow push' de nuevo."""
         if 'has no upstream branch' in error_msg:
             try:
-                subprocess.run(['git', 'push', '--set-upstream', 'origin', current_branch], check=True, capture_output=True)
+                _git(['push', '--set-upstream', 'origin', current_branch], repo=repo, timeout=timeout, env=env, invalidates=True)
                 return True, "Se configuro el rastreo remoto y se realizo el push exitosamente."
+            except subprocess.TimeoutExpired:
+                return False, f"Tiempo agotado: el remoto no respondio en {timeout} segundos."
             except subprocess.CalledProcessError as e2:
                 return False, f"Fallo al configurar el upstream: {e2.stderr.decode()}"
         return False, error_msg
 
-def checkout_branch(branch_name):
+def push_to_url(url, refspecs, repo=None, timeout=None):
+    """
+    Push sin preguntas de credenciales a una URL o ruta (destinos adicionales, sin remoto
+    configurado). Devuelve (exito, mensaje).
+    """
+    try:
+        result = _git(['push', '--porcelain', url, *refspecs], repo=repo, check=False, text=True,
+                      timeout=timeout, env=_non_interactive_env())
+    except subprocess.TimeoutExpired:
+        return False, f"Tiempo agotado: el destino no respondio en {timeout} segundos."
+    if result.returncode == 0:
+        flags = [line[:1] for line in result.stdout.splitlines() if line[:1] in ('*', '+', ' ') and '\t' in line]
+        if not flags: return True, "Ya estaba al dia."
+        forced = flags.count('+')  # Historia reescrita (p. ej. backups compactados)
+        return True, f"Push exitoso ({len(flags)} ref(s) actualizado(s)" + (f", {forced} reescrito(s))." if forced else ").")
+    errors = [l for l in (result.stdout + result.stderr).splitlines() if l.startswith(('!', 'error', 'fatal'))]
+    return False, " ".join(errors) or result.stderr.strip()
+
+def checkout_branch(branch_name, repo=None):
     """Intenta cambiar de rama, devolviendo el error específico si falla."""
     try:
-        subprocess.run(['git', 'checkout', branch_name], check=True, capture_output=True)
+        _mutate(['checkout', branch_name], repo, ['branch', 'status', 'last_commit'])
         return True, "Checkout exitoso."
     except subprocess.CalledProcessError as e:
         return False, e.stderr.decode()
 
-def merge_branch(branch_name):
+def merge_branch(branch_name, repo=None):
     try:
-        subprocess.run(['git', 'merge', '--no-ff', branch_name], check=True, capture_output=True)
+        _mutate(['merge', '--no-ff', branch_name], repo, ['status', 'last_commit'])
         return 0, "Fusion completada exitosamente."
     except subprocess.CalledProcessError as e:
         error_msg = e.stderr.decode().lower()
         if 'conflicto' in error_msg or 'conflict' in error_msg:
-            subprocess.run(['git', 'merge', '--abort'], check=False, capture_output=True)
+            _mutate(['merge', '--abort'], repo, ['status', 'last_commit'], check=False)
             return 1, "Conflicto de fusion detectado. La fusion ha sido abortada."
         return 2, f"Error durante la fusion: {error_msg}"
 
-def delete_branch(branch_name):
-    try: subprocess.run(['git', 'branch', '-d', branch_name], check=True, capture_output=True); return True
+def _resolve_ref(refname, repo=None):
+    reader = open_refs(repo)
+    if reader:
+        try: return reader.resolve(refname)
+        except (OSError, ValueError): pass
+    info = get_session(repo).object_info(refname)
+    return info[0] if info else None
+
+def is_ancestor(ancestor, descendant, repo=None):
+    return _git(['merge-base', '--is-ancestor', ancestor, descendant], repo=repo, check=False).returncode == 0
+
+def worktree_with_branch(branch_name, repo=None):
+    """Ruta del worktree que tiene `branch_name` activa, o None. Sin worktrees enlazados no lanza git."""
+    found = find_git_dir(os.path.abspath(repo or os.getcwd()))
+    if not found: return None
+    if not os.path.isdir(os.path.join(found[1], 'worktrees')):
+        reader = open_refs(repo)
+        try: head = reader.head() if reader else None
+        except (OSError, ValueError): head = None
+        return os.path.abspath(repo or os.getcwd()) if head == ('ref', f'refs/heads/{branch_name}') else None
+    result = _git(['worktree', 'list', '--porcelain', '-z'], repo=repo, check=False)
+    path = None
+    for field in result.stdout.split(b'\0'):
+        if field.startswith(b'worktree '): path = os.fsdecode(field[len(b'worktree '):])
+        elif field == f'branch refs/heads/{branch_name}'.encode(): return path
+    return None
+
+MERGE_TREE_USAGE_ERROR = 129 # git < 2.38 no conoce --write-tree y responde con el uso
+
+def _merge_with_checkout(branch_name, target, repo=None):
+    """Fusion clasica para git antiguo: cambia a `target` (si ningun worktree la tiene activa) y hace merge."""
+    worktree = worktree_with_branch(target, repo)
+    if not worktree:
+        success, message = checkout_branch(target, repo)
+        if not success: return 2, f"No se pudo cambiar a '{target}': {message.strip()}", []
+        worktree = repo
+    code, message = merge_branch(branch_name, worktree)
+    if worktree != repo: get_session(repo).invalidate()
+    return code, message, []
+
+def merge_without_checkout(branch_name, target='main', repo=None):
+    """
+    Fusiona `branch_name` en `target` calculando el resultado con `git merge-tree --write-tree`,
+    sin tocar el working tree. El commit de fusion se crea con `commit-tree` y `target` se mueve
+    por ref; solo si algun worktree tiene `target` activa se actualizan sus archivos (fast-forward).
+    Devuelve (codigo, mensaje, conflictos) con codigo 0 exito, 1 conflicto o 2 error.
+    Con git anterior a 2.38 (sin `merge-tree --write-tree`) se fusiona con checkout + merge.
+    """
+    target_oid = _resolve_ref(f'refs/heads/{target}', repo)
+    branch_oid = _resolve_ref(f'refs/heads/{branch_name}', repo)
+    if not target_oid or not branch_oid:
+        return 2, f"No se encontro la rama '{target if not target_oid else branch_name}'.", []
+    if is_ancestor(branch_oid, target_oid, repo):
+        return 0, f"'{branch_name}' ya estaba integrada en '{target}'.", []
+    result = _git(['merge-tree', '--write-tree', '-z', '--name-only', '--no-messages', target_oid, branch_oid],
+                  repo=repo, check=False)
+    if result.returncode == MERGE_TREE_USAGE_ERROR:
+        return _merge_with_checkout(branch_name, target, repo)
+    fields = [os.fsdecode(f) for f in result.stdout.split(b'\0') if f]
+    if result.returncode == 1:
+        return 1, "Conflicto de fusion detectado. No se modifico ningun archivo.", sorted(set(fields[1:]))
+    if result.returncode != 0 or not fields:
+        return 2, f"Error durante la fusion: {result.stderr.decode().strip()}", []
+    commit = _git(['commit-tree', fields[0], '-p', target_oid, '-p', branch_oid, '-m', f"Merge branch '{branch_name}'"],
+                  repo=repo, text=True).stdout.strip()
+    worktree = worktree_with_branch(target, repo)
+    if worktree:
+        # Fast-forward al commit de fusion: solo se reescriben los archivos que trae el experimento
+        ff = get_session(worktree).run(['merge', '--ff-only', '--quiet', commit], check=False, invalidates=True)
+        get_session(repo).invalidate()
+        if ff.returncode != 0:
+            return 2, f"No se pudo actualizar '{target}': {ff.stderr.decode().strip()}", []
+    else:
+        _git(['update-ref', '-m', f"vaultflow: merge {branch_name}", f'refs/heads/{target}', commit, target_oid],
+             repo=repo, invalidates=True)
+    return 0, "Fusion completada exitosamente.", []
+
+def delete_branch_ref(branch_name, repo=None):
+    """Borra una rama por ref (sin `git branch`), comprobando que no haya cambiado entretanto."""
+    oid = _resolve_ref(f'refs/heads/{branch_name}', repo)
+    if not oid: return False
+    return _mutate(['update-ref', '-d', f'refs/heads/{branch_name}', oid], repo,
+                   [('branch_exists', branch_name)], check=False).returncode == 0
+
+def delete_branch(branch_name, repo=None):
+    try: _mutate(['branch', '-d', branch_name], repo, [('branch_exists', branch_name)]); return True
     except: return False
 
-def get_backup_commits(limit=10):
-    """Obtiene los últimos commits que son backups de vaultflow."""
+def get_backup_commits(limit=10, repo=None, page=1, since=None, until=None):
+    """
+    Obtiene los backups de vaultflow desde el indice de refs (del mas reciente al mas antiguo).
+    Solo se leen los `limit` commits de la pagina pedida, nunca el historial completo.
+    """
     try:
-        result = subprocess.run(
-            ['git', 'log', '--grep=Backup vaultflow', f'-{limit}', '--pretty=format:%h|%s|%ad', '--date=short'],
-            capture_output=True, text=True, check=True
-        )
-        if not result.stdout.strip():
-            return []
-        
-        backups = []
-        for line in result.stdout.strip().split('\n'):
-            parts = line.split('|', 2)
-            if len(parts) == 3:
-                hash_val, message, date = parts
-                backups.append({
-                    'hash': hash_val,
-                    'message': message,
-                    'date': date
-                })
-        return backups
-    except:
+        refs = list_backup_refs(repo, since=since, until=until)
+    except (OSError, subprocess.CalledProcessError):
         return []
+    session = get_session(repo)
+    backups = []
+    for refname, oid in refs[(page - 1) * limit: page * limit]:
+        commit = session.read_object(oid)
+        if not commit or commit[1] != 'commit': continue
+        when = parse_ref_name(refname)
+        backups.append({
+            'hash': oid[:7],
+            'oid': oid,
+            'message': _commit_subject(commit[2]),
+            'summary': parse_summary(commit[2].decode('utf-8', errors='replace')),
+            'date': when.astimezone().strftime('%Y-%m-%d %H:%M') if when else '',
+            'timestamp': when.isoformat() if when else None,
+        })
+    return backups
+
+def count_backup_commits(repo=None, since=None, until=None):
+    """Numero total de backups en el indice (para paginar)."""
+    try: return len(list_backup_refs(repo, since=since, until=until))
+    except (OSError, subprocess.CalledProcessError): return 0
 
-def checkout_commit(commit_hash):
+def checkout_commit(commit_hash, repo=None):
     """Hace checkout a un commit específico."""
     try:
-        subprocess.run(['git', 'checkout', commit_hash], check=True, capture_output=True)
+        _git(['checkout', commit_hash], repo=repo, invalidates=True)
         return True, f"Cambiado a commit {commit_hash}"
     except subprocess.CalledProcessError as e:
         return False, e.stderr.decode()
+
+def get_git_process_count():
+    """Devuelve cuantos procesos de git se han lanzado en el comando actual."""
+    return get_spawn_count()
+
+def reset_git_process_count():
+    """Reinicia el contador de procesos de git (al comenzar cada comando)."""
+    reset_spawn_count()
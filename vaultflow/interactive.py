@@ -3,6 +3,7 @@ from InquirerPy.base.control import Choice
 from rich.console import Console
 from .commands import initialize_vault, show_status, create_local_backup, push_changes_to_remote, start_experiment, finish_experiment, show_backups, show_vaults
 from .config import is_managed_vault, get_managed_vaults, auto_discover_and_register_vaults
+from .git_utils import query_cache
 
 def _show_managed_vault_menu():
     """Muestra el menú de acciones para un vault gestionado."""
@@ -38,14 +39,15 @@ def _show_managed_vault_menu():
 
         console.print("[magenta]" + "-"*60 + "[/magenta]")
 
-        if choice in action_map:
-            action_map[choice]()
-        elif choice == "start_exp":
-            exp_name = inquirer.text(message="Nombre del nuevo experimento:").execute()
-            if exp_name: start_experiment(exp_name)
-        elif choice == "finish_exp":
-            exp_name = inquirer.text(message="Nombre del experimento a finalizar (sin 'exp/'):").execute()
-            if exp_name: finish_experiment(exp_name)
+        with query_cache():  # Cada accion es una invocacion: entre una y otra el vault puede cambiar
+            if choice in action_map:
+                action_map[choice]()
+            elif choice == "start_exp":
+                exp_name = inquirer.text(message="Nombre del nuevo experimento:").execute()
+                if exp_name: start_experiment(exp_name)
+            elif choice == "finish_exp":
+                exp_name = inquirer.text(message="Nombre del experimento a finalizar (sin 'exp/'):").execute()
+                if exp_name: finish_experiment(exp_name)
 
 def _show_unmanaged_vault_menu():
     """Muestra el menú de bienvenida/inicio para un directorio no gestionado."""
@@ -1,25 +1,77 @@
 import os
 import json
+import time
 from datetime import datetime
+from . import profiling
+from .filelock import file_lock
+from .git_refs import find_git_dir
 
-LOG_FILE_NAME = ".vaultflow_log.json"
+LOG_FILE_NAME = ".vaultflow_log.jsonl"
+LEGACY_LOG_FILE_NAME = ".vaultflow_log.json"
+LOG_IGNORE_PATTERN = "/.vaultflow_log.json*"
+LOG_MAX_BYTES = 1024 * 1024 # Rotar al superar 1 MB
+LOG_BACKUP_COUNT = 3 # .jsonl.1 ... .jsonl.3
+_READ_BLOCK_SIZE = 8192
 
-def get_log_file_path():
-    """Busca el archivo de log en el directorio actual."""
-    return os.path.join(os.getcwd(), LOG_FILE_NAME)
+def get_log_file_path(repo=None):
+    """Busca el archivo de log en el vault indicado (por defecto, el directorio actual)."""
+    return os.path.join(os.path.abspath(repo or os.getcwd()), LOG_FILE_NAME)
 
-def log_operation(command, message, success=True):
-    """Registra una operación en el archivo de log."""
-    log_file = get_log_file_path()
-    
-    if os.path.exists(log_file):
-        try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-        except json.JSONDecodeError:
-            logs = [] # Si el archivo está corrupto, empezamos de nuevo
-    else:
-        logs = []
+def _rotated_log_files(log_file):
+    """Devuelve el log actual y sus rotaciones, del mas reciente al mas antiguo."""
+    return [log_file] + [f"{log_file}.{i}" for i in range(1, LOG_BACKUP_COUNT + 1)]
+
+def _ensure_log_is_ignored(vault_path):
+    """Excluye el log de Git en vaults cuyo .gitignore es anterior al formato JSON Lines."""
+    try:
+        found = find_git_dir(vault_path)
+        if not found: return
+        exclude_file = os.path.join(found[1], 'info', 'exclude')
+        content = ''
+        if os.path.exists(exclude_file):
+            with open(exclude_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+        if LOG_IGNORE_PATTERN in content.splitlines(): return
+        os.makedirs(os.path.dirname(exclude_file), exist_ok=True)
+        with open(exclude_file, 'a', encoding='utf-8') as f:
+            f.write(("" if not content or content.endswith("\n") else "\n") + LOG_IGNORE_PATTERN + "\n")
+    except OSError:
+        pass
+
+def _migrate_legacy_log(log_file):
+    """Convierte una unica vez el antiguo .vaultflow_log.json (array, mas reciente primero)."""
+    legacy_file = os.path.join(os.path.dirname(log_file), LEGACY_LOG_FILE_NAME)
+    if os.path.exists(log_file) or not os.path.exists(legacy_file): return
+    try:
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        entries = []
+    tmp_file = f"{log_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        for entry in reversed(entries if isinstance(entries, list) else []):
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, log_file)
+    os.replace(legacy_file, f"{legacy_file}.migrated")
+
+def _rotate_if_needed(log_file):
+    try:
+        if os.path.getsize(log_file) < LOG_MAX_BYTES: return
+    except FileNotFoundError:
+        return
+    files = _rotated_log_files(log_file)
+    with profiling.span("log rotate", log_file):
+        for older, newer in zip(reversed(files[1:]), reversed(files[:-1])):
+            if os.path.exists(newer): os.replace(newer, older)
+
+def log_operation(command, message, success=True, repo=None, duration=None, files=None):
+    """
+    Registra una operación en el archivo de log (una línea JSON añadida al final).
+    `duration` (segundos) y `files` (archivos incluidos en el commit) se guardan si se indican.
+    """
+    log_file = get_log_file_path(repo)
 
     new_entry = {
         "timestamp": datetime.now().isoformat(),
@@ -27,8 +79,81 @@ def log_operation(command, message, success=True):
         "success": success,
         "message": message
     }
-    
-    logs.insert(0, new_entry)
-    
-    with open(log_file, 'w', encoding='utf-8') as f:
-        json.dump(logs, f, indent=4)
\ No newline at end of file
+    if duration is not None: new_entry["duration"] = round(duration, 3)
+    if files is not None: new_entry["files"] = files
+    line = (json.dumps(new_entry, ensure_ascii=False) + "\n").encode('utf-8')
+
+    with profiling.span("log append", log_file) as span, file_lock(f"{log_file}.lock"):
+        if span is not None: span['bytes'] = len(line)
+        is_new_log = not os.path.exists(log_file)
+        if is_new_log:
+            _migrate_legacy_log(log_file)
+            _ensure_log_is_ignored(os.path.dirname(log_file))
+        _rotate_if_needed(log_file)
+        # Una sola escritura en modo O_APPEND: una caida nunca deja entradas mezcladas,
+        # como mucho una ultima linea truncada que la lectura descarta.
+        fd = os.open(log_file, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.lseek(fd, 0, os.SEEK_END)
+            if size:
+                os.lseek(fd, size - 1, os.SEEK_SET)
+                if os.read(fd, 1) != b'\n':
+                    line = b'\n' + line # Aisla la linea truncada que dejo una caida previa
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def _read_lines_reversed(path):
+    """Lee un archivo de lineas desde el final, bloque a bloque."""
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    started, bytes_read = time.perf_counter(), 0
+    try:
+        with f:
+            position = f.seek(0, os.SEEK_END)
+            pending = b''
+            while position > 0:
+                read_size = min(_READ_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                lines = (f.read(read_size) + pending).split(b'\n')
+                bytes_read += read_size
+                pending = lines.pop(0)
+                for line in reversed(lines):
+                    if line: yield line
+            if pending: yield pending
+    finally:
+        profiling.record_span("log read", path, started, bytes_read)
+
+def iter_log_entries(limit=None, since=None, command=None, failed=False, repo=None):
+    """
+    Recorre el historial de operaciones del mas reciente al mas antiguo, leyendo desde el
+    final del archivo, de modo que las ultimas N entradas cuestan O(N).
+    """
+    log_file = get_log_file_path(repo)
+    if not os.path.exists(log_file) and os.path.exists(os.path.join(os.path.dirname(log_file), LEGACY_LOG_FILE_NAME)):
+        with file_lock(f"{log_file}.lock"):
+            _migrate_legacy_log(log_file)
+    count = 0
+    for path in _rotated_log_files(log_file):
+        for raw in _read_lines_reversed(path):
+            try:
+                entry = json.loads(raw)
+                timestamp = datetime.fromisoformat(entry["timestamp"])
+            except (ValueError, KeyError, TypeError):
+                continue # Linea truncada por una caida o editada a mano
+            if since and timestamp < since: return # El log es cronologico: no hay mas
+            if command and entry.get("command") != command: continue
+            if failed and entry.get("success", True): continue
+            yield entry
+            count += 1
+            if limit is not None and count >= limit: return
+
+def has_log_history(repo=None):
+    """Indica si el vault tiene historial de operaciones (en cualquier formato)."""
+    log_file = get_log_file_path(repo)
+    return any(os.path.exists(path) for path in _rotated_log_files(log_file)) or \
+        os.path.exists(os.path.join(os.path.dirname(log_file), LEGACY_LOG_FILE_NAME))
@@ -0,0 +1,196 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+import click
+from .config import get_setting
+from .filelock import file_lock
+from .git_refs import vaultflow_state_dir
+from .git_session import get_session
+from .logs import log_operation
+from .utils import human_size
+
+DEFAULT_BUDGET = 60 # Segundos de reloj como maximo por ejecucion
+STATS_FILE_NAME = 'maintenance.jsonl'
+COUNTER_FILE_NAME = 'backups-since-maintenance'
+PRUNE_EXPIRE = '2.weeks.ago' # Igual que `git gc`: no toca objetos sueltos recientes
+
+# Pasos en orden de prioridad: si el presupuesto se agota, los ultimos esperan a la siguiente vez
+MAINTENANCE_STEPS = [
+    ('commit-graph', "Actualizar commit-graph (incremental)",
+     ['commit-graph', 'write', '--reachable', '--split', '--changed-paths']),
+    ('loose-objects', "Empaquetar objetos sueltos",
+     ['maintenance', 'run', '--task=loose-objects']),
+    ('pack-refs', "Empaquetar refs (incluye el indice de backups)",
+     ['pack-refs', '--all']),
+    ('repack', "Repack geometrico incremental",
+     ['repack', '-d', '-l', '--geometric=2', '--write-midx']),
+    ('prune', "Eliminar objetos inalcanzables antiguos",
+     ['prune', f'--expire={PRUNE_EXPIRE}']),
+]
+
+def _stats_file(repo=None):
+    state_dir = vaultflow_state_dir(repo)
+    return os.path.join(state_dir, STATS_FILE_NAME) if state_dir else None
+
+def object_stats(repo=None):
+    """Numero de objetos y tamano (en bytes) sueltos y empaquetados, segun `git count-objects -v`."""
+    result = get_session(repo).run(['count-objects', '-v'], check=False, text=True)
+    stats = {}
+    for line in result.stdout.splitlines():
+        key, _, value = line.partition(': ')
+        if value.isdigit(): stats[key.replace('-', '_')] = int(value)
+    return {
+        'loose_objects': stats.get('count', 0),
+        'loose_bytes': stats.get('size', 0) * 1024,
+        'packed_objects': stats.get('in_pack', 0),
+        'packs': stats.get('packs', 0),
+        'pack_bytes': stats.get('size_pack', 0) * 1024,
+        'garbage': stats.get('garbage', 0),
+    }
+
+def read_history(repo=None, limit=None):
+    """Ejecuciones anteriores (la mas reciente primero)."""
+    path = _stats_file(repo)
+    if not path or not os.path.exists(path): return []
+    runs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try: runs.append(json.loads(line))
+            except json.JSONDecodeError: continue
+    runs.reverse()
+    return runs[:limit] if limit else runs
+
+def _last_durations(repo=None):
+    """Duracion de cada paso en su ultima ejecucion completa: sirve para no empezar uno que no cabe."""
+    durations = {}
+    for run in read_history(repo, limit=20):
+        for step in run.get('steps', []):
+            if step['status'] == 'ok': durations.setdefault(step['name'], step['seconds'])
+    return durations
+
+def run_maintenance(repo=None, budget=None):
+    """
+    Ejecuta los pasos de mantenimiento sin pasar de `budget` segundos. Un paso no se empieza si
+    su ultima duracion no cabe en lo que queda, y se corta si se alarga mas de lo previsto.
+    Devuelve None si `repo` no es un repositorio de Git.
+    """
+    budget = budget or get_setting('maintenance_budget_seconds', DEFAULT_BUDGET)
+    session = get_session(repo)
+    state_dir = vaultflow_state_dir(repo)
+    if not state_dir: return None
+    with file_lock(os.path.join(state_dir, 'maintenance.lock')):
+        started = time.monotonic()
+        before = object_stats(repo)
+        estimates = _last_durations(repo)
+        steps = []
+        for name, _, args in MAINTENANCE_STEPS:
+            remaining = budget - (time.monotonic() - started)
+            if remaining <= 0 or estimates.get(name, 0) > remaining:
+                steps.append({'name': name, 'seconds': 0.0, 'status': 'omitido'})
+                continue
+            step_started = time.monotonic()
+            try:
+                result = session.run(args, check=False, timeout=remaining, invalidates=name == 'pack-refs')
+                status = 'ok' if result.returncode == 0 else 'error'
+            except subprocess.TimeoutExpired:
+                status = 'sin tiempo'
+            steps.append({'name': name, 'seconds': round(time.monotonic() - step_started, 3), 'status': status})
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'budget': budget,
+            'duration': round(time.monotonic() - started, 3),
+            'steps': steps,
+            'before': before,
+            'after': object_stats(repo),
+        }
+        with open(os.path.join(state_dir, STATS_FILE_NAME), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        _write_counter(state_dir, 0)
+    return record
+
+def _read_counter(state_dir):
+    try:
+        with open(os.path.join(state_dir, COUNTER_FILE_NAME), 'r', encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def _write_counter(state_dir, value):
+    with open(os.path.join(state_dir, COUNTER_FILE_NAME), 'w', encoding='utf-8') as f:
+        f.write(f"{value}\n")
+
+def after_backup(repo=None):
+    """
+    Cuenta los backups y, cada `maintenance_every_backups` (desactivado por defecto), lanza
+    `vaultflow maintain` en segundo plano para no retrasar el backup.
+    """
+    every = get_setting('maintenance_every_backups', 0)
+    if not every: return False
+    state_dir = vaultflow_state_dir(repo)
+    if not state_dir: return False
+    count = _read_counter(state_dir) + 1
+    if count < every:
+        _write_counter(state_dir, count)
+        return False
+    _write_counter(state_dir, 0)
+    subprocess.Popen(
+        [sys.executable, '-m', 'vaultflow.cli', '--no-banner', 'maintain', '--quiet'],
+        cwd=os.path.abspath(repo or os.getcwd()), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    return True
+
+def _summary(record):
+    before, after = record['before'], record['after']
+    done = sum(1 for step in record['steps'] if step['status'] == 'ok')
+    return (f"Mantenimiento en {record['duration']:.1f}s ({done}/{len(record['steps'])} pasos): "
+            f"objetos sueltos {before['loose_objects']} -> {after['loose_objects']}, "
+            f"packs {before['packs']} -> {after['packs']} ({human_size(after['pack_bytes'])})")
+
+def maintain_vault(repo=None, budget=None, quiet=False):
+    """Mantenimiento incremental con presupuesto de tiempo, mostrando el resultado de cada paso."""
+    record = run_maintenance(repo, budget)
+    if record is None:
+        message = "No es un repositorio de Git: no hay nada que mantener."
+        log_operation("maintain", message, success=False, repo=repo)
+        if not quiet: click.secho(f"✗ {message}", fg="red")
+        return None
+    failed = [step['name'] for step in record['steps'] if step['status'] == 'error']
+    log_operation("maintain", _summary(record), success=not failed, repo=repo)
+    if quiet: return record
+    labels = {name: label for name, label, _ in MAINTENANCE_STEPS}
+    for step in record['steps']:
+        color = {'ok': 'green', 'error': 'red'}.get(step['status'], 'yellow')
+        click.secho(f"  {labels[step['name']]}: {step['status']} ({step['seconds']:.2f}s)", fg=color)
+    click.secho(f"✓ {_summary(record)}" if not failed else f"✗ {_summary(record)}", fg="red" if failed else "green")
+    return record
+
+def show_maintenance_history(repo=None, limit=10):
+    """Tabla con la evolucion de la salud del repositorio en las ultimas ejecuciones."""
+    from rich.console import Console
+    from rich.table import Table
+
+    runs = read_history(repo, limit)
+    if not runs:
+        click.secho("Todavia no se ha ejecutado 'vaultflow maintain' en este vault.", fg="yellow")
+        return
+    table = Table(title="Historial de mantenimiento", title_style="bold magenta", border_style="magenta")
+    table.add_column("Fecha", style="cyan")
+    table.add_column("Duracion", justify="right")
+    table.add_column("Sueltos", justify="right")
+    table.add_column("Empaquetados", justify="right")
+    table.add_column("Packs", justify="right")
+    table.add_column("Tamano packs", justify="right")
+    table.add_column("Pasos omitidos", style="dim")
+    for run in runs:
+        after = run['after']
+        skipped = [step['name'] for step in run['steps'] if step['status'] != 'ok']
+        table.add_row(
+            run['timestamp'].replace('T', ' '), f"{run['duration']:.1f}s",
+            f"{run['before']['loose_objects']} -> {after['loose_objects']}", str(after['packed_objects']),
+            str(after['packs']), human_size(after['pack_bytes']), ", ".join(skipped) or "-",
+        )
+    Console().print(table)
@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Capa de instrumentacion: los procesos de git y la E/S de config y logs se envuelven en
+# spans con su duracion y los bytes movidos. Desactivada (por defecto) cuesta una comprobacion.
+
+TRACE_ENV_VAR = 'VAULTFLOW_TRACE' # Ruta de un archivo JSON Lines donde anadir los spans
+
+_enabled = False
+_spans = []
+_spans_lock = threading.Lock()
+_started = time.perf_counter()
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Descarta los spans registrados y reinicia el reloj del comando."""
+    global _started
+    with _spans_lock:
+        _spans.clear()
+    _started = time.perf_counter()
+
+def elapsed():
+    """Segundos desde el inicio del comando actual."""
+    return time.perf_counter() - _started
+
+@contextmanager
+def span(step, argv=None):
+    """
+    Mide un paso (`git add`, `config write`...). Devuelve un dict en el que el llamador puede
+    anotar `bytes`, o None si la instrumentacion esta desactivada.
+    """
+    if not _enabled:
+        yield None
+        return
+    record = {'step': step, 'argv': argv, 'bytes': None, 'start': time.perf_counter() - _started}
+    try:
+        yield record
+    finally:
+        record['seconds'] = time.perf_counter() - _started - record['start']
+        with _spans_lock:
+            _spans.append(record)
+
+def record_span(step, argv, started, nbytes=None):
+    """Registra un span ya medido (p. ej. un proceso en streaming que termino en otro punto)."""
+    if not _enabled: return
+    now = time.perf_counter()
+    with _spans_lock:
+        _spans.append({'step': step, 'argv': argv, 'bytes': nbytes,
+                       'start': started - _started, 'seconds': now - started})
+
+def get_spans():
+    with _spans_lock:
+        return list(_spans)
+
+def summarize(spans=None):
+    """Agrupa los spans por paso y argv: [(paso, argv, llamadas, segundos, bytes)], del mas lento al mas rapido."""
+    groups = {}
+    for s in get_spans() if spans is None else spans:
+        key = (s['step'], ' '.join(s['argv']) if isinstance(s['argv'], list) else s['argv'] or '')
+        calls, seconds, nbytes = groups.get(key, (0, 0.0, None))
+        if s['bytes'] is not None: nbytes = (nbytes or 0) + s['bytes']
+        groups[key] = (calls + 1, seconds + s['seconds'], nbytes)
+    rows = [(step, argv, calls, seconds, nbytes) for (step, argv), (calls, seconds, nbytes) in groups.items()]
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows
+
+def _covered_seconds():
+    """Tiempo cubierto por algun span, sin contar dos veces los anidados o en paralelo."""
+    covered, end = 0.0, None
+    for start, stop in sorted((s['start'], s['start'] + s['seconds']) for s in get_spans()):
+        if end is None or start > end:
+            covered += stop - start
+            end = stop
+        elif stop > end:
+            covered += stop - end
+            end = stop
+    return covered
+
+def print_profile(command=None):
+    """Desglose por paso en stderr (texto plano: no carga rich para no medirse a si mismo)."""
+    import click
+
+    total = elapsed()
+    rows = summarize()
+    name = f"vaultflow {command}" if command else "vaultflow"
+    click.echo(f"\nPerfil de '{name}': {total * 1000:.1f} ms en total", err=True)
+    click.echo(f"  {'Paso':<20} {'Llamadas':>8} {'ms':>9} {'%':>5} {'Bytes':>10}  Comando", err=True)
+    for step, argv, calls, seconds, nbytes in rows:
+        share = 100 * seconds / total if total else 0
+        shown = argv if len(argv) <= 60 else argv[:57] + '...'
+        click.echo(f"  {step:<20} {calls:>8} {seconds * 1000:>9.1f} {share:>5.1f} "
+                   f"{'-' if nbytes is None else nbytes:>10}  {shown}", err=True)
+    click.echo(f"  {'(resto: python)':<20} {'':>8} {max(total - _covered_seconds(), 0) * 1000:>9.1f}", err=True)
+
+def write_trace(path, command=None):
+    """Anade los spans del comando a un archivo JSON Lines, uno por linea, para agregarlos despues."""
+    base = {'timestamp': datetime.now().isoformat(), 'pid': os.getpid(), 'command': command,
+            'cwd': os.getcwd()}
+    lines = [json.dumps({**base, **s}, ensure_ascii=False) for s in get_spans()]
+    lines.append(json.dumps({**base, 'step': 'total', 'argv': None, 'bytes': None, 'start': 0.0,
+                             'seconds': elapsed()}, ensure_ascii=False))
+    try:
+        with open(os.path.expanduser(path), 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+    except OSError:
+        pass # La traza nunca debe hacer fallar el comando
@@ -0,0 +1,107 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import click
+from .config import get_current_vault_info, get_managed_vaults, get_vault_name_from_path, is_managed_vault
+from .git_utils import get_backup_commits, get_last_commit, get_repo_status
+from .logs import iter_log_entries
+
+# Salida para maquinas (`--json`): este modulo no importa rich ni pyfiglet, asi que un
+# `vaultflow status --json` lanzado cada pocos segundos solo paga por git y por el JSON.
+
+CHANGE_CATEGORIES = ('staged', 'modified', 'untracked')
+
+def collect_status(repo=None, backups_limit=5):
+    """
+    Reune la informacion del estado de un vault. El estado de git (rama, upstream y cambios)
+    sale de un solo `git status`; el ultimo commit y los backups recientes se consultan en
+    paralelo mientras tanto.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        last_commit_future = executor.submit(get_last_commit, repo)
+        backups_future = executor.submit(get_backup_commits, backups_limit, repo)
+        repo_status = get_repo_status(repo) or {}
+        vault_info = get_current_vault_info(repo)
+        return {
+            'vault': vault_info,
+            'git': repo_status,
+            'last_commit': last_commit_future.result(),
+            'backups': backups_future.result(),
+        }
+
+def backup_record(backup):
+    """Backup con fecha ISO 8601 (UTC) en lugar de la fecha formateada para la terminal."""
+    return {'hash': backup['hash'], 'oid': backup['oid'], 'timestamp': backup['timestamp'], 'message': backup['message'],
+            'summary': backup['summary']}
+
+def status_data(repo=None):
+    """Estado de un vault como datos: rama, ahead/behind, cambios por categoria y ultimo backup."""
+    status = collect_status(repo, backups_limit=1)
+    vault, git = status['vault'], status['git']
+    paths = git.get('paths') or {key: [] for key in CHANGE_CATEGORIES}
+    changes = {key: {'count': len(paths[key]), 'paths': paths[key]} for key in CHANGE_CATEGORIES}
+    return {
+        'vault': vault['name'],
+        'path': vault['path'],
+        'managed': vault['is_managed'],
+        'ok': bool(git),
+        'branch': git.get('branch'),
+        'head': git.get('oid'),
+        'upstream': git.get('upstream'),
+        'ahead': git.get('ahead', 0),
+        'behind': git.get('behind', 0),
+        'clean': bool(git) and not any(c['count'] for c in changes.values()),
+        'changes': changes,
+        'last_backup': backup_record(status['backups'][0]) if status['backups'] else None,
+    }
+
+def vault_records():
+    """Vaults gestionados, marcando el del directorio actual y los que ya no existen."""
+    current = os.path.abspath(os.getcwd())
+    for path in get_managed_vaults():
+        yield {
+            'name': get_vault_name_from_path(path),
+            'path': path,
+            'exists': os.path.isdir(path),
+            'current': os.path.abspath(path) == current,
+        }
+
+def print_json(data):
+    click.echo(json.dumps(data, ensure_ascii=False))
+
+def print_ndjson(records):
+    """Una linea JSON por registro (NDJSON), escrita a medida que se genera."""
+    for record in records:
+        click.echo(json.dumps(record, ensure_ascii=False))
+
+def _require_managed_vault():
+    if is_managed_vault(): return True
+    print_json({'error': "Este directorio no esta gestionado por vaultflow."})
+    raise SystemExit(1)
+
+def status_json(all_vaults=False, workers=None):
+    """`status --json`: un objeto para el vault actual o NDJSON con todos los vaults gestionados."""
+    if not all_vaults:
+        _require_managed_vault()
+        print_json(status_data())
+        return
+    vaults = get_managed_vaults()
+    with ThreadPoolExecutor(max_workers=workers or 4) as executor:
+        print_ndjson(executor.map(lambda path: status_data(path) if os.path.isdir(path) else
+                                  {'vault': get_vault_name_from_path(path), 'path': path, 'ok': False}, vaults))
+
+def backups_json(page=1, per_page=15, since=None, until=None):
+    """`backups --json`: NDJSON, del backup mas reciente al mas antiguo."""
+    _require_managed_vault()
+    if until and until.time() == until.min.time():
+        until = until.replace(hour=23, minute=59, second=59)  # Igual que en la salida para la terminal
+    print_ndjson(backup_record(b) for b in get_backup_commits(per_page, page=page, since=since, until=until))
+
+def log_json(limit=None, since=None, command=None, failed=False):
+    """`log --json`: NDJSON con las entradas del historial tal como se guardan."""
+    _require_managed_vault()
+    print_ndjson(iter_log_entries(limit=limit, since=since, command=command, failed=failed))
+
+def vaults_json():
+    """`vaults --json`: NDJSON con los vaults gestionados."""
+    print_ndjson(vault_records())
@@ -0,0 +1,166 @@
+import fnmatch
+import hashlib
+import os
+import tempfile
+import click
+from .attachments import POINTER_MAX_SIZE, blob_path, get_store_dir, parse_pointer
+from .git_session import get_session
+from .logs import log_operation
+
+_GLOB_CHARS = '*?['
+_COPY_CHUNK = 1024 * 1024
+
+def resolve_backup(spec, repo=None):
+    """oid completo del commit al que apunta `spec` (hash abreviado, rama, ref...) o None."""
+    info = get_session(repo).object_info(f'{spec}^{{commit}}')
+    return info[0] if info else None
+
+def _matches(path, pattern):
+    pattern = pattern.strip('/')
+    if not pattern: return True
+    return path == pattern or path.startswith(pattern + '/') or fnmatch.fnmatchcase(path, pattern) \
+        or any(fnmatch.fnmatchcase(path[:i], pattern) for i, c in enumerate(path) if c == '/')
+
+def list_backup_files(commit, patterns=None, repo=None):
+    """
+    Archivos del backup que coinciden con `patterns` (rutas, carpetas o globs), como
+    [(modo, oid, tamano o None, ruta)]. Las rutas literales se filtran en git, sin recorrer todo el arbol.
+    """
+    patterns = [p.strip('/') for p in patterns or []]
+    literal = bool(patterns) and not any(c in p for p in patterns for c in _GLOB_CHARS)
+    args = ['ls-tree', '-r', '-l', '-z', '--full-tree', commit]
+    if literal: args += ['--', *patterns]
+    result = get_session(repo).run(args, check=False)
+    if result.returncode != 0: return []
+    entries = []
+    for record in result.stdout.split(b'\0'):
+        if not record: continue
+        meta, _, raw_path = record.partition(b'\t')
+        mode, kind, oid, size = meta.decode().split()
+        if kind != 'blob': continue  # Submodulos
+        path = os.fsdecode(raw_path)
+        if patterns and not literal and not any(_matches(path, p) for p in patterns): continue
+        entries.append((mode, oid, int(size) if size.isdigit() else None, path))  # 'BAD': el objeto falta
+    return entries
+
+def _hash_file(path, hasher):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(_COPY_CHUNK)
+            if not chunk: break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def _git_blob_oid(path, size, oid_length):
+    """oid que tendria el archivo como blob de git, calculado sin lanzar `git hash-object`."""
+    hasher = hashlib.sha256() if oid_length == 64 else hashlib.sha1()
+    hasher.update(b'blob %d\0' % size)
+    return _hash_file(path, hasher)
+
+def _is_up_to_date(target, mode, oid, size, pointer, link_target):
+    """Compara por tamano y, solo si coincide, por hash: los archivos iguales no se reescriben."""
+    try:
+        st = os.lstat(target)
+    except FileNotFoundError:
+        return False
+    if mode == '120000':
+        return os.path.islink(target) and os.fsencode(os.readlink(target)) == link_target
+    if os.path.islink(target) or not os.path.isfile(target): return False
+    if pointer:
+        return st.st_size == pointer[1] and _hash_file(target, hashlib.sha256()) == pointer[0]
+    return st.st_size == size and _git_blob_oid(target, size, len(oid)) == oid
+
+def _write_atomically(target, write, executable):
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".vaultflow-restore-")
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            write(out)
+        os.chmod(tmp_path, 0o755 if executable else 0o644)
+        if os.path.isdir(target) and not os.path.islink(target): raise IsADirectoryError(target)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+
+def _copy_from_store(source):
+    def write(out):
+        with open(source, 'rb') as src:
+            while True:
+                chunk = src.read(_COPY_CHUNK)
+                if not chunk: break
+                out.write(chunk)
+    return write
+
+def _read_blob(session, oid):
+    obj = session.read_object(oid)
+    if obj is None: raise OSError(f"El objeto {oid[:12]} no esta en el repositorio")
+    return obj[2]
+
+def _stream_blob(session, oid, out):
+    if session.stream_object(oid, out) is None:
+        raise OSError(f"El objeto {oid[:12]} no esta en el repositorio")  # Si no, quedaria un archivo vacio
+
+def restore_files(backup, patterns=None, destination=None, repo=None):
+    """
+    Restaura desde un backup solo los archivos seleccionados, leyendo los blobs en streaming.
+    No toca HEAD ni el indice, y se salta los archivos cuyo contenido ya coincide.
+    Devuelve un dict con restored, unchanged, missing (adjuntos fuera del store),
+    failed [(ruta, error)] y unmatched (patrones sin resultados), o None si el backup no existe.
+    """
+    commit = resolve_backup(backup, repo)
+    if not commit: return None
+    session = get_session(repo)
+    base = os.path.abspath(destination or repo or os.getcwd())
+    store_dir = get_store_dir()
+    entries = list_backup_files(commit, patterns, repo)
+    report = {'commit': commit, 'restored': [], 'unchanged': [], 'missing': [], 'failed': [],
+              'unmatched': [p for p in patterns or [] if not any(_matches(e[3], p) for e in entries)]}
+    for mode, oid, size, path in entries:
+        target = os.path.join(base, path)
+        try:
+            small = _read_blob(session, oid) if mode == '120000' or (size is not None and size <= POINTER_MAX_SIZE) else None
+            pointer = parse_pointer(small) if small is not None and mode != '120000' else None
+            if _is_up_to_date(target, mode, oid, size, pointer, small):
+                report['unchanged'].append(path); continue
+            if mode == '120000':
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if os.path.lexists(target): os.remove(target)
+                os.symlink(os.fsdecode(small), target)
+            elif pointer:
+                source = blob_path(store_dir, pointer[0])
+                if not os.path.exists(source):
+                    report['missing'].append(path); continue
+                _write_atomically(target, _copy_from_store(source), mode == '100755')
+            elif small is not None:
+                _write_atomically(target, lambda out: out.write(small), mode == '100755')
+            else:
+                _write_atomically(target, lambda out: _stream_blob(session, oid, out), mode == '100755')
+            report['restored'].append(path)
+        except OSError as e:
+            report['failed'].append((path, str(e)))
+    return report
+
+def restore_from_backup(backup, patterns=None, destination=None, repo=None):
+    """Restaura archivos de un backup e informa del resultado."""
+    report = restore_files(backup, patterns, destination, repo)
+    if report is None:
+        click.secho(f"✗ No se encontro el backup '{backup}'. Consulta 'vaultflow backups'.", fg="red")
+        return None
+    short = report['commit'][:7]
+    for pattern in report['unmatched']:
+        click.secho(f"! '{pattern}' no existe en el backup {short}.", fg="yellow")
+    for path in report['restored']:
+        click.secho(f"  ✓ {path}", fg="green")
+    for path in report['missing']:
+        click.secho(f"  ✗ {path}: el adjunto no esta en el store de este equipo.", fg="red")
+    for path, error in report['failed']:
+        click.secho(f"  ✗ {path}: {error}", fg="red")
+    where = f" en {os.path.abspath(destination)}" if destination else ""
+    message = (f"Backup {short}: {len(report['restored'])} archivo(s) restaurado(s){where}, "
+               f"{len(report['unchanged'])} sin cambios.")
+    success = not (report['missing'] or report['failed'])
+    click.secho(f"{'✓' if success else '✗'} {message}", fg="green" if success else "red")
+    log_operation("restore", message, success=success, repo=repo)
+    return report
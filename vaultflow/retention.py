@@ -0,0 +1,212 @@
+import os
+import subprocess
+import time
+from datetime import datetime
+import click
+from .backup_index import BACKUP_REF_PREFIX, list_backup_refs, parse_ref_name, backup_ref_name
+from .config import get_setting
+from .git_utils import get_current_branch
+from .git_session import get_session
+from .logs import log_operation
+from .snapshot import SNAPSHOT_REF_PREFIX
+from .utils import human_size
+
+# Todos los backups de las ultimas 48 horas, uno por dia durante 60 dias y despues uno por semana.
+# Se puede cambiar en ~/.vaultflow/config.json con la clave "backup_retention".
+RETENTION_DEFAULTS = {'keep_all_hours': 48, 'daily_days': 60}
+BACKUP_SUBJECT = "Backup vaultflow"
+COMPACTED_TRAILER = "Vaultflow-Compacted"
+IDLE_BRANCH = 'experiment' # La crea `vaultflow init` en HEAD; sin commits propios se mueve con la rama
+
+def retention_policy():
+    policy = dict(RETENTION_DEFAULTS)
+    policy.update(get_setting('backup_retention', {}) or {})
+    return policy
+
+def _period(timestamp, now, policy):
+    """Periodo al que pertenece un backup: None (se conserva siempre), un dia o una semana ISO."""
+    age = now - timestamp
+    if age < policy['keep_all_hours'] * 3600: return None
+    day = datetime.fromtimestamp(timestamp).date()
+    if age < policy['daily_days'] * 86400: return ('dia', day)
+    return ('semana',) + tuple(day.isocalendar()[:2])
+
+def _first_parent_history(session):
+    """[(oid, padres, fecha, compactados, asunto)] de la rama actual, del mas antiguo al mas reciente."""
+    fields = f'%H%x09%P%x09%ct%x09%(trailers:key={COMPACTED_TRAILER},valueonly,separator=%x2C)%x09%s'
+    result = session.run(['log', '--first-parent', '--reverse', '-z', f'--format={fields}', 'HEAD'], text=True)
+    history = []
+    for record in result.stdout.split('\0'):
+        if not record: continue
+        oid, parents, timestamp, compacted, subject = record.split('\t', 4)
+        count = sum(int(v) for v in compacted.split(',') if v.strip().isdigit())
+        history.append((oid, parents.split(), int(timestamp), count, subject))
+    return history
+
+def plan_prune(repo=None, now=None):
+    """
+    Decide que backups se conservan. De cada racha de backups consecutivos (sin commits manuales
+    ni fusiones en medio) se conserva el ultimo de cada periodo; su arbol ya contiene los cambios
+    de los backups que absorbe. Devuelve None si no hay nada que compactar.
+    """
+    session = get_session(repo)
+    policy = retention_policy()
+    now = now or time.time()
+    history = _first_parent_history(session)
+    keep = [True] * len(history)
+    absorbed = [0] * len(history)
+    for i, (oid, parents, timestamp, compacted, subject) in enumerate(history):
+        is_backup = subject.startswith(BACKUP_SUBJECT) and len(parents) <= 1
+        if not is_backup: continue
+        period = _period(timestamp, now, policy)
+        following = history[i + 1] if i + 1 < len(history) else None
+        if period is None or following is None: continue
+        next_is_backup = following[4].startswith(BACKUP_SUBJECT) and len(following[1]) <= 1
+        if next_is_backup and _period(following[2], now, policy) == period:
+            keep[i] = False
+            absorbed[i + 1] += absorbed[i] + 1 + compacted
+    dropped = [i for i, kept in enumerate(keep) if not kept]
+    if not dropped: return None
+    return {
+        'history': history,
+        'keep': keep,
+        'absorbed': absorbed,
+        'first': dropped[0],
+        'dropped': [history[i][0] for i in dropped],
+    }
+
+def classify_refs(session, plan, branch):
+    """
+    Refs (aparte de la rama) que contienen la historia a reescribir: (bloqueantes, movibles).
+    El indice de backups, el stash y los snapshots de vaultflow (solo locales) no bloquean; la
+    rama 'experiment' sin commits propios se reescribe con la rama (movibles: {ref: indice}).
+    """
+    first = plan['history'][plan['first']][0]
+    positions = {oid: i for i, (oid, *_) in enumerate(plan['history'])}
+    result = session.run(['for-each-ref', '--contains', first, '--format=%(refname) %(objectname)'], text=True)
+    blocking, movable = [], {}
+    for line in result.stdout.splitlines():
+        name, oid = line.rsplit(' ', 1)
+        if name == f'refs/heads/{branch}' or name.startswith((BACKUP_REF_PREFIX, 'refs/stash', SNAPSHOT_REF_PREFIX)): continue
+        if name == f'refs/heads/{IDLE_BRANCH}' and oid in positions: movable[name] = positions[oid]
+        else: blocking.append(name)
+    return blocking, movable
+
+def history_bytes(session, plan, branch, movable=()):
+    """
+    Bytes en disco de los commits eliminados y de los objetos que solo ellos referencian: no
+    cuenta lo que siga alcanzable desde otros refs (snapshots, stash, otras ramas), que no se libera.
+    """
+    kept_trees = [f"^{oid}^{{tree}}" for i, (oid, *_) in enumerate(plan['history']) if plan['keep'][i]]
+    result = session.run(['for-each-ref', '--format=%(refname) %(objectname)'], text=True)
+    rewritten = (f'refs/heads/{branch}', *movable)
+    others = [f"^{oid}" for name, oid in (line.rsplit(' ', 1) for line in result.stdout.splitlines())
+              if name not in rewritten and not name.startswith(BACKUP_REF_PREFIX)]
+    stdin = '\n'.join(plan['dropped'] + kept_trees + others) + '\n'
+    result = session.run(['rev-list', '--objects', '--no-walk', '--disk-usage', '--stdin'], input=stdin.encode(), text=False)
+    return int(result.stdout.strip() or 0)
+
+def _identity_env(raw_commit):
+    """Conserva autor y fecha del commit original al recrearlo con `commit-tree`."""
+    env = {}
+    headers = raw_commit.split(b'\n\n', 1)[0].decode('utf-8', errors='replace')
+    for line in headers.splitlines():
+        role, _, value = line.partition(' ')
+        if role not in ('author', 'committer'): continue
+        name, _, rest = value.partition(' <')
+        email, _, date = rest.partition('> ')
+        prefix = f"GIT_{role.upper()}_"
+        env.update({prefix + 'NAME': name, prefix + 'EMAIL': email, prefix + 'DATE': date})
+    return env
+
+def _with_trailer(message, count):
+    lines = [line for line in message.rstrip('\n').split('\n') if not line.startswith(f"{COMPACTED_TRAILER}:")]
+    body = '\n'.join(lines).rstrip('\n')
+    last_paragraph = body.split('\n\n')[-1] if '\n\n' in body else ''
+    separator = '\n' if last_paragraph and all(': ' in line for line in last_paragraph.split('\n')) else '\n\n'
+    return f"{body}{separator}{COMPACTED_TRAILER}: {count}\n"
+
+def rewrite_history(session, plan):
+    """Recrea los commits conservados desde el primer backup eliminado. Devuelve {oid_viejo: oid_nuevo}."""
+    history = plan['history']
+    first = plan['first']
+    new_parent = history[first][1][0] if history[first][1] else None
+    mapping = {}
+    for i in range(first, len(history)):
+        oid, parents = history[i][0], history[i][1]
+        if not plan['keep'][i]: continue
+        _, _, raw = session.read_object(oid)
+        message = raw.split(b'\n\n', 1)[1].decode('utf-8', errors='replace') if b'\n\n' in raw else ''
+        if plan['absorbed'][i]: message = _with_trailer(message, plan['absorbed'][i] + history[i][3])
+        args = ['commit-tree', f'{oid}^{{tree}}']
+        for parent in ([new_parent] if new_parent else []) + parents[1:]:
+            args += ['-p', parent]
+        result = session.run(args, input=message.encode('utf-8'), env=dict(os.environ, **_identity_env(raw)), text=False)
+        new_parent = mapping[oid] = result.stdout.decode().strip()
+    return mapping
+
+def _moved_refs(plan, mapping, movable):
+    """Destino de cada ref movible: su commit reescrito o, si se elimina, el que lo absorbe."""
+    history, keep = plan['history'], plan['keep']
+    moves = []
+    for refname, index in movable.items():
+        kept = next(i for i in range(index, len(history)) if keep[i])
+        moves.append((refname, history[index][0], mapping.get(history[kept][0], history[kept][0])))
+    return moves
+
+def _update_refs(session, branch, old_head, new_head, mapping, dropped, repo, moves=()):
+    """Mueve la rama (solo si nadie la cambio entretanto), los refs movibles y el indice de backups en una transaccion."""
+    dropped = set(dropped)
+    commands = [f"update refs/heads/{branch} {new_head} {old_head}\n"]
+    commands += [f"update {refname} {new} {old}\n" for refname, old, new in moves]
+    for refname, oid in list_backup_refs(repo):
+        if oid in dropped:
+            commands.append(f"delete {refname} {oid}\n")
+        elif oid in mapping:
+            commands.append(f"delete {refname} {oid}\n")
+            commands.append(f"create {backup_ref_name(mapping[oid], parse_ref_name(refname))} {mapping[oid]}\n")
+    session.run(['update-ref', '--stdin'], input=''.join(commands).encode(), invalidates=True)
+
+def prune_backups(repo=None, dry_run=False, force=False):
+    """Compacta los backups antiguos segun la politica de retencion."""
+    session = get_session(repo)
+    branch = get_current_branch(repo)
+    if not branch or branch == 'HEAD':
+        click.secho("✗ Hace falta estar en una rama (no en un HEAD separado) para compactar backups.", fg="red")
+        return
+    plan = plan_prune(repo)
+    if not plan:
+        click.secho("✓ No hay backups que compactar segun la politica de retencion.", fg="green")
+        return
+    total_backups = sum(1 for c in plan['history'] if c[4].startswith(BACKUP_SUBJECT))
+    blocking, movable = classify_refs(session, plan, branch)
+    size = history_bytes(session, plan, branch, movable)
+    summary = (f"{len(plan['dropped'])} de {total_backups} backups de '{branch}' "
+               f"(~{human_size(size)} de historial)")
+    if blocking:
+        pushed = [name for name in blocking if name.startswith(('refs/remotes/', 'refs/vaultflow/bundles/', 'refs/vaultflow/targets/'))]
+        kind = "ya se envio al remoto" if pushed else "la comparten otras ramas"
+        blocking_message = f"La historia a compactar {kind}: {', '.join(blocking[:5])}"
+    if dry_run:
+        click.echo(f"Se eliminarian al compactar {summary}.")
+        if blocking: click.secho(f"! {blocking_message}; haria falta --force.", fg="yellow")
+        return
+    if blocking:
+        if not force:
+            click.secho(f"✗ {blocking_message}.", fg="red")
+            click.secho("  Reescribirla obligaria a forzar el push. Usa --force si estas seguro.", fg="red")
+            log_operation("prune-backups", blocking_message, success=False, repo=repo)
+            return
+        click.secho(f"! {blocking_message}; se reescribe igualmente (--force).", fg="yellow")
+    old_head = plan['history'][-1][0]
+    mapping = rewrite_history(session, plan)
+    try:
+        _update_refs(session, branch, old_head, mapping[old_head], mapping, plan['dropped'], repo,
+                     _moved_refs(plan, mapping, movable))
+    except subprocess.CalledProcessError:
+        click.secho("✗ La rama cambio mientras se compactaba (¿un backup en curso?). Vuelve a intentarlo.", fg="red")
+        log_operation("prune-backups", "La rama cambio durante la compactacion", success=False, repo=repo)
+        return
+    click.secho(f"✓ Compactados {summary}.", fg="green")
+    click.secho("  El espacio se libera cuando Git expire el reflog y ejecute el mantenimiento.", fg="cyan")
+    log_operation("prune-backups", f"Compactados {summary}", repo=repo)
@@ -0,0 +1,149 @@
+import os
+import shutil
+from datetime import datetime
+from .git_refs import find_git_dir, open_refs
+from .git_session import get_session
+from .summary import summarize_staged, commit_message_with_summary
+
+SNAPSHOT_REF_PREFIX = 'refs/vaultflow/snapshots/' # Destino opcional que no mueve la rama del usuario
+
+def _resolve(repo, name):
+    reader = open_refs(repo)
+    if reader:
+        try: return reader.resolve(name)
+        except (OSError, ValueError): pass
+    info = get_session(repo).object_info(name)
+    return info[0] if info else None
+
+def _head_ref(repo):
+    """Ref simbolico de HEAD (`refs/heads/<rama>`), tambien si la rama aun no tiene commits."""
+    reader = open_refs(repo)
+    if reader:
+        try:
+            kind, value = reader.head()
+            return value if kind == 'ref' else None
+        except (OSError, ValueError): pass
+    result = get_session(repo).run(['symbolic-ref', '-q', 'HEAD'], check=False, text=True)
+    return result.stdout.strip() or None
+
+def snapshot_ref(name):
+    """Nombre completo del ref de destino: 'diario' -> refs/vaultflow/snapshots/diario."""
+    return name if name.startswith('refs/') else SNAPSHOT_REF_PREFIX + name
+
+def _seed_index(git_dir, tmp_index):
+    """
+    Copia el indice real solo para aprovechar su cache de stat: `read-tree --reset` lo lleva
+    despues al arbol del padre conservando esos datos, asi `add -A` solo rehashea lo que cambio.
+    """
+    real_index = os.path.join(git_dir, 'index')
+    if os.path.exists(real_index): shutil.copyfile(real_index, tmp_index)
+
+def _plan_index_update(session, old, new):
+    """
+    Que hay que cambiar en el indice del usuario para llevarlo de `old` a `new` como haria un
+    checkout: las rutas que cambiaron y que el usuario no tenia preparadas (su entrada coincide
+    con `old`). Devuelve (entradas para `update-index --index-info`, rutas preparadas que lo
+    impiden), o None si no se pudo leer el indice.
+    """
+    diff = session.run(['diff-tree', '-r', '-z', '--no-renames', old, new], check=False)
+    if diff.returncode != 0: return None
+    fields = diff.stdout.split(b'\0')
+    changes = {}
+    for header, path in zip(fields[0::2], fields[1::2]):
+        old_mode, new_mode, old_oid, new_oid, _ = header.lstrip(b':').split(b' ')
+        changes[path] = (old_mode, old_oid, new_mode, new_oid)
+    if not changes: return [], 0
+    env = dict(os.environ, GIT_LITERAL_PATHSPECS='1')
+    listing = session.run(['ls-files', '-s', '-z', '--', *(p.decode('utf-8', 'surrogateescape') for p in changes)],
+                          check=False, env=env)
+    if listing.returncode != 0: return None
+    index = {}
+    for entry in filter(None, listing.stdout.split(b'\0')):
+        info, path = entry.split(b'\t', 1)
+        mode, oid, stage = info.split(b' ')
+        index[path] = (mode, oid) if stage == b'0' and path not in index else None  # Con conflictos: no se toca
+    updates, staged = [], 0
+    for path, (old_mode, old_oid, new_mode, new_oid) in changes.items():
+        current = index.get(path, (b'000000', old_oid) if int(old_mode) == 0 else None)
+        if current == (new_mode, new_oid): continue  # Ya preparado tal como queda en el backup
+        if current != (old_mode, old_oid):
+            staged += 1
+            continue
+        updates.append((new_mode if int(new_mode) else b'0') + b' ' + new_oid + b'\t' + path)
+    return updates, staged
+
+def _apply_index_update(session, updates):
+    if not updates: return True
+    result = session.run(['update-index', '-z', '--index-info'], input=b'\0'.join(updates) + b'\0',
+                         check=False, invalidates=True)
+    return result.returncode == 0
+
+def _count_staged(session, parent, env):
+    """Archivos del indice temporal que difieren de `parent` (si el resumen no se pudo calcular)."""
+    listing = ['diff-index', '--cached', '--name-only', '-z', parent] if parent else ['ls-files', '-z']
+    result = session.run(listing, check=False, env=env)
+    if result.returncode != 0: return None
+    return len([p for p in result.stdout.split(b'\0') if p])
+
+def snapshot_backup(message=None, repo=None, ref=None, when=None):
+    """
+    Crea un commit de backup con el estado del working tree usando un indice temporal:
+    el indice del usuario no se reescribe ni pierde lo preparado. Por defecto avanza la rama
+    actual; con `ref` (o si el usuario tiene preparado un contenido distinto al del backup en
+    algun archivo) el commit va a un ref de snapshots y la rama no se mueve.
+    Devuelve (resultado, mensaje, oid, archivos) con resultado 'ok', 'clean' o 'error'.
+    """
+    session = get_session(repo)
+    found = find_git_dir(os.path.abspath(repo or os.getcwd()))
+    if not found: return 'error', "No es un repositorio de Git.", None, 0
+    git_dir = found[0]
+    branch_ref = _head_ref(repo)
+    target = snapshot_ref(ref) if ref else branch_ref
+    if not target: return 'error', "HEAD esta separado: indica un ref de destino para el snapshot.", None, 0
+    head = _resolve(repo, 'HEAD')
+    old = _resolve(repo, target)
+    parent = old or head  # Un ref de snapshots nuevo arranca desde HEAD para compartir historia
+
+    when = when or datetime.now()
+    message = message or f"Backup vaultflow - {when.strftime('%Y-%m-%d %H:%M:%S')}"
+    tmp_index = os.path.join(git_dir, f'index.vaultflow-snapshot.{os.getpid()}')
+    env = dict(os.environ, GIT_INDEX_FILE=tmp_index)
+    try:
+        _seed_index(git_dir, tmp_index)
+        seed = ['read-tree', '--reset', parent] if parent else ['read-tree', '--empty']
+        if session.run(seed, check=False, env=env).returncode != 0:
+            return 'error', "No se pudo preparar el indice temporal.", None, 0
+        if session.run(['add', '-A'], check=False, env=env).returncode != 0:
+            return 'error', "git add fallo sobre el indice temporal.", None, 0
+        summary = summarize_staged(repo, base=parent, env=env)  # Una sola comparacion: archivos y resumen
+        files = summary['files'] if summary else _count_staged(session, parent, env)
+        if files is None: return 'error', "No se pudo comparar el indice temporal.", None, 0
+        if not files: return 'clean', "No habia cambios para respaldar.", None, 0
+        tree = session.run(['write-tree'], env=env, text=True).stdout.strip()
+    finally:
+        if os.path.exists(tmp_index): os.remove(tmp_index)
+
+    commit_args = ['commit-tree', tree, '-m', commit_message_with_summary(message, summary)] + (['-p', parent] if parent else [])
+    commit = session.run(commit_args, check=False, text=True)
+    if commit.returncode != 0: return 'error', f"commit-tree fallo: {commit.stderr.strip()}", None, 0
+    oid = commit.stdout.strip()
+    plan, note = None, ''
+    if target == branch_ref and old:
+        plan = _plan_index_update(session, old, oid)
+        if plan is None or plan[1]:
+            # Mover la rama dejaria lo preparado como una vuelta atras del backup en el siguiente
+            # `git commit`: el snapshot va a su ref y la rama no se toca
+            target = snapshot_ref(branch_ref[len('refs/heads/'):])
+            old = _resolve(repo, target)
+            reason = f"{plan[1]} archivo(s) preparado(s) con otro contenido" if plan else "no se pudo leer el indice"
+            note = f" (en {target}: {reason}, la rama no se mueve)"
+            plan = None
+    # Actualizacion atomica: si alguien movio el ref mientras tanto, no se pisa su trabajo
+    # ('' exige que el ref aun no exista)
+    update = session.run(['update-ref', '-m', f'vaultflow snapshot: {message}', target, oid, old or ''],
+                         check=False, text=True, invalidates=True)
+    if update.returncode != 0:
+        return 'error', f"'{target}' cambio durante el backup; vuelve a intentarlo.", None, 0
+    if plan and not _apply_index_update(session, plan[0]):
+        note = " (no se pudo actualizar el indice; revisa 'git status')"
+    return 'ok', message + note, oid, files
@@ -0,0 +1,172 @@
+import json
+import os
+import re
+import subprocess
+from .git_refs import vaultflow_state_dir
+from .git_session import get_session
+
+# Resumen de cada backup (notas nuevas, editadas, renombradas y borradas, y cuantas palabras,
+# enlaces y tags cambian) calculado con un solo `git diff --cached` y guardado como trailer del commit,
+# asi `vaultflow backups` lo muestra sin volver a comparar nada.
+
+SUMMARY_TRAILER = 'Vaultflow-Summary'
+NOTE_EXTENSIONS = ('.md',)
+METADATA_CACHE_FILE = 'note-metadata.json' # En el directorio de estado, por oid del blob
+METADATA_CACHE_LIMIT = 20000 # Entradas; se descartan las mas antiguas
+_EMPTY_META = (0, (), ())
+
+_FRONTMATTER_RE = re.compile(r'\A---\n.*?\n---\n', re.S)
+_LINK_RE = re.compile(r'\[\[([^\]|#^\n]+)')
+_TAG_RE = re.compile(r'(?<![\w&/#])#([^\W\d][\w/-]*)')
+_SUMMARY_RE = re.compile(r'notes \+(\d+) ~(\d+) >(\d+) -(\d+); words \+(\d+) -(\d+); links \+(\d+) -(\d+); tags \+(\d+) -(\d+); lines \+(\d+) -(\d+); files (\d+)')
+
+def note_metadata(data):
+    """(palabras, enlaces [[...]] salientes, tags) del contenido de una nota."""
+    text = _FRONTMATTER_RE.sub('', data.decode('utf-8', errors='replace').replace('\r\n', '\n'))
+    links = sorted({link.strip() for link in _LINK_RE.findall(text) if link.strip()})
+    return len(text.split()), tuple(links), tuple(sorted(set(_TAG_RE.findall(text))))
+
+class MetadataCache:
+    """Metadatos de notas por oid de blob: un blob nunca cambia, asi que solo se parsean los nuevos."""
+
+    def __init__(self, repo=None):
+        state_dir = vaultflow_state_dir(repo)
+        self.path = os.path.join(state_dir, METADATA_CACHE_FILE) if state_dir else None
+        self.session = get_session(repo)
+        self.entries = {}
+        self.dirty = False
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, oid):
+        if not oid or set(oid) == {'0'}: return _EMPTY_META
+        cached = self.entries.get(oid)
+        if cached: return cached[0], tuple(cached[1]), tuple(cached[2])
+        obj = self.session.read_object(oid)
+        meta = note_metadata(obj[2]) if obj and obj[1] == 'blob' else _EMPTY_META
+        self.entries[oid] = [meta[0], list(meta[1]), list(meta[2])]
+        self.dirty = True
+        return meta
+
+    def save(self):
+        if not self.path or not self.dirty: return
+        entries = list(self.entries.items())[-METADATA_CACHE_LIMIT:]
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(entries), f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass # La cache es solo una optimizacion
+        self.dirty = False
+
+def _parse_diff(output):
+    """
+    Separa la salida de `diff --raw --numstat -z -M` en cambios [(estado, ruta_antes, ruta, oid_antes, oid)]
+    y lineas {ruta: (anadidas, borradas)}. Git escribe primero todos los registros raw.
+    """
+    fields = output.split(b'\0')
+    changes, lines, i = [], {}, 0
+    while i < len(fields) and fields[i]:
+        header = fields[i].decode('utf-8', 'surrogateescape')  # En numstat la ruta va en la cabecera
+        if header.startswith(':'):
+            _, _, old_oid, new_oid, status = header[1:].split(' ')
+            if status[0] in 'RC':
+                old_path, path = fields[i + 1].decode('utf-8', 'surrogateescape'), fields[i + 2].decode('utf-8', 'surrogateescape')
+                i += 3
+            else:
+                old_path = path = fields[i + 1].decode('utf-8', 'surrogateescape')
+                i += 2
+            changes.append((status[0], old_path, path, old_oid, new_oid))
+            continue
+        added, deleted, path = header.split('\t', 2)
+        if not path:  # Renombrado: las dos rutas van en los campos siguientes
+            path = fields[i + 2].decode('utf-8', 'surrogateescape')
+            i += 2
+        if added != '-': lines[path] = (int(added), int(deleted))
+        i += 1
+    return changes, lines
+
+def summarize_staged(repo=None, base=None, env=None):
+    """
+    Resumen de lo que hay en el indice (o en el de `env`) frente a `base` (por defecto, HEAD).
+    Devuelve un dict con las notas por tipo de cambio y los deltas, o None si no se pudo
+    calcular: el resumen es opcional y nunca debe impedir el backup.
+    """
+    try:
+        return _summarize_staged(repo, base, env)
+    except (OSError, ValueError, IndexError, subprocess.SubprocessError):
+        return None
+
+def _summarize_staged(repo, base, env):
+    session = get_session(repo)
+    args = ['diff', '--cached', '--raw', '--numstat', '-z', '-M', '--no-abbrev'] + ([base] if base else [])
+    result = session.run(args, check=False, env=env)
+    if result.returncode != 0: return None
+    changes, lines = _parse_diff(result.stdout)
+    summary = {'added': [], 'modified': [], 'renamed': [], 'deleted': [], 'files': len(changes),
+               'words_added': 0, 'words_removed': 0, 'links_added': 0, 'links_removed': 0,
+               'tags_added': 0, 'tags_removed': 0,
+               'lines_added': sum(a for a, _ in lines.values()), 'lines_removed': sum(d for _, d in lines.values())}
+    cache = MetadataCache(repo)
+    for status, old_path, path, old_oid, new_oid in changes:
+        is_note = path.lower().endswith(NOTE_EXTENSIONS)
+        was_note = old_path.lower().endswith(NOTE_EXTENSIONS)
+        if not (is_note or was_note): continue
+        before = cache.get(old_oid) if was_note and status != 'A' else _EMPTY_META
+        after = cache.get(new_oid) if is_note and status != 'D' else _EMPTY_META
+        if status == 'A': summary['added'].append(path)
+        elif status == 'D': summary['deleted'].append(path)
+        elif status in 'RC': summary['renamed'].append([old_path, path])
+        else: summary['modified'].append(path)
+        words = after[0] - before[0]
+        summary['words_added' if words > 0 else 'words_removed'] += abs(words)
+        summary['links_added'] += len(set(after[1]) - set(before[1]))
+        summary['links_removed'] += len(set(before[1]) - set(after[1]))
+        summary['tags_added'] += len(set(after[2]) - set(before[2]))
+        summary['tags_removed'] += len(set(before[2]) - set(after[2]))
+    cache.save()
+    return summary
+
+def format_trailer(summary):
+    """Linea `Vaultflow-Summary: ...` para el mensaje del commit (formato estable, ver parse_summary)."""
+    return (f"{SUMMARY_TRAILER}: notes +{len(summary['added'])} ~{len(summary['modified'])} "
+            f">{len(summary['renamed'])} -{len(summary['deleted'])}; words +{summary['words_added']} "
+            f"-{summary['words_removed']}; links +{summary['links_added']} -{summary['links_removed']}; "
+            f"tags +{summary['tags_added']} -{summary['tags_removed']}; "
+            f"lines +{summary['lines_added']} -{summary['lines_removed']}; files {summary['files']}")
+
+def commit_message_with_summary(subject, summary):
+    """Asunto del backup seguido del trailer, o solo el asunto si no hay resumen."""
+    return f"{subject}\n\n{format_trailer(summary)}" if summary else subject
+
+def parse_summary(message):
+    """Lee el trailer de un mensaje de commit. Devuelve un dict de contadores o None si no lo tiene."""
+    for line in reversed(message.splitlines()):
+        if not line.startswith(f"{SUMMARY_TRAILER}:"): continue
+        match = _SUMMARY_RE.search(line)
+        if not match: return None
+        values = [int(v) for v in match.groups()]
+        keys = ('added', 'modified', 'renamed', 'deleted', 'words_added', 'words_removed',
+                'links_added', 'links_removed', 'tags_added', 'tags_removed', 'lines_added', 'lines_removed', 'files')
+        return dict(zip(keys, values))
+    return None
+
+def describe_summary(summary):
+    """Texto corto para la terminal: '2 nueva(s), 3 editada(s) · +120/-15 palabras · +4/-1 enlaces · +1/-0 tags'."""
+    notes = [f"{summary[key]} {label}" for key, label in (('added', 'nueva(s)'), ('modified', 'editada(s)'),
+             ('renamed', 'renombrada(s)'), ('deleted', 'borrada(s)')) if summary[key]]
+    parts = [", ".join(notes) if notes else "sin cambios en notas"]
+    if summary['words_added'] or summary['words_removed']:
+        parts.append(f"+{summary['words_added']}/-{summary['words_removed']} palabras")
+    if summary['links_added'] or summary['links_removed']:
+        parts.append(f"+{summary['links_added']}/-{summary['links_removed']} enlaces")
+    if summary['tags_added'] or summary['tags_removed']:
+        parts.append(f"+{summary['tags_added']}/-{summary['tags_removed']} tags")
+    other = summary['files'] - sum(summary[key] for key in ('added', 'modified', 'renamed', 'deleted'))
+    if other > 0: parts.append(f"{other} otro(s) archivo(s)")
+    return " · ".join(parts)
@@ -0,0 +1,157 @@
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import click
+from .config import get_push_targets, get_setting
+from .git_utils import push_changes, push_to_url
+from .git_session import get_session
+from .logs import log_operation
+
+PUSH_TIMEOUT = 120 # Segundos por intento y destino
+PUSH_RETRIES = 2 # Reintentos tras el primer intento, solo para errores transitorios
+PUSH_BACKOFF = 2.0 # Segundos de espera antes del primer reintento (se duplica en cada uno)
+DEFAULT_REMOTE = 'origin'
+# Las ramas y el indice de backups se replican tal cual en cada destino. Forzados ('+'): tras
+# `prune-backups --force` la historia reescrita no es un fast-forward y el espejo debe seguirla
+MIRROR_REFSPECS = ['+refs/heads/*:refs/heads/*', '+refs/vaultflow/backups/*:refs/vaultflow/backups/*']
+TARGET_REF_PREFIX = 'refs/vaultflow/targets/' # <destino>/<rama>: ultimo commit enviado a cada destino extra
+# Por la causa concreta: "unable to access" es solo el prefijo de git para cualquier error HTTP,
+# tambien 401/403 o certificados, que no se arreglan reintentando
+_TRANSIENT_ERRORS = (
+    'tiempo agotado', 'could not resolve host', 'connection timed out', 'connection refused',
+    'connection reset', 'network is unreachable', 'the remote end hung up', 'early eof',
+    'failed to connect', 'operation timed out', 'temporary failure', 'the requested url returned error: 5',
+)
+
+def _is_transient(message):
+    lowered = message.lower()
+    return any(pattern in lowered for pattern in _TRANSIENT_ERRORS)
+
+def is_local_target(url):
+    """Ruta local (disco externo, NAS montado) frente a URL o destino ssh tipo `host:ruta`."""
+    if '://' in url: return False
+    return os.path.isabs(os.path.expanduser(url)) or ':' not in url.split('/', 1)[0]
+
+def _prepare_local_target(url):
+    """
+    Un destino local (disco externo, NAS montado) se inicializa como repositorio bare si aun
+    no existe. Si falta el directorio padre, el disco no esta montado: no tiene sentido reintentar.
+    """
+    path = os.path.abspath(os.path.expanduser(url))
+    if os.path.isdir(path): return None
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent): return f"No disponible: {parent} no existe (¿disco desmontado?)."
+    result = subprocess.run(['git', 'init', '--bare', '-q', path], capture_output=True, text=True)
+    return None if result.returncode == 0 else f"No se pudo crear el repositorio bare: {result.stderr.strip()}"
+
+def _push_to_target(repo, url, timeout):
+    if is_local_target(url):
+        error = _prepare_local_target(url)
+        if error: return False, error
+        url = os.path.abspath(os.path.expanduser(url))
+    return push_to_url(url, MIRROR_REFSPECS, repo, timeout)
+
+def _local_branches(repo):
+    result = get_session(repo).run(['for-each-ref', '--format=%(objectname) %(refname)', 'refs/heads/'], check=False, text=True)
+    return [line.split(' ', 1) for line in result.stdout.splitlines() if ' ' in line]
+
+def _record_pushed(repo, name, branches):
+    """
+    Guarda en refs/vaultflow/targets/<destino>/ lo que recibio el destino (como los refs de los
+    bundles): sin ellos, la compactacion no sabria que esa historia ya salio del equipo.
+    """
+    commands = [f"update {TARGET_REF_PREFIX}{name}/{ref[len('refs/heads/'):]} {oid}\n" for oid, ref in branches]
+    if commands:
+        get_session(repo).run(['update-ref', '--stdin'], input=''.join(commands).encode(), check=False, invalidates=True)
+
+def _push_default_remote(repo, timeout):
+    return push_changes(repo, timeout=timeout, allow_prompt=False)
+
+def push_with_retries(push, retries=None, backoff=None):
+    """Ejecuta `push` y lo repite con espera exponencial mientras el error sea transitorio."""
+    retries = get_setting('push_retries', PUSH_RETRIES) if retries is None else retries
+    delay = get_setting('push_backoff_seconds', PUSH_BACKOFF) if backoff is None else backoff
+    attempts = 0
+    while True:
+        attempts += 1
+        success, message = push()
+        if success or attempts > retries or not _is_transient(message):
+            return success, message, attempts
+        time.sleep(delay)
+        delay *= 2
+
+def _has_remote(repo):
+    return bool(get_session(repo).run(['remote'], check=False, text=True).stdout.strip())
+
+def push_targets_for(repo=None):
+    """[(nombre, url o None)]: el remoto por defecto (si existe) y los destinos configurados."""
+    extra = get_push_targets(repo)
+    targets = []
+    if not extra or _has_remote(repo):
+        targets.append((DEFAULT_REMOTE, None))  # Conserva el comportamiento de `git push` de siempre
+    targets.extend(sorted(extra.items()))
+    return targets
+
+def push_all_targets(repo=None, timeout=None, retries=None):
+    """
+    Hace push a todos los destinos del vault en paralelo. Cada destino tiene su propio timeout y
+    reintentos, asi que uno lento o caido no retrasa al resto. Devuelve un resultado por destino.
+    """
+    timeout = timeout or get_setting('push_timeout_seconds', PUSH_TIMEOUT)
+    targets = push_targets_for(repo)
+
+    def run(name, url):
+        started = time.monotonic()
+        if url is None:
+            push = lambda: _push_default_remote(repo, timeout)
+        else:
+            branches = _local_branches(repo)  # Antes del push: lo que se registra seguro que llego
+            push = lambda: _push_to_target(repo, url, timeout)
+        try:
+            success, message, attempts = push_with_retries(push, retries)
+            if success and url is not None: _record_pushed(repo, name, branches)
+        except Exception as e:
+            success, message, attempts = False, f"Error inesperado: {e}", 1
+        return {'target': name, 'url': url, 'success': success, 'detail': message,
+                'attempts': attempts, 'duration': time.monotonic() - started}
+
+    with ThreadPoolExecutor(max_workers=max(1, len(targets))) as executor:
+        futures = [executor.submit(run, name, url) for name, url in targets]
+        results = [future.result() for future in as_completed(futures)]
+    order = {name: i for i, (name, _) in enumerate(targets)}
+    results.sort(key=lambda r: order[r['target']])
+    for result in results:
+        log_operation("push", f"{result['target']}: {result['detail'].strip()}", success=result['success'], repo=repo)
+    return results
+
+def print_push_report(results):
+    """Tabla con el resultado de cada destino."""
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Resultado del push por destino", title_style="bold magenta", border_style="magenta")
+    table.add_column("Destino", style="cyan")
+    table.add_column("Resultado")
+    table.add_column("Detalle", overflow="fold")
+    table.add_column("Intentos", justify="right")
+    table.add_column("Tiempo", justify="right")
+    for result in results:
+        table.add_row(
+            result['target'],
+            "[green]✓ EXITO[/green]" if result['success'] else "[red]✗ FALLO[/red]",
+            result['detail'].strip(),
+            str(result['attempts']),
+            f"{result['duration']:.2f}s",
+        )
+    Console().print(table)
+
+def show_targets(repo=None):
+    """Lista los destinos de push adicionales del vault."""
+    targets = get_push_targets(repo)
+    if not targets:
+        click.secho("Este vault solo hace push a su remoto por defecto. Anade destinos con 'vaultflow targets add'.", fg="yellow")
+        return
+    for name, url in sorted(targets.items()):
+        kind = "local" if is_local_target(url) else "remoto"
+        click.echo(f"  {name}: {url} ({kind})")
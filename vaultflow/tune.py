@@ -0,0 +1,143 @@
+import statistics
+import subprocess
+import time
+import click
+from .git_session import get_session
+from .logs import log_operation
+
+BENCHMARK_RUNS = 3
+
+# (clave, valor deseado, descripcion) de los ajustes que aceleran worktrees grandes
+TUNE_SETTINGS = [
+    ('index.version', '4', "Indice v4 (rutas comprimidas, indice mas pequeno)"),
+    ('core.untrackedCache', 'true', "Cache de archivos no rastreados"),
+    ('core.splitIndex', 'true', "Indice dividido (escrituras del indice mas baratas)"),
+    ('core.commitGraph', 'true', "Usar commit-graph al recorrer el historial"),
+    ('gc.writeCommitGraph', 'true', "Actualizar commit-graph en cada gc"),
+    ('fetch.writeCommitGraph', 'true', "Actualizar commit-graph en cada fetch"),
+    ('core.fsmonitor', 'true', "Daemon fsmonitor integrado (evita stat de todo el arbol)"),
+]
+
+def _git_config_values(session):
+    """Lee la configuracion efectiva del repositorio con una sola llamada."""
+    result = session.run(['config', '--list', '-z'], check=False)
+    values = {}
+    for record in result.stdout.split(b'\0'):
+        if not record: continue
+        key, _, value = record.decode('utf-8', errors='replace').partition('\n')
+        values[key.lower()] = value
+    return values
+
+def fsmonitor_supported(session):
+    """El daemon fsmonitor integrado solo existe en algunas plataformas (macOS y Windows)."""
+    result = session.run(['fsmonitor--daemon', 'status'], check=False, text=True)
+    output = (result.stdout + result.stderr).lower()
+    return result.returncode in (0, 1) and 'not supported' not in output and 'is not a git command' not in output
+
+def audit_settings(repo=None):
+    """Devuelve [(clave, valor_actual, valor_deseado, descripcion, aplicable)]."""
+    session = get_session(repo)
+    values = _git_config_values(session)
+    has_fsmonitor = fsmonitor_supported(session)
+    return [
+        (key, values.get(key.lower()), wanted, description, key != 'core.fsmonitor' or has_fsmonitor)
+        for key, wanted, description in TUNE_SETTINGS
+    ]
+
+def _time_command(session, args):
+    """Mediana de varias ejecuciones de un comando de git, en segundos."""
+    session.run(args, check=False)  # Calentamiento: caches del SO, fsmonitor y untracked cache
+    samples = []
+    for _ in range(BENCHMARK_RUNS):
+        started = time.perf_counter()
+        session.run(args, check=False)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+def benchmark(repo=None):
+    """Mide `git status` y `git add` (en seco) sobre el vault."""
+    session = get_session(repo)
+    return {
+        'status': _time_command(session, ['status', '--porcelain']),
+        'add': _time_command(session, ['add', '--dry-run', '--all', '.']),
+    }
+
+def apply_settings(repo=None):
+    """Aplica los ajustes pendientes y reescribe el indice. Devuelve la lista de errores."""
+    session = get_session(repo)
+    errors = []
+    for key, current, wanted, _, applicable in audit_settings(repo):
+        if not applicable or current == wanted: continue
+        try:
+            session.run(['config', '--local', key, wanted])
+        except subprocess.CalledProcessError as e:
+            errors.append(f"{key}: {e.stderr.decode().strip()}")
+    # El cambio de version reescribe el indice completo: en la misma llamada --split-index no
+    # llega a crear el indice compartido, asi que va en un paso aparte
+    steps = [
+        ['update-index', '--index-version', '4'],
+        ['update-index', '--untracked-cache', '--split-index'],
+        ['commit-graph', 'write', '--reachable', '--changed-paths'],
+    ]
+    for args in steps:
+        try:
+            session.run(args)
+        except subprocess.CalledProcessError as e:
+            errors.append(f"git {' '.join(args[:2])}: {e.stderr.decode().strip()}")
+    return errors
+
+def tune_vault(repo=None, check_only=False, run_benchmark=True):
+    """Audita y aplica el perfil de rendimiento para vaults grandes, con benchmark antes/despues."""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    audit = audit_settings(repo)
+    table = Table(title="Ajustes de rendimiento de Git", title_style="bold magenta", border_style="magenta")
+    table.add_column("Ajuste", style="cyan")
+    table.add_column("Actual")
+    table.add_column("Recomendado")
+    table.add_column("Descripcion", style="dim")
+    for key, current, wanted, description, applicable in audit:
+        if not applicable:
+            shown = "[dim]no disponible en esta plataforma[/dim]"
+        elif current == wanted:
+            shown = f"[green]{current}[/green]"
+        else:
+            shown = f"[yellow]{current or '(sin definir)'}[/yellow]"
+        table.add_row(key, shown, wanted, description)
+    console.print(table)
+
+    pending = [item for item in audit if item[4] and item[1] != item[2]]
+    if check_only:
+        if pending: console.print(f"[yellow]{len(pending)} ajuste(s) pendiente(s). Ejecuta 'vaultflow tune' para aplicarlos.[/yellow]")
+        else: console.print("[green]✓ El vault ya tiene el perfil de rendimiento aplicado.[/green]")
+        return
+
+    before = benchmark(repo) if run_benchmark else None
+    errors = apply_settings(repo)
+    after = benchmark(repo) if run_benchmark else None
+
+    for error in errors:
+        console.print(f"[red]✗ {error}[/red]")
+    if before and after:
+        results = Table(title="Benchmark (mediana de ejecuciones)", title_style="bold magenta", border_style="magenta")
+        results.add_column("Comando", style="cyan")
+        results.add_column("Antes", justify="right")
+        results.add_column("Despues", justify="right")
+        results.add_column("Diferencia", justify="right")
+        for name, label in (('status', 'git status'), ('add', 'git add (en seco)')):
+            change = (after[name] - before[name]) / before[name] * 100 if before[name] else 0.0
+            color = "green" if change <= 0 else "yellow"
+            results.add_row(label, f"{before[name] * 1000:.1f} ms", f"{after[name] * 1000:.1f} ms", f"[{color}]{change:+.1f}%[/{color}]")
+        console.print(results)
+
+    message = f"Perfil de rendimiento aplicado ({len(pending)} ajuste(s))."
+    if before and after:
+        message += f" status: {before['status'] * 1000:.1f} -> {after['status'] * 1000:.1f} ms."
+    if errors:
+        click.secho("✗ Algunos ajustes no se pudieron aplicar.", fg="red")
+        log_operation("tune", message + " Errores: " + "; ".join(errors), success=False, repo=repo)
+    else:
+        click.secho(f"✓ {message}", fg="green")
+        log_operation("tune", message, repo=repo)
@@ -1,15 +1,52 @@
-import pyfiglet
-from rich.console import Console
-from rich.text import Text
+import os
+import sys
+import tempfile
+import click
+from .config import CONFIG_DIR
+
+BANNER_FONT = "standard"
+BANNER_CACHE_FILE = os.path.join(CONFIG_DIR, f"banner-{BANNER_FONT}.txt")
+
+def get_banner_text():
+    """
+    Devuelve el banner ASCII art ya renderizado. pyfiglet solo se importa la primera vez;
+    despues el resultado se lee de la cache en ~/.vaultflow.
+    """
+    try:
+        with open(BANNER_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        pass
+    import pyfiglet
+    banner_text = pyfiglet.figlet_format("VAULTFLOW", font=BANNER_FONT)
+    cache_dir = os.path.dirname(BANNER_CACHE_FILE)
+    try:
+        # Escritura atomica (como la configuracion): otra invocacion nunca lee un banner a medias
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".banner-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(banner_text)
+            os.replace(tmp_path, BANNER_CACHE_FILE)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+    except OSError:
+        pass # Sin cache: se volvera a renderizar la proxima vez
+    return banner_text
+
+def human_size(n):
+    """Bytes en unidades legibles: '512 B', '4.4 KB', '1.2 GB'."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024 or unit == 'GB': return f"{n:.1f} {unit}" if unit != 'B' else f"{n} B"
+        n /= 1024
+
+def should_display_banner(no_banner=False):
+    """El banner solo se muestra en sesiones interactivas (stdout conectado a una terminal)."""
+    return not no_banner and sys.stdout.isatty()
 
 def display_banner():
     """
     Muestra un banner ASCII art con el nombre de la herramienta, alineado a la izquierda.
     """
-    console = Console()
-    banner_text = pyfiglet.figlet_format("VAULTFLOW", font="standard")
-    
-    # Texto del banner alineado a la izquierda por defecto
-    text = Text(banner_text, style="bold magenta")
-    
-    console.print(text)
+    click.secho(get_banner_text(), fg="magenta", bold=True)
@@ -0,0 +1,227 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import sys
+import time
+from datetime import datetime
+import click
+from .git_utils import filter_ignored_paths, stage_paths, count_staged_paths, commit_changes
+from .logs import log_operation
+from .attachments import prepare_backup
+from .backup_index import record_backup
+from .summary import summarize_staged, commit_message_with_summary
+from .maintenance import after_backup
+
+DEFAULT_DEBOUNCE = 10.0 # Segundos sin eventos antes de hacer el commit
+DEFAULT_POLL_INTERVAL = 2.0
+MAX_DELAY_FACTOR = 6 # Con escrituras continuas, el commit se hace como mucho a los 6 debounces
+
+# Archivos que cambian constantemente y no deben provocar commits
+VOLATILE_PATTERNS = (
+    '.obsidian/workspace*.json',
+    '.vaultflow_log.json*',
+)
+SKIP_DIRS = frozenset({'.git', '.trash'})
+
+def is_volatile_path(relpath):
+    """Indica si un cambio en esta ruta (relativa al vault, con '/') debe ignorarse."""
+    if relpath.split('/', 1)[0] in SKIP_DIRS: return True
+    return any(fnmatch.fnmatchcase(relpath, pattern) for pattern in VOLATILE_PATTERNS)
+
+def _relpath(root, path):
+    return os.path.relpath(path, root).replace(os.sep, '/')
+
+class PollingWatcher:
+    """Detecta cambios comparando mtime y tamano de los archivos entre dos recorridos."""
+
+    backend = "sondeo"
+
+    def __init__(self, root, interval=DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        stack = [self.root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        rel = _relpath(self.root, entry.path)
+                        if entry.is_dir(follow_symlinks=False):
+                            if rel.split('/', 1)[0] not in SKIP_DIRS: stack.append(entry.path)
+                            continue
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        snapshot[rel] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return snapshot
+
+    def poll(self):
+        """Devuelve las rutas que cambiaron desde el recorrido anterior."""
+        snapshot = self._scan()
+        old = self._snapshot
+        self._snapshot = snapshot
+        changed = {path for path, sig in snapshot.items() if old.get(path) != sig}
+        changed.update(path for path in old if path not in snapshot)
+        return changed
+
+    def wait(self, timeout):
+        time.sleep(self.interval if timeout is None else max(0.0, min(timeout, self.interval)))
+        return self.poll()
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Vigila el arbol del vault con inotify (Linux), via ctypes y sin dependencias."""
+
+    backend = "inotify"
+
+    IN_MODIFY = 0x2
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, root):
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 fallo")
+        self._watches = {}
+        self._add_tree(root)
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"No se pudo vigilar {path} (¿limite fs.inotify.max_user_watches?)")
+        self._watches[wd] = path
+
+    def _add_tree(self, top, changed=None):
+        """Vigila `top` y sus subdirectorios; si `changed` se indica, anota sus archivos (creados antes del watch)."""
+        for current, dirs, files in os.walk(top):
+            dirs[:] = [d for d in dirs if _relpath(self.root, os.path.join(current, d)).split('/', 1)[0] not in SKIP_DIRS]
+            self._add_watch(current)
+            if changed is not None:
+                changed.update(_relpath(self.root, os.path.join(current, f)) for f in files)
+
+    def wait(self, timeout):
+        """Espera eventos hasta `timeout` segundos y devuelve las rutas afectadas."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable: return set()
+        try:
+            data = os.read(self._fd, 1024 * 1024)
+        except BlockingIOError:
+            return set()
+        changed, offset = set(), 0
+        while offset < len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            name = data[offset + self._EVENT.size: offset + self._EVENT.size + length].rstrip(b'\0')
+            offset += self._EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                changed.add('.')  # Se perdieron eventos: preparar todo el vault
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None or not name: continue
+            path = os.path.join(directory, os.fsdecode(name))
+            rel = _relpath(self.root, path)
+            changed.add(rel)
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO) and os.path.isdir(path):
+                if rel.split('/', 1)[0] not in SKIP_DIRS:
+                    self._add_tree(path, changed)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+def create_watcher(root, force_polling=False, poll_interval=DEFAULT_POLL_INTERVAL):
+    """inotify en Linux; sondeo periodico en otras plataformas o si inotify no esta disponible."""
+    if not force_polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            click.secho(f"! inotify no disponible ({e}); se usara sondeo.", fg="yellow")
+    return PollingWatcher(root, poll_interval)
+
+def commit_changed_paths(paths, repo=None):
+    """
+    Prepara solo las rutas que cambiaron y crea un commit de backup.
+    Devuelve el mensaje del commit, o None si no habia nada que respaldar.
+    """
+    started = time.perf_counter()
+    candidates = sorted(p for p in paths if p == '.' or not is_volatile_path(p))
+    candidates = filter_ignored_paths(candidates, repo)
+    if not candidates: return None
+    candidates += prepare_backup(repo)  # .gitattributes si anoto archivos grandes
+    if not stage_paths(candidates, repo):
+        log_operation("watch", "Fallo al preparar los cambios detectados", success=False, repo=repo)
+        return None
+    summary = summarize_staged(repo)
+    files = summary['files'] if summary else count_staged_paths(repo)  # Archivos reales, no carpetas
+    if not files: return None
+    now = datetime.now()
+    commit_message = f"Backup vaultflow - {now.strftime('%Y-%m-%d %H:%M:%S')}"
+    if not commit_changes(commit_message_with_summary(commit_message, summary), repo):
+        log_operation("watch", "Fallo al crear el backup (commit)", success=False, repo=repo)
+        return None
+    record_backup(repo, now)
+    log_operation("watch", f"{commit_message} ({files} archivo(s))", repo=repo,
+                  duration=time.perf_counter() - started, files=files)
+    after_backup(repo)
+    return commit_message
+
+def watch_vault(repo=None, debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL, force_polling=False):
+    """Bucle principal: agrupa rafagas de cambios y hace un backup tras `debounce` segundos de calma."""
+    root = os.path.abspath(repo or os.getcwd())
+    watcher = create_watcher(root, force_polling, poll_interval)
+    click.secho(f"Vigilando {root} ({watcher.backend}, debounce {debounce:g}s). Ctrl+C para salir.", fg="cyan")
+    pending, first_event, last_event = set(), None, None
+
+    def flush():
+        message = commit_changed_paths(pending, root)
+        if message:
+            click.secho(f"✓ {message} ({len(pending)} cambio(s) detectado(s))", fg="green")
+        pending.clear()
+
+    try:
+        while True:
+            timeout = None
+            if pending:
+                now = time.monotonic()
+                deadline = min(last_event + debounce, first_event + debounce * MAX_DELAY_FACTOR)
+                timeout = max(0.0, deadline - now)
+            changed = {p for p in watcher.wait(timeout) if p == '.' or not is_volatile_path(p)}
+            now = time.monotonic()
+            if changed:
+                if not pending: first_event = now
+                pending |= changed
+                last_event = now
+            if pending and (now - last_event >= debounce or now - first_event >= debounce * MAX_DELAY_FACTOR):
+                flush()
+    except KeyboardInterrupt:
+        if pending: flush()
+        click.echo("\nVigilancia detenida.")
+    finally:
+        watcher.close()